@@ -0,0 +1,535 @@
+"""Benchmarks for the log monitor pipeline.
+
+Runs on any OS against the platform-neutral core (notifier_core.py). Settings
+live in a temporary AppData folder, and the startup suite launches the full
+app with the Windows and tray modules replaced by the stubs in winstubs.py.
+
+Usage:
+    python benchmarks/bench.py                       # every suite
+    python benchmarks/bench.py matcher latency       # some suites
+    python benchmarks/bench.py --json results.json   # also save the numbers
+    python benchmarks/bench.py --compare old.json new.json
+
+Suites:
+    matcher   matcher throughput and memory for few and many triggers or rules
+    longline  memory and throughput on one giant line, live and in --scan
+    tail      end-to-end catch-up throughput of the monitor thread
+    latency   time from a line being written to the log until its trigger fires
+    startup   time from launch until the tray is up and the logs are open
+    history   event history write rate and query times with a million events
+    sink      event sink throughput, batching and recovery against local stand-in endpoints
+    idle      wakeups of the whole app with no editor running, with and without idle mode, and resume time
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import winstubs  # noqa: F401 - temporary AppData, must come before notifier_core
+import notifier_core as core
+from loggen import LogGenerator, append_live
+from sinkserver import HttpStandIn, TcpStandIn
+
+SENTINEL = "BenchSentinel::Fired"
+
+def synthetic_triggers(count, rng, rules=False):
+    """The default triggers plus made-up "LogCategory: Error" style ones.
+
+    With rules, the made-up ones use category/verbosity rules instead of keywords.
+    """
+    triggers = [dict(t) for t in core.DEFAULT_SETTINGS["triggers"]]
+    while len(triggers) < count:
+        name = "Log" + "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(12))
+        if rules:
+            triggers.append({"name": name, "keywords": [], "category": name, "verbosity": ["Error", "Warning"],
+                             "sound_file": "", "notify": True})
+        else:
+            triggers.append({"name": name, "keywords": [f"{name}: Error", f"{name}: Warning"],
+                             "sound_file": "", "notify": True})
+    return triggers[:count]
+
+def legacy_scan(triggers, data):
+    """The original per-line nested keyword loop, for reference."""
+    hits = 0
+    for line in data.decode("utf-8", errors="ignore").splitlines():
+        line_lower = line.lower()
+        for trigger in triggers:
+            if any(k.lower() in line_lower for k in trigger["keywords"]):
+                hits += 1
+                break
+    return hits
+
+# ---------------- MATCHER ----------------
+def bench_matcher(size_mb=32):
+    generator = LogGenerator(hit_rate=0.001)
+    data = generator.block(size_mb * 1048576)
+    lines = data.count(b"\n")
+    blocks = [data[i:i + 1048576] for i in range(0, len(data), 1048576)]
+    # Realign blocks on line boundaries like the tailer does
+    aligned, carry = [], b""
+    for block in blocks:
+        block = carry + block
+        end = block.rfind(b"\n") + 1
+        aligned.append(block[:end])
+        carry = block[end:]
+
+    results = {}
+    for label, count, rules in (("4_triggers", 4, False), ("50_triggers", 50, False), ("50_rules", 50, True)):
+        triggers = synthetic_triggers(count, generator.rng, rules)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        matcher = core.TriggerMatcher(triggers)
+        build_ms = (time.perf_counter() - started) * 1000
+        matcher_kb = tracemalloc.get_traced_memory()[0] / 1024
+
+        # Peak memory while scanning a few blocks
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        for block in aligned[:4]:
+            sum(1 for _ in matcher.scan_block(block))
+        scan_peak_kb = (tracemalloc.get_traced_memory()[1] - base) / 1024
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        hits = sum(1 for block in aligned for _ in matcher.scan_block(block))
+        elapsed = time.perf_counter() - started
+
+        result = results[f"matcher_{label}"] = {
+            "mb_per_s": round(len(data) / 1048576 / elapsed, 1),
+            "lines_per_s": round(lines / elapsed),
+            "hits": hits,
+            "build_ms": round(build_ms, 2),
+            "matcher_kb": round(matcher_kb, 1),
+            "scan_peak_kb": round(scan_peak_kb, 1),
+        }
+        if not rules:  # The original loop only knew keywords
+            started = time.perf_counter()
+            legacy_scan(triggers, aligned[0])
+            legacy_elapsed = (time.perf_counter() - started) * len(aligned)
+            result["legacy_mb_per_s"] = round(len(data) / 1048576 / legacy_elapsed, 1)
+    return results
+
+# ---------------- LONG LINES ----------------
+def bench_longline(size_mb=64):
+    """One size_mb line without a newline until the end, with a keyword cut across a window edge."""
+    max_line = core.DEFAULT_SETTINGS["max_line_length"]
+    matcher = core.TriggerMatcher([{"name": "Sentinel", "keywords": [SENTINEL]}], max_line)
+    filler = b"x" * 1048576
+    cut = 3 * max_line - len(SENTINEL) // 2  # The keyword straddles the end of the third window
+
+    def blocks():
+        yield b"[2025.01.15-12.00.00:000][  0]LogBench: Display: " + b"x" * (cut - 48) + SENTINEL.encode()
+        for _ in range(size_mb):
+            yield filler
+        yield b"\n"
+
+    tracemalloc.start()
+    stream = core.LineStream()
+    started = time.perf_counter()
+    hits = sum(1 for block in blocks() for _ in stream.match(matcher, block))
+    elapsed = time.perf_counter() - started
+    peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="uefn-bench-"), "UnrealEditorFortnite.log")
+    with open(path, "wb") as f:
+        for block in blocks():
+            f.write(block)
+    tracemalloc.start()
+    started = time.perf_counter()
+    scan_hits = len(list(core.scan_logs([path], matcher.triggers, jobs=1, max_line=max_line)))
+    scan_elapsed = time.perf_counter() - started
+    scan_peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    os.remove(path)
+
+    return {"longline": {
+        "mb_per_s": round(size_mb / elapsed, 1),
+        "hits": hits,
+        "peak_kb": round(peak_kb, 1),
+        "scan_mb_per_s": round(size_mb / scan_elapsed, 1),
+        "scan_hits": scan_hits,
+        "scan_peak_kb": round(scan_peak_kb, 1),
+    }}
+
+# ---------------- MONITOR HARNESS ----------------
+class Monitor:
+    """Runs monitor_log on a temporary log folder and records when triggers fire."""
+
+    def __init__(self, watch_backend="auto", **settings):
+        self.folder = tempfile.mkdtemp(prefix="uefn-bench-logs-")
+        self.log_path = os.path.join(self.folder, "UnrealEditorFortnite.log")
+        open(self.log_path, "w").close()
+        self.fired = []  # (keyword, perf_counter)
+        self.event = threading.Event()
+        self.watch_backend = watch_backend
+        self.settings = settings
+
+    def __enter__(self):
+        triggers = [dict(t) for t in core.DEFAULT_SETTINGS["triggers"]]
+        triggers.append({"name": "Sentinel", "keywords": [SENTINEL], "sound_file": "", "notify": True})
+        core.apply_settings(dict(
+            core.DEFAULT_SETTINGS,
+            triggers=triggers,
+            log_folder=self.folder,
+            watch_backend=self.watch_backend,
+            trigger_cooldown=0,
+            catchup_window=0,
+            **self.settings
+        ), save=False)
+
+        original = core.run_trigger_actions
+
+        def hooked(trigger, keyword, *args, **kwargs):
+            original(trigger, keyword, *args, **kwargs)
+            self.fired.append((keyword, time.perf_counter()))
+            self.event.set()
+
+        self._original = original
+        core.run_trigger_actions = hooked
+        core.stop_thread = False
+        self.thread = threading.Thread(target=core.monitor_log, daemon=True)
+        self.thread.start()
+        while core.log_watcher is None or core.status_message != "Monitoring Log":
+            time.sleep(0.01)
+        time.sleep(0.2)
+        return self
+
+    def __exit__(self, *exc):
+        core.stop_monitor()
+        self.thread.join(5)
+        core.log_watcher = None
+        core.run_trigger_actions = self._original
+
+    def wait_for(self, keyword, timeout=30):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            for fired_keyword, at in self.fired:
+                if fired_keyword == keyword:
+                    return at
+            self.event.wait(0.05)
+            self.event.clear()
+        raise TimeoutError(f"{keyword} never fired")
+
+# ---------------- TAIL ----------------
+def bench_tail(size_mb=64):
+    data = LogGenerator(hit_rate=0.0005).block(size_mb * 1048576)
+    with Monitor() as monitor:
+        started = time.perf_counter()
+        with open(monitor.log_path, "ab") as f:
+            f.write(data)
+            f.write(f"[2025.01.15-12.00.00:000][  0]{SENTINEL}\n".encode())
+        elapsed = monitor.wait_for(SENTINEL) - started
+    return {"tail_catchup": {
+        "mb_per_s": round(size_mb / elapsed, 1),
+        "seconds": round(elapsed, 3),
+    }}
+
+# ---------------- LATENCY ----------------
+def bench_latency(samples=40, background_rate=5000):
+    results = {}
+    for backend in ("auto", "polling"):
+        with Monitor(backend) as monitor:
+            # Editor noise in the background, without trigger hits
+            noise = threading.Thread(
+                target=append_live,
+                args=(monitor.log_path, background_rate, samples * 0.7 + 2, LogGenerator(hit_rate=0)),
+                daemon=True,
+            )
+            noise.start()
+
+            delays = []
+            for i in range(samples):
+                keyword_line = f"[2025.01.15-12.00.00:000][  0]{SENTINEL} {i}\n"
+                monitor.fired.clear()
+                with open(monitor.log_path, "a", encoding="utf-8") as f:
+                    written = time.perf_counter()
+                    f.write(keyword_line)
+                delays.append((monitor.wait_for(SENTINEL) - written) * 1000)
+                time.sleep(0.05)
+            noise.join()
+
+        name = type(core.create_log_watcher()).__name__ if backend == "auto" else "PollingWatcher"
+        delays.sort()
+        results[f"latency_{backend}"] = {
+            "watcher": name,
+            "p50_ms": round(statistics.median(delays), 2),
+            "p95_ms": round(delays[int(len(delays) * 0.95) - 1], 2),
+            "max_ms": round(delays[-1], 2),
+        }
+    return results
+
+# ---------------- STARTUP ----------------
+STARTUP_SCRIPT = """
+import runpy, sys
+import winstubs
+path = sys.argv[1]
+sys.argv = [path, "--profile-startup"]
+runpy.run_path(path, run_name="__main__")
+"""
+
+def bench_startup(runs=7):
+    """Run the app with --profile-startup in fresh processes; median time of each step."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    app = os.path.join(os.path.dirname(here), "src", "uefn_notifier.py")
+    steps = {}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT, app], cwd=here, capture_output=True, text=True, check=True, timeout=60
+        ).stdout
+        # "<step, padded to 20>  <ms> ms  (+<ms> ms)", between any warnings
+        for step, ms in re.findall(r"^(.{20}) +([\d.]+) ms  \(", output, re.M):
+            steps.setdefault(step.strip(), []).append(float(ms))
+    return {"startup": {
+        step.replace(" ", "_") + "_ms": round(statistics.median(times), 1)
+        for step, times in sorted(steps.items(), key=lambda entry: statistics.median(entry[1]))
+    }}
+
+# ---------------- HISTORY ----------------
+def bench_history(count=1000000):
+    """Fill a fresh event history the way log_event does, then time what the History view runs."""
+    store = core.EventStore(os.path.join(tempfile.mkdtemp(prefix="uefn-bench-"), "events.db"))
+    types = [t["name"].upper() for t in core.DEFAULT_SETTINGS["triggers"]] + ["NOTIFY", "LAUNCHED"]
+    sources = [f"UnrealEditorFortnite_{i}.log" for i in range(20)]
+    start = time.time() - count * 10
+    started = time.perf_counter()
+    for i in range(count):
+        source = sources[i % len(sources)]
+        store.write((start + i * 10, types[i % len(types)], f"Triggered by: bench {i} in {source}", source))
+    store.flush(timeout=600)
+    write_elapsed = time.perf_counter() - started
+
+    def timed_ms(fn, *args, **kwargs):
+        times = []
+        for _ in range(5):
+            started = time.perf_counter()
+            fn(*args, **kwargs)
+            times.append((time.perf_counter() - started) * 1000)
+        return round(statistics.median(times), 2)
+
+    failure = types[1]
+    page = store.query(limit=200)
+    results = {"history": {
+        "events_per_s": round(count / write_elapsed),
+        "latest_page_ms": timed_ms(store.query, limit=200),
+        "next_page_ms": timed_ms(store.query, limit=200, before=page[-1]),
+        "by_trigger_ms": timed_ms(store.query, failure, limit=200),
+        "by_log_ms": timed_ms(store.query, source=sources[3], limit=200),
+        "last_week_ms": timed_ms(store.query, failure, since=time.time() - 7 * 86400, limit=200),
+        "totals_ms": timed_ms(store.totals),
+        "per_day_30d_ms": timed_ms(store.daily_counts, failure, since=time.time() - 30 * 86400),
+    }}
+    store.close()
+    return results
+
+# ---------------- EVENT SINK ----------------
+def bench_sink(count=20000, outage=2000):
+    """Send count events through log_event, then outage more while the endpoint is down."""
+    results = {}
+    for label, stand_in in (("http", HttpStandIn), ("tcp", TcpStandIn)):
+        server = stand_in().start()
+        core.apply_settings(dict(core.DEFAULT_SETTINGS, event_sink_url=server.url), save=False)
+
+        started = time.perf_counter()
+        for i in range(count):
+            core.log_event("BENCH", f"event {i}", "UnrealEditorFortnite.log")
+        while len(server.events) < count:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+
+        # The monitor thread must not notice the endpoint being down
+        server.stop()
+        calls = []
+        for i in range(outage):
+            called = time.perf_counter()
+            core.log_event("BENCH", f"event {count + i}", "UnrealEditorFortnite.log")
+            calls.append((time.perf_counter() - called) * 1e6)
+        core.event_sink.flush(timeout=30)
+        spooled = core.event_sink.spooled
+        server.start()
+        restarted = time.perf_counter()
+        while len(server.events) < count + outage:
+            time.sleep(0.01)
+        calls.sort()
+
+        result = results[f"sink_{label}"] = {
+            "events_per_s": round(count / elapsed),
+            "connections": server.connections,
+            "send_p99_us": round(calls[int(len(calls) * 0.99) - 1], 1),
+            "spooled": spooled,
+            "recovery_s": round(time.perf_counter() - restarted, 2),
+            "in_order": [e["message"] for e in server.events] == [f"event {i}" for i in range(count + outage)],
+        }
+        if label == "http":
+            result["posts"] = server.batches
+        server.stop()
+    core.apply_settings(core.DEFAULT_SETTINGS, save=False)
+    core.sync_event_sink()
+    return results
+
+# ---------------- IDLE ----------------
+IDLE_SCRIPT = """
+import json, os, runpy, sys
+import winstubs
+import notifier_core as core
+
+class FileProcessList(core.ProcessList):
+    \"\"\"Process names from a file the benchmark writes, one per line.\"\"\"
+
+    def __init__(self, path):
+        self.path = path
+
+    def names(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read().split()
+
+with open(core.SETTINGS_FILE, "w", encoding="utf-8") as f:
+    json.dump(json.loads(sys.argv[3]), f)
+core.editor_processes = FileProcessList(sys.argv[2])
+path = sys.argv[1]
+sys.argv = [path, "--headless", "--no-sound", "--log-folder", sys.argv[4]]
+runpy.run_path(path, run_name="__main__")
+"""
+
+def process_wakeups(pid):
+    """Context switches of every thread of a process so far (Linux), each one a wakeup of a sleeping thread."""
+    total = 0
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/status", encoding="ascii") as f:
+                total += sum(int(line.split()[1]) for line in f if "ctxt_switches" in line)
+        except OSError:
+            pass  # Thread exited meanwhile
+    return total
+
+def bench_idle(seconds=20):
+    """Run the headless app, count its wakeups for seconds after the editor exits, then time a new editor's first hit.
+
+    Wakeups are counted for the whole process (monitor, settings watcher,
+    scheduler, ...) from /proc, so only on Linux.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    app = os.path.join(os.path.dirname(here), "src", "uefn_notifier.py")
+    triggers = core.DEFAULT_SETTINGS["triggers"] + [{"name": "Sentinel", "keywords": [SENTINEL], "notify": True}]
+    results = {}
+    for backend in ("auto", "polling"):
+        for mode in ("off", "on"):
+            folder = tempfile.mkdtemp(prefix="uefn-bench-logs-")
+            log_path = os.path.join(folder, "UnrealEditorFortnite.log")
+            open(log_path, "w").close()
+            processes = os.path.join(folder, "processes.txt")
+            with open(processes, "w", encoding="utf-8") as f:
+                f.write("UnrealEditorFortnite-Win64-Shipping.exe\n")
+            config = dict(core.DEFAULT_SETTINGS, triggers=triggers, watch_backend=backend, idle_mode=mode,
+                          trigger_cooldown=0, catchup_window=0)
+            app_process = subprocess.Popen(
+                [sys.executable, "-c", IDLE_SCRIPT, app, processes, json.dumps(config), folder],
+                cwd=here, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding="utf-8",
+            )
+            output = []  # (perf_counter, line)
+            reader = threading.Thread(
+                target=lambda: output.extend((time.perf_counter(), line) for line in app_process.stdout), daemon=True
+            )
+            reader.start()
+
+            def wait_for(text, timeout=30):
+                deadline = time.perf_counter() + timeout
+                while time.perf_counter() < deadline:
+                    for at, line in list(output):
+                        if text in line:
+                            return at
+                    time.sleep(0.01)
+                raise TimeoutError(f"{text!r} never printed")
+
+            try:
+                wait_for("Status: Monitoring Log")
+                os.remove(processes)  # The editor exits
+                open(processes, "w").close()
+                time.sleep(core.EDITOR_CHECK_INTERVAL + 2)  # Long enough to go idle
+                linux = os.path.isdir(f"/proc/{app_process.pid}/task")
+                before = process_wakeups(app_process.pid) if linux else None
+                time.sleep(seconds)
+                after = process_wakeups(app_process.pid) if linux else None
+                result = results[f"idle_{backend}_{mode}"] = {
+                    "wakeups_per_min": round((after - before) * 60 / seconds, 1) if linux else None,
+                    "idle": any("Idle, editor not running" in line for _, line in output),
+                }
+
+                # A new editor renames the old log away and starts its own
+                with open(processes, "w", encoding="utf-8") as f:
+                    f.write("UnrealEditorFortnite-Win64-Shipping.exe\n")
+                os.replace(log_path, log_path[:-4] + "-backup-1.log")
+                with open(log_path, "a", encoding="utf-8") as f:
+                    written = time.perf_counter()
+                    f.write(f"[2025.01.15-12.00.00:000][  0]{SENTINEL}\n")
+                result["first_hit_ms"] = round((wait_for("Sentinel") - written) * 1000, 1)
+            finally:
+                app_process.terminate()
+                app_process.wait(10)
+    return results
+
+SUITES = {
+    "matcher": bench_matcher, "longline": bench_longline, "tail": bench_tail, "latency": bench_latency,
+    "startup": bench_startup, "history": bench_history, "sink": bench_sink, "idle": bench_idle,
+}
+
+def print_results(results):
+    for name, metrics in results.items():
+        print(name)
+        for metric, value in metrics.items():
+            print(f"    {metric:<18} {value}")
+
+def compare(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{'':<40} {old['version']:>12} {new['version']:>12}")
+    for name, metrics in new["results"].items():
+        for metric, value in metrics.items():
+            before = old["results"].get(name, {}).get(metric)
+            change = ""
+            if isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+                change = f"{(value - before) / before * 100:+.1f}%"
+            print(f"{name + '.' + metric:<40} {str(before):>12} {str(value):>12} {change:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", nargs="*", help=f"suites to run: {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--json", metavar="PATH", help="write the results to a JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in args.suites or SUITES:
+        print(f"Running {name}...", file=sys.stderr)
+        results.update(SUITES[name]())
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": core.__version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Synthetic Unreal Editor log traffic for benchmarks.
+
+Lines look like real editor output:
+
+    [2025.01.15-12.34.56:789][123]LogStreaming: Display: ...
+
+Usage:
+    python benchmarks/loggen.py out.log --lines 1000000
+    python benchmarks/loggen.py out.log --rate 20000 --seconds 30   # append live
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+CATEGORIES = [
+    ("LogStreaming", "Display"),
+    ("LogAssetRegistry", "Display"),
+    ("LogNet", "Verbose"),
+    ("LogUObjectHash", "Log"),
+    ("LogContentBundle", "Log"),
+    ("LogWorldPartition", "Log"),
+    ("LogSlate", "Warning"),
+    ("LogShaderCompilers", "Display"),
+    ("LogDerivedDataCache", "Display"),
+    ("LogValkyrieSummary", "Log"),
+]
+
+# Lines the default triggers fire on
+HIT_LINES = [
+    "LogValkyrieRequestManagerEditor: Error: Request failed with status 500",
+    "LogEditorBuildUtils: Build time 0:01:24",
+    "LogWorldPartitionEditor: Error: HLOD generation failed for actor",
+    "EMemorySamplerState::Ready",
+]
+
+WORDS = (
+    "asset package actor level streaming cell loaded unloaded request texture mesh "
+    "material shader compile cache hit miss island device verse component transform"
+).split()
+
+class LogGenerator:
+    """Produces UE-style log lines with a given length distribution and hit rate."""
+
+    def __init__(self, mean_length=120, sigma=0.6, hit_rate=0.001, seed=1):
+        self.mean_length = mean_length
+        self.sigma = sigma
+        self.hit_rate = hit_rate
+        self.rng = random.Random(seed)
+        self.clock = datetime(2025, 1, 15, 12, 0, 0)
+        self.frame = 0
+
+    def prefix(self):
+        self.clock += timedelta(microseconds=self.rng.randint(0, 2000))
+        self.frame = (self.frame + (self.rng.random() < 0.05)) % 1000
+        ms = self.clock.microsecond // 1000
+        return f"[{self.clock:%Y.%m.%d-%H.%M.%S}:{ms:03d}][{self.frame:3d}]"
+
+    def message(self):
+        # Lognormal lengths: mostly short lines with a long tail, like real logs
+        length = int(self.rng.lognormvariate(0, self.sigma) * self.mean_length)
+        category, verbosity = self.rng.choice(CATEGORIES)
+        words = []
+        size = len(category) + len(verbosity) + 4
+        while size < length:
+            word = self.rng.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return f"{category}: {verbosity}: {' '.join(words)}"
+
+    def line(self):
+        if self.rng.random() < self.hit_rate:
+            return self.prefix() + self.rng.choice(HIT_LINES) + "\n"
+        return self.prefix() + self.message() + "\n"
+
+    def lines(self, count):
+        return [self.line() for _ in range(count)]
+
+    def block(self, size):
+        """About size bytes of complete lines, utf-8 encoded."""
+        parts = []
+        total = 0
+        while total < size:
+            line = self.line()
+            parts.append(line)
+            total += len(line)
+        return "".join(parts).encode("utf-8")
+
+def write_lines(path, count, generator):
+    with open(path, "a", encoding="utf-8") as f:
+        for start in range(0, count, 10000):
+            f.writelines(generator.lines(min(10000, count - start)))
+
+def append_live(path, rate, seconds, generator, batch_interval=0.01):
+    """Append rate lines per second for seconds, flushing every batch_interval like the editor."""
+    per_batch = max(1, int(rate * batch_interval))
+    deadline = time.perf_counter() + seconds
+    next_batch = time.perf_counter()
+    with open(path, "a", encoding="utf-8") as f:
+        while time.perf_counter() < deadline:
+            f.writelines(generator.lines(per_batch))
+            f.flush()
+            next_batch += batch_interval
+            time.sleep(max(0.0, next_batch - time.perf_counter()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--lines", type=int, default=100000, help="lines to write at once")
+    parser.add_argument("--rate", type=float, help="append live at this many lines per second instead")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of a live append")
+    parser.add_argument("--mean-length", type=int, default=120, help="typical line length in characters")
+    parser.add_argument("--hit-rate", type=float, default=0.001, help="fraction of lines that fire a trigger")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    generator = LogGenerator(args.mean_length, hit_rate=args.hit_rate, seed=args.seed)
+    if args.rate:
+        append_live(args.path, args.rate, args.seconds, generator)
+    else:
+        write_lines(args.path, args.lines, generator)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Stand-in endpoints for the event sink (event_sink_url), for testing and benchmarks.
+
+Records what the notifier sends, counting requests and connections, and can
+be stopped and restarted on the same port to play an endpoint that is down.
+
+Usage:
+    python benchmarks/sinkserver.py --http 8765     # then event_sink_url = "http://127.0.0.1:8765/events"
+    python benchmarks/sinkserver.py --tcp 8766      # then event_sink_url = "tcp://127.0.0.1:8766"
+"""
+import argparse
+import json
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StandInSink:
+    """Base of the HTTP and TCP stand-ins: collects events, counts batches and connections.
+
+    A batch is one POST for HTTP, one line for TCP.
+    """
+
+    def __init__(self, port=0, echo=False):
+        self.port = port
+        self.echo = echo
+        self.events = []
+        self.batches = 0
+        self.connections = 0
+        self.status = 200  # HTTP status to answer with
+        self._lock = threading.Lock()
+        self._server = None
+        self._sockets = []  # Open client connections, closed by stop()
+
+    @property
+    def url(self):
+        raise NotImplementedError
+
+    def received(self, events):
+        with self._lock:
+            self.events.extend(events)
+            self.batches += 1
+        if self.echo:
+            for event in events:
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+
+    def connected(self, sock):
+        with self._lock:
+            self.connections += 1
+            self._sockets.append(sock)
+
+    def start(self):
+        self._server = self._create()
+        self.port = self._server.server_address[1]  # Keep the port across restarts
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:  # Like a real outage, also drop the persistent connections
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _create(self):
+        raise NotImplementedError
+
+class HttpStandIn(StandInSink):
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/events"
+
+    def _create(self):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like a real webhook endpoint
+
+            def setup(self):
+                super().setup()
+                sink.connected(self.connection)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if sink.status == 200:
+                    sink.received(json.loads(body))
+                self.send_response(sink.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        server.daemon_threads = True
+        return server
+
+class TcpStandIn(StandInSink):
+    @property
+    def url(self):
+        return f"tcp://127.0.0.1:{self.port}"
+
+    def _create(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                sink.connected(self.connection)
+                for line in self.rfile:
+                    sink.received([json.loads(line)])
+
+        return ReusableTCPServer(("127.0.0.1", self.port), Handler)
+
+class ReusableTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True  # Restart on the same port right away
+    daemon_threads = True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--http", type=int, metavar="PORT", help="accept webhook POSTs on PORT")
+    group.add_argument("--tcp", type=int, metavar="PORT", help="accept JSON lines on PORT")
+    args = parser.parse_args()
+
+    sink = (HttpStandIn(args.http, echo=True) if args.http is not None else TcpStandIn(args.tcp, echo=True)).start()
+    print(f"Listening for events, set event_sink_url to {sink.url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        sink.stop()
+
+if __name__ == "__main__":
+    main()
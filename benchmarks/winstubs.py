@@ -0,0 +1,65 @@
+"""Stand-ins for the Windows-only and GUI modules uefn_notifier imports.
+
+Importing this module before uefn_notifier lets the monitor pipeline run
+headless on Linux: sounds and toasts are recorded instead of played or
+shown, and AppData points at a throwaway folder.
+"""
+import os
+import sys
+import tempfile
+import types
+
+played = []  # (what, flags) per PlaySound call
+toasts = []  # (title, message) per toast shown
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+def install():
+    os.environ["APPDATA"] = tempfile.mkdtemp(prefix="uefn-bench-")
+
+    _module(
+        "winsound",
+        SND_ALIAS=0x10000, SND_ASYNC=0x1, SND_FILENAME=0x20000, SND_MEMORY=0x4, SND_NODEFAULT=0x2,
+        PlaySound=lambda sound, flags: played.append((sound if isinstance(sound, str) else len(sound), flags)),
+    )
+
+    class Notification:
+        def __init__(self, app_id="", title="", msg="", icon=""):
+            self.title = title
+            self.msg = msg
+
+        def set_audio(self, *args, **kwargs):
+            pass
+
+        def show(self):
+            toasts.append((self.title, self.msg))
+
+    _module("winotify", Notification=Notification, audio=types.SimpleNamespace(Default=None))
+
+    class Icon:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def update_menu(self):
+            pass
+
+        def run(self, setup=None):
+            if setup:
+                setup(self)
+
+        def stop(self):
+            pass
+
+    _module("pystray", Icon=Icon, Menu=lambda *items, **kwargs: items, MenuItem=lambda *args, **kwargs: args)
+    _module("PIL", Image=types.SimpleNamespace(open=lambda path: types.SimpleNamespace(load=lambda: None)))
+    _module("pythoncom")
+    _module("win32com")
+    sys.modules["win32com"].shell = _module("win32com.shell", shell=types.SimpleNamespace())
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+install()
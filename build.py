@@ -9,13 +9,15 @@ import re
 
 # Path to your main Python file
 MAIN_FILE = os.path.join("src", "uefn_notifier.py")
+# The platform-neutral core it imports, which holds __version__
+CORE_FILE = os.path.join("src", "notifier_core.py")
 
 # Extract version from __version__ variable
-with open(MAIN_FILE, "r", encoding="utf-8") as f:
+with open(CORE_FILE, "r", encoding="utf-8") as f:
     content = f.read()
 match = re.search(r'__version__\s*=\s*["\'](.+?)["\']', content)
 if not match:
-    raise RuntimeError("Could not find __version__ in main script.")
+    raise RuntimeError("Could not find __version__ in the core module.")
 VERSION = match.group(1)
 
 # Create release folder
@@ -29,7 +31,7 @@ cmd = [
     "--noconsole",
     f"--icon=assets/icon.ico",
     f"--add-data=assets;assets",
-    "src/uefn_notifier.py"
+    MAIN_FILE
 ]
 subprocess.run(cmd, check=True)
 
@@ -0,0 +1,3558 @@
+"""Platform-neutral core of UEFN Notifier: settings, matching, tailing, dispatch
+and the event log.
+
+Nothing here needs Windows or a GUI. What the user sees and hears goes through
+the ActionBackend objects in action_backends, which the tray app
+(uefn_notifier.py) and the --headless mode install.
+"""
+import os
+import sys
+import time
+import threading
+import json
+import copy
+import hashlib
+import re
+import subprocess
+import argparse
+import bisect
+import mmap
+import queue
+import heapq
+import itertools
+import select
+import ctypes
+import ctypes.util
+import codecs
+import shutil
+import socket
+import tempfile
+from collections import deque, namedtuple
+from datetime import datetime
+from types import MappingProxyType
+
+# ---------------- PATHS ----------------
+# %APPDATA% on Windows; ~/.config elsewhere, for headless hosts
+APPDATA_FOLDER = os.path.join(os.getenv("APPDATA") or os.path.join(os.path.expanduser("~"), ".config"), "UEFNNotifier")
+os.makedirs(APPDATA_FOLDER, exist_ok=True)
+
+SETTINGS_FILE = os.path.join(APPDATA_FOLDER, "settings.json")
+EVENT_LOG_FILE = os.path.join(APPDATA_FOLDER, "events.txt")  # Written by older versions, imported into EVENT_DB_FILE once
+EVENT_DB_FILE = os.path.join(APPDATA_FOLDER, "events.db")
+CHECKPOINT_FILE = os.path.join(APPDATA_FOLDER, "checkpoints.json")
+METRICS_FILE = os.path.join(APPDATA_FOLDER, "metrics.json")
+DURATIONS_FILE = os.path.join(APPDATA_FOLDER, "durations.json")
+SINK_SPOOL_FILE = os.path.join(APPDATA_FOLDER, "sink_queue.jsonl")
+INSTANCE_FILE = os.path.join(APPDATA_FOLDER, "instance.json")  # Where the running instance takes commands
+INSTANCE_LOCK_FILE = os.path.join(APPDATA_FOLDER, "instance.lock")
+
+__version__ = "1.4.1"
+
+DEFAULT_SETTINGS = {
+    "log_file": "",
+    "log_folder": "",  # Folder of the editor logs ("" = the editor's default on this machine)
+    "action_command": "",  # Command run for every notification, with UEFN_TITLE / UEFN_MESSAGE set
+    "show_notifications": True,
+    "read_chunk_size": 1048576,  # Bytes read from the log per call
+    "max_line_length": 65536,  # Longer log lines are matched in pieces of this many characters
+    "poll_interval": 0.5,  # Seconds to wait at the end of the log
+    "watch_backend": "auto",  # "auto" uses OS change notifications, "polling" forces the old loop
+    "watch_timeout": 5.0,  # Seconds a change-notification watcher waits before rechecking anyway
+    # "on" closes the logs and sleeps while no editor process runs, "auto" only does so for local editors
+    "idle_mode": "auto",
+    "idle_check_interval": 30.0,  # Seconds between process checks while idle (a new log wakes it sooner)
+    "event_history_limit": 1000000,  # Events kept in events.db, oldest dropped first (0 = keep all)
+    # Also send every event to "http(s)://..." (a JSON array per POST) or "tcp://host:port" (JSON lines)
+    "event_sink_url": "",
+    "event_sink_interval": 1.0,  # Seconds events are collected before they're sent as one batch
+    "trigger_cooldown": 5.0,  # Seconds after a trigger fires in which repeat hits are folded into one summary
+    "checkpoint_interval": 5.0,  # Seconds between saves of each log's read position
+    "catchup_window": 3600,  # On start, catch up on logs checkpointed at most this many seconds ago (0 = never)
+    "metrics_enabled": True,  # Periodically write metrics.json to the AppData folder
+    "metrics_interval": 10.0,  # Seconds between metrics.json updates
+    "metrics_port": 0,  # Serve metrics on http://127.0.0.1:<port>/metrics (0 = off)
+    "project_pattern": r"([^\\/\"]+)\.(?:uefnproject|uproject)\b",  # Finds the project name near the top of a log
+    "duration_history": 500,  # Timed runs kept per sequence and project
+    # Start/end pairs or multi-step sequences that are timed, e.g.
+    # {"name": "Push", "steps": [{"keywords": [...]}, {"keywords": [...]}], "abort": [...], "timeout": 3600}
+    "sequences": [],
+    "triggers": [
+        {
+            "name": "✅ Session Connected",
+            "keywords": ["EMemorySamplerState::Ready"],
+            "sound_file": "default_success.wav",
+            "notify": True
+        },
+        {
+            "name": "❌ Push Failure",
+            "keywords": [
+                "LogValkyrieRequestManagerEditor: Error"
+            ],
+            "sound_file": "",
+            "notify": True
+        },
+        {
+            "name": "✅ HLOD Generated",
+            "keywords": [
+                "LogEditorBuildUtils: Build time"
+            ],
+            "sound_file": "default_success.wav",
+            "notify": True
+        },
+        {
+            "name": "❌ HLOD Failure",
+            "keywords": [
+                "LogWorldPartitionEditor: Error"
+            ],
+            "sound_file": "",
+            "notify": True
+        }
+    ]
+}
+
+stop_thread = False
+log_watcher = None  # Lets stop_monitor wake the monitor thread
+settings_watcher = None
+status_message = "Initializing..."
+last_trigger_time = "--:--:--"
+action_backends = []  # ActionBackend objects that play, show and report
+startup_marks = []  # (step, perf_counter) for --profile-startup
+
+# ---------------- RESOURCE PATH ----------------
+def resource_path(relative_path: str) -> str:
+    """Get absolute path to resource (works in PyInstaller onefile)."""
+    try:
+        base_path = sys._MEIPASS
+    except AttributeError:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+# ---------------- FILES ----------------
+def atomic_write(path, data):
+    """Replace the file at path with data (str or bytes) via a temp file, so it's never half-written."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data.encode("utf-8") if isinstance(data, str) else data)
+    os.replace(tmp_path, path)
+
+# ---------------- TRIGGER MATCHING ----------------
+# [2025.01.15-12.00.00:000][  0]LogCategory: Error: message
+# The timestamp prefix is missing on some lines, and "Log" verbosity isn't written out
+LOG_LINE = re.compile(
+    r"(?:\[(\d{4}\.\d\d\.\d\d-\d\d\.\d\d\.\d\d:\d{3})\]\[\s*(\d+)\])?"
+    r"(\w+): (?:(Fatal|Error|Warning|Display|Verbose|VeryVerbose): )?(.*)",
+    re.DOTALL,
+)
+LOG_TIMESTAMP = re.compile(r"\[(\d{4}\.\d\d\.\d\d-\d\d\.\d\d\.\d\d:\d{3})\]")
+LOG_VERBOSITIES = ("Fatal", "Error", "Warning", "Display", "Log", "Verbose", "VeryVerbose")
+
+LogLine = namedtuple("LogLine", "timestamp frame category verbosity message")
+
+def parse_log_line(line):
+    """Split an Unreal log line into a LogLine, or return None if it has no category."""
+    match = LOG_LINE.match(line)
+    if not match:
+        return None
+    timestamp, frame, category, verbosity, message = match.groups()
+    return LogLine(timestamp, int(frame) if frame else None, category, verbosity or "Log", message.rstrip("\r"))
+
+def log_line_stamp(line):
+    """The timestamp a log line starts with, or None. Also found on lines without a category."""
+    match = LOG_TIMESTAMP.match(line)
+    return match.group(1) if match else None
+
+def trigger_verbosities(trig):
+    """The trigger's verbosity filter as a tuple, empty for any verbosity."""
+    verbosity = trig.get("verbosity") or ()
+    return (verbosity,) if isinstance(verbosity, str) else tuple(verbosity)
+
+def trigger_signature(triggers):
+    """Lowercased keywords and rules per trigger, used to detect when the matcher is stale."""
+    return tuple(
+        (
+            tuple(k.lower() for k in trig.get("keywords", [])),
+            (trig.get("category") or "").lower(),
+            tuple(v.lower() for v in trigger_verbosities(trig)),
+            trig.get("pattern") or "",
+        )
+        for trig in triggers
+    )
+
+def describe_trigger(trig):
+    """What a trigger matches, for lists in the GUI."""
+    parts = list(trig.get("keywords", []))
+    if trig.get("category"):
+        verbosities = "/".join(trigger_verbosities(trig))
+        parts.append(f"[{trig['category']}" + (f": {verbosities}" if verbosities else "") + "]")
+    if trig.get("pattern"):
+        parts.append(f"/{trig['pattern']}/")
+    return ", ".join(parts)
+
+def trie_pattern(words):
+    """Regex source matching any of words, with common prefixes factored out.
+
+    Python's re tries every branch of a plain alternation at each position;
+    a trie-shaped pattern only follows branches that share the prefix so far.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # End of a word
+
+    def build(node):
+        ends = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not ends else "(?:" + "|".join(branches) + ")"
+        return body + "?" if ends else body
+
+    return build(trie)
+
+def sequence_step_triggers(sequences):
+    """Sequence steps and aborts as triggers for a TriggerMatcher.
+
+    Each gets a "step" of (sequence index, step index), with -1 for aborts.
+    """
+    steps = []
+    for s_idx, seq in enumerate(sequences):
+        for st_idx, step in enumerate(seq["steps"]):
+            steps.append(dict(step, name=f"{seq['name']} #{st_idx + 1}", step=(s_idx, st_idx)))
+        for step in seq.get("abort", ()):
+            steps.append(dict(step, name=f"{seq['name']} abort", step=(s_idx, -1)))
+    return steps
+
+class TriggerMatcher:
+    """Aho-Corasick automaton over every trigger keyword, plus log-line rules.
+
+    Built once per trigger set, it finds every trigger/keyword pair contained
+    in a lowercased line with a single pass over the line.
+
+    Triggers can also name a log category, optionally narrowed down by
+    verbosity and a regex "pattern" on the message. Those rules are kept in a
+    dict keyed by category, so a parsed line is checked with one lookup. A
+    pattern without a category is searched for in the whole line.
+
+    Lines longer than max_line characters are matched in windows of that
+    size (see LongLineScan), so a giant line never has to be held at once.
+    """
+
+    PATTERN_OVERLAP = 1024  # Regex matches longer than this may be missed across windows of a long line
+
+    def __init__(self, triggers, max_line=65536):
+        self.triggers = list(triggers)
+        self.max_line = max_line
+        self.signature = trigger_signature(self.triggers)
+        self.keywords = [list(trig.get("keywords", [])) for trig in self.triggers]
+
+        self._rules = {}  # Lowercased category -> [(trigger index, verbosities, compiled pattern)]
+        self._line_rules = []  # [(trigger index, compiled pattern)] for patterns without a category
+        for t_idx, (_, category, verbosities, pattern) in enumerate(self.signature):
+            compiled = re.compile(pattern) if pattern else None
+            if category:
+                self._rules.setdefault(category, []).append((t_idx, frozenset(verbosities), compiled))
+            elif compiled:
+                self._line_rules.append((t_idx, compiled))
+
+        goto = [{}]
+        fail = [0]
+        out = [()]
+        for t_idx, (keywords, *_) in enumerate(self.signature):
+            for k_idx, keyword in enumerate(keywords):
+                if not keyword.strip():
+                    continue  # A blank keyword would match every line
+                node = 0
+                for ch in keyword:
+                    nxt = goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto.append({})
+                        fail.append(0)
+                        out.append(())
+                        goto[node][ch] = nxt
+                    node = nxt
+                out[node] += ((t_idx, k_idx),)
+
+        # Breadth-first pass to link every node to its longest proper suffix
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+        # Windows of a long line overlap by this much, so every keyword is seen whole
+        longest = max((len(kw) for kws, *_ in self.signature for kw in kws), default=1)
+        self.overlap = longest - 1
+        if self._line_rules or any(pattern for rules in self._rules.values() for _, _, pattern in rules):
+            self.overlap = max(self.overlap, self.PATTERN_OVERLAP)
+        self.overlap = min(self.overlap, max_line // 2)
+
+        # Most lines hit nothing, so reject them in C before walking the automaton.
+        # A category rule can only match lines containing "category: ".
+        patterns = {kw for kws, *_ in self.signature for kw in kws if kw.strip()}
+        patterns.update(category + ": " for category in self._rules)
+        patterns = sorted(patterns, key=len, reverse=True)
+        self._prefilter = re.compile(trie_pattern(patterns)) if patterns else None
+
+        # ASCII keywords can be searched for in the raw log bytes (lowercased,
+        # which is much faster than re.IGNORECASE), so whole blocks without a
+        # hit are skipped without being decoded or split into lines.
+        # Line patterns are regexes on one decoded line (^, $, \w, ...), so
+        # with any of them every line is decoded and matched instead.
+        self._decode_all = bool(self._line_rules) or not all(p.isascii() for p in patterns)
+        self._byte_prefilter = None
+        if not self._decode_all and patterns:
+            self._byte_prefilter = re.compile(trie_pattern(patterns).encode("ascii"))
+
+    def scan(self, line):
+        """Return every (trigger, keyword) found in the line, in trigger order.
+
+        For rule matches the keyword is the "Category: Verbosity" or the regex
+        match that was found.
+        """
+        hits = {}
+        line_lower = line.lower()
+        if self._prefilter is not None and self._prefilter.search(line_lower):
+            self._keyword_hits(line_lower, hits)
+            if self._rules:
+                parsed = parse_log_line(line)
+                rules = parsed and self._rules.get(parsed.category.lower())
+                if rules:
+                    self._rule_hits(parsed, rules, parsed.message, hits)
+        self._line_rule_hits(line, hits)
+        return self.ordered(hits)
+
+    def ordered(self, hits):
+        """(trigger, keyword) pairs of a hits dict, in trigger order."""
+        return [(self.triggers[key[0]], keyword) for key, keyword in sorted(hits.items())]
+
+    def _keyword_hits(self, text_lower, hits):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text_lower:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for t, k in out[node]:
+                hits[t, 0, k] = self.keywords[t][k]
+
+    def _rule_hits(self, parsed, rules, text, hits, pos=0, cut=False):
+        """Add the category rules' hits in text (from pos on, so ^ can't match before it).
+
+        cut marks text that ends at a window cut of a long line: a pattern match
+        reaching it might turn out different once the line goes on, so it is
+        left out and the smallest such match start is returned, else None.
+        """
+        carry = None
+        for t, verbosities, pattern in rules:
+            if verbosities and parsed.verbosity.lower() not in verbosities:
+                continue
+            found = pattern.search(text, pos) if pattern else None
+            if pattern and not found:
+                continue
+            if cut and found and found.end() == len(text):
+                carry = found.start() if carry is None else min(carry, found.start())
+                continue
+            hits[t, 1, 0] = found.group(0) if found else f"{parsed.category}: {parsed.verbosity}"
+        return carry
+
+    def _line_rule_hits(self, text, hits, pos=0, cut=False):
+        """Like _rule_hits, for the patterns without a category."""
+        if not cut:
+            text = text.rstrip("\r")  # So $ matches at the end of CRLF lines
+        carry = None
+        for t, pattern in self._line_rules:
+            found = pattern.search(text, pos)
+            if found and cut and found.end() == len(text):
+                carry = found.start() if carry is None else min(carry, found.start())
+            elif found:
+                hits[t, 1, 0] = found.group(0)
+        return carry
+
+    def first_match(self, line):
+        """Return the (trigger, keyword) the old nested loop would have picked, or None."""
+        matches = self.scan(line)
+        return matches[0] if matches else None
+
+    def rebind(self, triggers):
+        """Return a copy of this matcher reporting the given trigger objects.
+
+        Only valid when the new triggers have the same keywords, e.g. after a
+        rename or sound change, and saves rebuilding the automaton.
+        """
+        clone = copy.copy(self)
+        clone.triggers = list(triggers)
+        clone.keywords = [list(trig.get("keywords", [])) for trig in clone.triggers]
+        return clone
+
+    def scan_block(self, block):
+        """Yield the first (trigger, keyword) match of each line in a block of complete lines."""
+        for _, _, trigger, keyword in self.scan_lines(block):
+            yield trigger, keyword
+
+    def scan_lines(self, buf, start=0, end=None):
+        """Yield (line offset, line, trigger, keyword) for each matching line of buf[start:end].
+
+        buf can be bytes or an mmap; the range must start at a line boundary
+        and is copied once, so keep it to a sensible block size.
+        """
+        for line_start, line, matches in self.match_lines(buf, start, end):
+            yield (line_start, line) + matches[0]
+
+    def match_lines(self, buf, start=0, end=None):
+        """Like scan_lines, but yield (line offset, line, every (trigger, keyword) match).
+
+        Lines longer than max_line are matched in windows; the line yielded
+        for them is only their start.
+        """
+        for line_start, line_end in self._candidate_lines(buf, start, len(buf) if end is None else end):
+            if line_end - line_start > self.max_line:
+                scan = LongLineScan(self, line_start)
+                scan.feed(buf, line_start, line_end)
+                line, matches = scan.head, scan.finish()
+            else:
+                line = buf[line_start:line_end].decode("utf-8", errors="ignore")
+                matches = self.scan(line)
+            if matches:
+                yield line_start, line, matches
+
+    def _candidate_lines(self, buf, start, end):
+        """Yield (start, end) of the lines in buf[start:end] that may contain a hit."""
+        if self._decode_all:
+            # Non-ASCII keywords or line patterns: every line has to be decoded
+            while start < end:
+                line_end = buf.find(b"\n", start, end)
+                if line_end == -1:
+                    line_end = end
+                yield start, line_end
+                start = line_end + 1
+            return
+        if self._byte_prefilter is None:
+            return
+
+        lowered = buf[start:end].lower()  # ASCII only, so offsets don't move
+        pos = 0
+        while True:
+            hit = self._byte_prefilter.search(lowered, pos)
+            if not hit:
+                break
+            line_start = lowered.rfind(b"\n", 0, hit.start()) + 1
+            line_end = lowered.find(b"\n", hit.end())
+            if line_end == -1:
+                line_end = len(lowered)
+            yield start + line_start, start + line_end
+            pos = line_end + 1
+
+class LongLineScan:
+    """Matches one over-long line fed in pieces, in windows of the matcher's max_line.
+
+    Only the start of the line (for its timestamp and category) and the last
+    few characters of the previous window are kept between windows. Windows
+    overlap by the longest keyword, so keywords are found wherever the line
+    is cut; hits are collected and reported in trigger order at the end.
+
+    Patterns see the text carried over from the previous window too, but ^
+    only matches at the start of the line (or message) and $ only at its end.
+    """
+
+    HEAD_SIZE = 4096  # Characters of the line start kept for parse_log_line
+
+    def __init__(self, matcher, start):
+        self.matcher = matcher
+        self.start = start  # Offset of the line in the stream
+        self.head = ""
+        self._tail = ""
+        self._carry = ""  # Text the patterns see again with the next window (None without patterns)
+        self._carry_at_start = True  # _carry starts at the start of the line
+        self._parsed = None
+        self._rules = None
+        self._hits = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+    def feed(self, buf, start, end):
+        """Match buf[start:end], the next piece of the line (without its newline)."""
+        matcher = self.matcher
+        for pos in range(start, end, matcher.max_line):
+            text = self._decoder.decode(buf[pos:min(pos + matcher.max_line, end)])
+            if len(self.head) < self.HEAD_SIZE:
+                self.head = (self.head + text)[:self.HEAD_SIZE]
+            window = self._tail + text
+            window_lower = window.lower()
+            if matcher._prefilter is not None and matcher._prefilter.search(window_lower):
+                matcher._keyword_hits(window_lower, self._hits)
+            self._tail = window[-matcher.overlap:] if matcher.overlap else ""
+            if self._carry is not None:
+                self._carry += text
+            # A piece can end anywhere, even inside the category, so wait for a full head
+            if len(self.head) == self.HEAD_SIZE:
+                self._match_patterns(cut=True)
+
+    def _match_patterns(self, cut):
+        """Match the rules on the carried text; with cut, keep what the next window needs."""
+        matcher = self.matcher
+        if self._parsed is None and self._rules is None:
+            self._parsed = parse_log_line(self.head)
+            self._rules = ()
+            if self._parsed and matcher._rules:
+                self._rules = matcher._rules.get(self._parsed.category.lower(), ())
+        text = self._carry or ""
+        pos = 0 if self._carry_at_start else 1  # Past the character kept for \b and lookbehinds
+        keep = [len(text) - matcher.overlap]
+        keep.append(matcher._line_rule_hits(text, self._hits, pos, cut))
+        if self._rules:
+            message = 0  # Category rules match the message, like scan() does
+            if self._carry_at_start:
+                message = len(self.head.rstrip("\r")) - len(self._parsed.message)
+            carry = matcher._rule_hits(self._parsed, self._rules, text[message:] if message else text, self._hits, pos, cut)
+            keep.append(None if carry is None else carry + message)
+        if not cut:
+            return
+        if not matcher._line_rules and not any(pattern for _, _, pattern in self._rules):
+            self._carry = None  # No patterns to see it again; keywords use _tail
+            return
+        start = min(k for k in keep if k is not None)
+        start = max(start - 1, len(text) - matcher.max_line)  # Bounded, even if a match never ends
+        if start > 0:
+            self._carry = text[start:]
+            self._carry_at_start = False
+
+    def finish(self):
+        """Every (trigger, keyword) in the line, in trigger order."""
+        self._match_patterns(cut=False)
+        return self.matcher.ordered(self._hits)
+
+class LineStream:
+    """Matches a stream of blocks that may end in the middle of a line.
+
+    The rest of such a line is expected at the start of the next block. It
+    is matched with a LongLineScan, so memory stays bounded however long
+    the line gets.
+    """
+
+    def __init__(self):
+        self._long = None  # LongLineScan of the line continuing into the next block
+
+    def match(self, matcher, buf, start=0, end=None, final=False):
+        """Yield (line offset, line, matches) for buf[start:end], like TriggerMatcher.match_lines.
+
+        final marks the end of the stream, where a last line may lack its newline.
+        """
+        end = len(buf) if end is None else end
+        if self._long is not None:
+            if self._long.matcher is not matcher:
+                if self._long.matcher.max_line == matcher.max_line and self._long.matcher.signature == matcher.signature:
+                    self._long.matcher = matcher  # Only names or sounds changed
+                else:
+                    self._long = None  # Triggers changed mid-line; pick up from the next line
+            if self._long is not None:
+                newline = buf.find(b"\n", start, end)
+                stop = end if newline == -1 else newline
+                self._long.feed(buf, start, stop)
+                if newline == -1 and not final:
+                    return
+                scan, self._long = self._long, None
+                matches = scan.finish()
+                if matches:
+                    yield scan.start, scan.head, matches
+                start = min(stop + 1, end)
+
+        last = buf.rfind(b"\n", start, end) + 1 if start < end else 0
+        if final:
+            last = end
+        elif last <= start:
+            last = start  # No complete line in this block
+        if last > start:
+            yield from matcher.match_lines(buf, start, last)
+        if last < end:
+            self._long = LongLineScan(matcher, last)
+            self._long.feed(buf, last, end)
+
+# ---------------- SCHEDULER ----------------
+class ScheduledCall:
+    __slots__ = ("fn", "args", "cancelled")
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class Scheduler:
+    """Runs delayed callbacks on one shared thread instead of a Timer thread each.
+
+    The thread starts with the first call, so importing the module starts none.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def call_later(self, delay, fn, *args):
+        """Run fn(*args) after delay seconds. Returns a handle with cancel()."""
+        call = ScheduledCall(fn, args)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), call))
+            self._cond.notify()
+        return call
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        call = heapq.heappop(self._heap)[2]
+                        break
+                    self._cond.wait(delay)
+            try:
+                call.fn(*call.args)
+            except Exception as e:
+                print(f"⚠ Scheduled task failed: {e}")
+
+scheduler = Scheduler()
+
+# ---------------- SETTINGS ----------------
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+class SettingsSnapshot:
+    """Read-only, versioned view of the settings plus the compiled trigger matcher.
+
+    The monitor thread reads the global snapshot without locking; writers
+    build a new snapshot and swap the global reference in one assignment.
+    """
+
+    def __init__(self, data, version, previous=None):
+        self._data = _freeze(data)
+        self.version = version
+        max_line = self._data["max_line_length"]
+        self.matcher = self._build_matcher(self._data["triggers"], max_line, previous.matcher if previous else None)
+        self.sequence_matcher = self._build_matcher(
+            sequence_step_triggers(self._data["sequences"]),
+            max_line,
+            previous.sequence_matcher if previous else None,
+        )
+
+    @staticmethod
+    def _build_matcher(triggers, max_line, old):
+        if old is not None and old.max_line == max_line and old.signature == trigger_signature(triggers):
+            return old.rebind(triggers)
+        return TriggerMatcher(triggers, max_line)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def to_dict(self):
+        """Mutable deep copy, to be edited and passed to apply_settings."""
+        return _thaw(self._data)
+
+def validate_match_spec(spec, what):
+    """Check the keywords / category / verbosity / pattern of a trigger or sequence step."""
+    keywords = spec.get("keywords", [])
+    if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+        raise ValueError(f"keywords of {what} must be a list of strings")
+    for key in ("category", "pattern"):
+        if not isinstance(spec.get(key) or "", str):
+            raise ValueError(f"{key} of {what} must be a string")
+    verbosities = trigger_verbosities(spec)
+    if not all(isinstance(v, str) and v.lower() in {x.lower() for x in LOG_VERBOSITIES} for v in verbosities):
+        raise ValueError(f"verbosity of {what} must be one or more of {', '.join(LOG_VERBOSITIES)}")
+    if verbosities and not spec.get("category"):
+        raise ValueError(f"{what} needs a category to filter by verbosity")
+    if spec.get("pattern"):
+        try:
+            re.compile(spec["pattern"])
+        except re.error as e:
+            raise ValueError(f"pattern of {what} is not a valid regex: {e}")
+
+def validate_settings(data):
+    """Return data with missing keys filled from the defaults. Raises ValueError if invalid."""
+    if not isinstance(data, dict):
+        raise ValueError("settings must be a JSON object")
+    result = copy.deepcopy(DEFAULT_SETTINGS)
+    result.update(data)
+
+    for key in ("log_file", "log_folder", "action_command"):
+        if not isinstance(result[key], str):
+            raise ValueError(f"{key} must be a string")
+    if not isinstance(result["triggers"], list):
+        raise ValueError("triggers must be a list")
+    for trig in result["triggers"]:
+        if not isinstance(trig, dict) or not isinstance(trig.get("name"), str):
+            raise ValueError("every trigger needs a name")
+        validate_match_spec(trig, f"trigger '{trig['name']}'")
+        for key in ("debounce", "cooldown"):
+            value = trig.get(key, 0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"{key} of trigger '{trig['name']}' must be 0 or more seconds")
+    if not isinstance(result["sequences"], list):
+        raise ValueError("sequences must be a list")
+    for seq in result["sequences"]:
+        if not isinstance(seq, dict) or not isinstance(seq.get("name"), str):
+            raise ValueError("every sequence needs a name")
+        steps, aborts = seq.get("steps"), seq.get("abort", [])
+        if not isinstance(steps, list) or len(steps) < 2 or not isinstance(aborts, list):
+            raise ValueError(f"sequence '{seq['name']}' needs a list of at least 2 steps")
+        for i, step in enumerate(steps + aborts):
+            what = f"step {i + 1} of sequence '{seq['name']}'" if i < len(steps) else f"abort of sequence '{seq['name']}'"
+            if not isinstance(step, dict):
+                raise ValueError(f"{what} must be an object")
+            validate_match_spec(step, what)
+            if not (any(k.strip() for k in step.get("keywords", [])) or step.get("category") or step.get("pattern")):
+                raise ValueError(f"{what} needs keywords, a category or a pattern")
+        timeout = seq.get("timeout", 3600)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ValueError(f"timeout of sequence '{seq['name']}' must be a positive number of seconds")
+    try:
+        re.compile(result["project_pattern"])
+    except (re.error, TypeError) as e:
+        raise ValueError(f"project_pattern is not a valid regex: {e}")
+    history = result["duration_history"]
+    if isinstance(history, bool) or not isinstance(history, int) or history < 1:
+        raise ValueError("duration_history must be a whole number of 1 or more")
+    max_line = result["max_line_length"]
+    if isinstance(max_line, bool) or not isinstance(max_line, int) or max_line < 1024:
+        raise ValueError("max_line_length must be a whole number of 1024 or more")
+    for key in ("trigger_cooldown", "catchup_window"):
+        value = result[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"{key} must be 0 or more seconds")
+    port = result["metrics_port"]
+    if isinstance(port, bool) or not isinstance(port, int) or not 0 <= port <= 65535:
+        raise ValueError("metrics_port must be a port number, or 0 to turn it off")
+    if result["idle_mode"] not in ("auto", "on", "off"):
+        raise ValueError('idle_mode must be "auto", "on" or "off"')
+    for key in ("read_chunk_size", "poll_interval", "watch_timeout", "idle_check_interval",
+                "checkpoint_interval", "metrics_interval", "event_sink_interval"):
+        value = result[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f"{key} must be a positive number")
+    url = result["event_sink_url"]
+    if not isinstance(url, str) or url and not parse_sink_url(url):
+        raise ValueError("event_sink_url must be an http://, https:// or tcp://host:port URL, or empty")
+    limit = result["event_history_limit"]
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 0:
+        raise ValueError("event_history_limit must be a whole number of 0 or more")
+    result["read_chunk_size"] = int(result["read_chunk_size"])
+    return result
+
+settings_lock = threading.RLock()
+settings = None  # Current SettingsSnapshot, replaced as a whole on every change
+settings_save_timer = None
+settings_file_state = (None, None)  # (mtime_ns, size) of the file we last read or wrote
+settings_file_hash = None
+
+def apply_settings(data, save=True):
+    """Validate data and atomically swap it in as the new settings snapshot."""
+    global settings
+    with settings_lock:
+        settings = SettingsSnapshot(
+            validate_settings(data),
+            settings.version + 1 if settings else 1,
+            previous=settings
+        )
+        if save:
+            save_settings()
+        return settings
+
+def update_settings(**changes):
+    """Change top-level settings, e.g. update_settings(log_file=path)."""
+    with settings_lock:
+        data = settings.to_dict()
+        data.update(changes)
+        return apply_settings(data)
+
+def _read_settings_file():
+    """Return (raw bytes, (mtime_ns, size)) of the settings file."""
+    with open(SETTINGS_FILE, 'rb') as f:
+        st = os.fstat(f.fileno())
+        return f.read(), (st.st_mtime_ns, st.st_size)
+
+def load_settings():
+    global settings_file_state, settings_file_hash
+    data = None
+    if os.path.exists(SETTINGS_FILE):
+        try:
+            raw, settings_file_state = _read_settings_file()
+            settings_file_hash = hashlib.sha1(raw).hexdigest()
+            data = json.loads(raw)
+            validate_settings(data)
+        except Exception as e:
+            print(f"⚠ Failed to load settings, using defaults: {e}")
+            data = None
+
+    if data is None:
+        apply_settings(DEFAULT_SETTINGS, save=False)
+    else:
+        # Write back any keys added since the file was created
+        apply_settings(data, save=not DEFAULT_SETTINGS.keys() <= data.keys())
+
+def save_settings(delay=0.5):
+    """Write the settings file shortly, coalescing bursts of changes into one write."""
+    global settings_save_timer
+    with settings_lock:
+        if settings_save_timer:
+            settings_save_timer.cancel()
+        settings_save_timer = scheduler.call_later(delay, flush_settings)
+
+def flush_settings():
+    """Write pending settings now, via a temp file so the file is never half-written."""
+    global settings_save_timer, settings_file_state, settings_file_hash
+    with settings_lock:
+        if settings_save_timer:
+            settings_save_timer.cancel()
+            settings_save_timer = None
+        raw = json.dumps(settings.to_dict(), indent=4).encode("utf-8")
+        try:
+            settings_file_hash = hashlib.sha1(raw).hexdigest()
+            atomic_write(SETTINGS_FILE, raw)
+            st = os.stat(SETTINGS_FILE)
+            settings_file_state = (st.st_mtime_ns, st.st_size)
+        except Exception as e:
+            print(f"⚠ Failed to save settings: {e}")
+
+def reload_settings_if_changed(force=False):
+    """Reload the settings file if it was edited by hand (or anyway, with force). Returns True if reloaded."""
+    global settings_file_state, settings_file_hash
+    with settings_lock:
+        try:
+            st = os.stat(SETTINGS_FILE)
+            if (st.st_mtime_ns, st.st_size) == settings_file_state and not force:
+                return False
+            raw, settings_file_state = _read_settings_file()
+        except OSError:
+            return False
+
+        digest = hashlib.sha1(raw).hexdigest()
+        if digest == settings_file_hash and not force:
+            return False  # Touched, or our own save
+        settings_file_hash = digest
+
+        try:
+            apply_settings(json.loads(raw), save=False)
+        except ValueError as e:
+            print(f"⚠ Invalid settings file, keeping previous settings: {e}")
+            update_status("Settings file invalid.")
+            return False
+    update_status("Settings reloaded.")
+    return True
+
+def watch_settings_file():
+    """Reload settings.json whenever it changes on disk."""
+    global settings_watcher
+    watcher = settings_watcher = create_log_watcher(block=True)
+    watcher.watch(APPDATA_FOLDER)
+    while not stop_thread:
+        watcher.wait()
+        reload_settings_if_changed()
+    settings_watcher = None
+    watcher.close()
+
+# ---------------- EVENT LOGGING ----------------
+Event = namedtuple("Event", "id time type message source")
+
+LEGACY_EVENT_LINE = re.compile(r"\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] (.*?) - (.*)")
+EVENT_SOURCE = re.compile(r" in (\S+\.log)\b")
+
+class EventStore:
+    """Keeps the event history in an SQLite database (WAL mode).
+
+    Events are queued without touching the disk and committed by a background
+    thread in batches, either every flush_interval seconds or once batch_size
+    events are waiting. They are indexed by type (the trigger), log file and
+    time, and per type and log totals are kept up to date, so the history
+    opens instantly however long it gets. Readers use their own connection
+    and never wait for the writer. The database is opened (and an old
+    events.txt imported) by the first write or flush, not on import.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY, time REAL NOT NULL, type TEXT NOT NULL, message TEXT NOT NULL,
+            source TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS events_time ON events (time);
+        CREATE INDEX IF NOT EXISTS events_type ON events (type, time);
+        CREATE INDEX IF NOT EXISTS events_source ON events (source, time);
+        CREATE TABLE IF NOT EXISTS event_totals (
+            type TEXT NOT NULL, source TEXT NOT NULL, count INTEGER NOT NULL, last REAL NOT NULL,
+            PRIMARY KEY (type, source)
+        );
+    """
+    VERSION = 1  # PRAGMA user_version once the schema exists and events.txt was imported
+
+    def __init__(self, path, legacy_path=None, flush_interval=1.0, batch_size=256):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def write(self, event):
+        """Queue a (time, type, message, source) tuple."""
+        self._start()
+        self._queue.put(event)
+
+    def flush(self, timeout=5):
+        """Block until everything queued so far is committed."""
+        self._start()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        """Flush and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _start(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+
+    # Writer thread
+    def _run(self):
+        db = self._open()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and isinstance(batch[-1], tuple):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            if db:
+                self._write(db, [entry for entry in batch if isinstance(entry, tuple)])
+            for entry in batch:
+                if entry is None:
+                    running = False
+                elif isinstance(entry, threading.Event):
+                    entry.set()
+        if db:
+            db.close()
+
+    def _open(self):
+        import sqlite3
+
+        try:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; a power cut may lose the last batch
+            if db.execute("PRAGMA user_version").fetchone()[0] < self.VERSION:
+                # Take the write lock before checking again, so of two processes
+                # starting at once only the first creates it and imports events.txt
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    if db.execute("PRAGMA user_version").fetchone()[0] < self.VERSION:
+                        for statement in self.SCHEMA.split(";"):
+                            if statement.strip():
+                                db.execute(statement)
+                        if self.legacy_path:
+                            self._insert(db, self._legacy_events())
+                        db.execute(f"PRAGMA user_version={self.VERSION}")
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+            return db
+        except Exception as e:
+            print(f"⚠ Failed to open event history: {e}")
+            return None
+
+    def _legacy_events(self):
+        """Events of the old events.txt and its rotated backups, oldest first."""
+        base, ext = os.path.splitext(self.legacy_path)
+        backups = sorted(
+            (int(name[len(os.path.basename(base)) + 1:-len(ext)]), name)
+            for name in os.listdir(os.path.dirname(self.legacy_path))
+            if re.fullmatch(re.escape(os.path.basename(base)) + r"\.\d+" + re.escape(ext), name)
+        )
+        paths = [os.path.join(os.path.dirname(self.legacy_path), name) for _, name in reversed(backups)]
+        for path in paths + [self.legacy_path]:
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        match = LEGACY_EVENT_LINE.match(line.rstrip("\n"))
+                        if not match:
+                            continue
+                        stamp, event_type, message = match.groups()
+                        source = EVENT_SOURCE.search(message)
+                        yield (datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").timestamp(), event_type, message,
+                               source.group(1) if source else "")
+            except OSError:
+                pass
+
+    def _write(self, db, events):
+        if not events:
+            return
+        try:
+            with db:
+                last_id = self._insert(db, events)
+            limit = settings["event_history_limit"] if settings else 0
+            if limit and last_id > limit * 1.1:
+                # Prune in steps of a tenth of the limit, not on every batch
+                first_id = db.execute("SELECT MIN(id) FROM events").fetchone()[0]
+                if first_id is not None and last_id - first_id + 1 > limit * 1.1:
+                    self._prune(db, last_id - limit)
+        except Exception as e:
+            print(f"⚠ Failed to write event history: {e}")
+
+    @staticmethod
+    def _insert(db, events):
+        """Insert events and add them to the totals. Returns the last row id."""
+        totals = {}
+        cursor = db.cursor()
+        for event in events:
+            cursor.execute("INSERT INTO events (time, type, message, source) VALUES (?, ?, ?, ?)", event)
+            total = totals.setdefault((event[1], event[3]), [0, 0])
+            total[0] += 1
+            total[1] = max(total[1], event[0])
+        last_id = cursor.lastrowid or 0  # Before the totals, which have rowids of their own
+        for (event_type, source), (count, last) in totals.items():
+            cursor.execute(
+                "UPDATE event_totals SET count = count + ?, last = MAX(last, ?) WHERE type = ? AND source = ?",
+                (count, last, event_type, source),
+            )
+            if not cursor.rowcount:
+                cursor.execute("INSERT INTO event_totals VALUES (?, ?, ?, ?)", (event_type, source, count, last))
+        return last_id
+
+    @staticmethod
+    def _prune(db, below_id):
+        """Delete the events up to below_id and take them off the totals."""
+        with db:
+            removed = db.execute(
+                "SELECT type, source, COUNT(*) FROM events WHERE id <= ? GROUP BY type, source", (below_id,)
+            ).fetchall()
+            db.execute("DELETE FROM events WHERE id <= ?", (below_id,))
+            db.executemany(
+                "UPDATE event_totals SET count = count - ? WHERE type = ? AND source = ?",
+                [(count, event_type, source) for event_type, source, count in removed],
+            )
+            db.execute("DELETE FROM event_totals WHERE count <= 0")
+
+    # Queries, from any thread
+    def _read(self):
+        import sqlite3
+
+        if not os.path.exists(self.path):
+            return None
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=10)
+
+    def _select(self, sql, params):
+        db = self._read()
+        if db is None:
+            return []
+        try:
+            return db.execute(sql, params).fetchall()
+        finally:
+            db.close()
+
+    def query(self, event_type=None, source=None, since=None, until=None, limit=200, before=None):
+        """Newest events first, optionally of one type, from one log and within [since, until).
+
+        Times are Unix timestamps. For the next page, pass the last event
+        returned as before.
+        """
+        where, params = [], []
+        for column, value in (("type", event_type), ("source", source)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("time >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("time < ?")
+            params.append(until)
+        if before is not None:
+            where.append("(time < ? OR (time = ? AND id < ?))")
+            params += [before.time, before.time, before.id]
+        sql = "SELECT id, time, type, message, source FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._select(sql + " ORDER BY time DESC, id DESC LIMIT ?", params + [limit])
+        return [Event(*row) for row in rows]
+
+    def totals(self):
+        """[(type, source, count, last time)] of every type and log, most recent first."""
+        return self._select("SELECT type, source, count, last FROM event_totals ORDER BY last DESC", ())
+
+    def daily_counts(self, event_type=None, source=None, since=None):
+        """[(local date, type, count)] per day, newest day first."""
+        where, params = [], []
+        for column, value in (("type", event_type), ("source", source)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("time >= ?")
+            params.append(since)
+        sql = "SELECT date(time, 'unixepoch', 'localtime') AS day, type, COUNT(*) FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._select(sql + " GROUP BY day, type ORDER BY day DESC, COUNT(*) DESC", params)
+
+event_history = EventStore(EVENT_DB_FILE, EVENT_LOG_FILE)
+
+def log_event(event_type, message, source=""):
+    now = time.time()
+    event_history.write((now, event_type, message, source))
+    sink = sync_event_sink()
+    if sink:
+        sink.send({
+            "time": datetime.fromtimestamp(now).astimezone().isoformat(timespec="milliseconds"),
+            "host": HOSTNAME,
+            "type": event_type,
+            "message": message,
+            "source": source,
+        })
+
+def format_event_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+# ---------------- EVENT SINK ----------------
+HOSTNAME = socket.gethostname()
+
+def parse_sink_url(url):
+    """(scheme, host, port, path) of an event sink URL, or None if it isn't one."""
+    from urllib.parse import urlsplit
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    if parts.scheme not in ("http", "https", "tcp") or not parts.hostname:
+        return None
+    if parts.scheme == "tcp" and not port:
+        return None
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    return parts.scheme, parts.hostname, port, path
+
+class EventSink:
+    """Sends events to a webhook or a TCP endpoint, in batches over one connection.
+
+    send() only queues the event. A background thread collects events for
+    flush_interval seconds and sends them together: to http(s) URLs as one
+    JSON array per POST over a keep-alive connection, to tcp:// as JSON
+    lines over a socket that stays open. A batch that can't be delivered is
+    appended to a spool file and retried with backoff, oldest first, so
+    events survive the endpoint or the notifier being down.
+    """
+
+    RETRY_MIN = 1  # Seconds before the first retry, doubling up to RETRY_MAX
+    RETRY_MAX = 60
+    SPOOL_MAX_BYTES = 16 * 1024 * 1024  # Undeliverable events beyond this are dropped
+
+    def __init__(self, url, spool_path, flush_interval=1.0, batch_size=500, timeout=5, previous=None):
+        """previous is a sink closed for this one; it finishes with the spool file before this one starts."""
+        self.url = url
+        self.scheme, self.host, self.port, self.path = parse_sink_url(url)
+        self.spool_path = spool_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.sent = 0  # Events delivered
+        self.spooled = 0  # Events waiting in the spool file
+        self._conn = None  # http.client connection or socket
+        self._queue = queue.Queue()
+        self._previous = previous
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send(self, event):
+        """Queue an event (a JSON-serializable dict). Never blocks."""
+        self._queue.put(event)
+
+    def flush(self, timeout=5):
+        """Block until everything queued so far is delivered or spooled."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        """Deliver or spool what is queued and stop the sender thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # Sender thread
+    def _run(self):
+        if self._previous is not None:
+            self._previous._thread.join()  # Still delivering or spooling what it had
+            self._previous = None
+        self.spooled = self._count_spooled()
+        backoff = self.RETRY_MIN
+        retry_at = time.monotonic() if self.spooled else None
+        running = True
+        while running:
+            batch = self._next_batch(None if retry_at is None else max(0, retry_at - time.monotonic()))
+            lines = [json.dumps(event, ensure_ascii=False) for event in batch if isinstance(event, dict)]
+            if lines:
+                if retry_at is not None:
+                    self._spool(lines)  # Behind the older events
+                elif not self._deliver(lines):
+                    self._spool(lines)
+                    retry_at = time.monotonic() + backoff
+            if retry_at is not None and time.monotonic() >= retry_at:
+                if self._retry():
+                    retry_at, backoff = None, self.RETRY_MIN
+                else:
+                    backoff = min(backoff * 2, self.RETRY_MAX)
+                    retry_at = time.monotonic() + backoff
+
+            for entry in batch:
+                if entry is None:
+                    running = False
+                elif isinstance(entry, threading.Event):
+                    entry.set()
+        self._disconnect()
+
+    def _next_batch(self, timeout):
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and isinstance(batch[-1], dict):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, lines):
+        """Send one batch, reconnecting once if the open connection went stale."""
+        for attempt in range(2):
+            try:
+                if self.scheme == "tcp":
+                    self._send_tcp(lines)
+                else:
+                    self._send_http(lines)
+                self.sent += len(lines)
+                return True
+            except Exception as e:
+                self._disconnect()
+                if attempt:
+                    print(f"⚠ Failed to send events to {self.host}: {e}")
+        return False
+
+    def _send_http(self, lines):
+        if self._conn is None:
+            import http.client
+
+            connection = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self._conn = connection(self.host, self.port, timeout=self.timeout)
+        body = ("[" + ",".join(lines) + "]").encode("utf-8")
+        self._conn.request("POST", self.path, body, {
+            "Content-Type": "application/json; charset=utf-8",
+            "User-Agent": f"UEFN-Notifier/{__version__}",
+        })
+        response = self._conn.getresponse()
+        response.read()  # Frees the connection for the next request
+        if 400 <= response.status < 500 and response.status not in (408, 429):
+            # The endpoint rejects these events; retrying won't change that
+            print(f"⚠ Event sink {self.host} refused {len(lines)} events: HTTP {response.status}")
+        elif not 200 <= response.status < 300:
+            raise OSError(f"HTTP {response.status}")
+
+    def _send_tcp(self, lines):
+        if self._conn is not None and select.select([self._conn], [], [], 0)[0]:
+            self._disconnect()  # The peer closed it (or sent something we don't expect)
+        if self._conn is None:
+            self._conn = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._conn.sendall(("\n".join(lines) + "\n").encode("utf-8"))
+
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    # Spool file, one JSON event per line
+    def _count_spooled(self):
+        try:
+            with open(self.spool_path, "rb") as f:
+                return sum(1 for _ in f)
+        except OSError:
+            return 0
+
+    def _spool(self, lines):
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        try:
+            size = os.path.getsize(self.spool_path) if self.spooled else 0
+            if size + len(data) > self.SPOOL_MAX_BYTES:
+                print(f"⚠ Event sink queue is full, dropping {len(lines)} events")
+                return
+            with open(self.spool_path, "ab") as f:
+                f.write(data)
+            self.spooled += len(lines)
+        except OSError as e:
+            print(f"⚠ Failed to queue events for {self.host}: {e}")
+
+    def _retry(self):
+        """Deliver the spool file, oldest first. Returns True once it's empty."""
+        try:
+            with open(self.spool_path, encoding="utf-8") as f:
+                lines = [line.rstrip("\n") for line in f if line.strip()]
+        except OSError:
+            lines = []
+        for i in range(0, len(lines), self.batch_size):
+            if not self._deliver(lines[i:i + self.batch_size]):
+                self._rewrite_spool(lines[i:])
+                return False
+        self._rewrite_spool([])
+        return True
+
+    def _rewrite_spool(self, lines):
+        try:
+            if not lines:
+                if os.path.exists(self.spool_path):
+                    os.remove(self.spool_path)
+            else:
+                atomic_write(self.spool_path, "\n".join(lines) + "\n")
+            self.spooled = len(lines)
+        except OSError as e:
+            print(f"⚠ Failed to update the event sink queue: {e}")
+
+event_sink = None
+event_sink_lock = threading.Lock()
+
+def sync_event_sink():
+    """Return the EventSink for the event_sink_* settings, (re)starting it when they changed."""
+    global event_sink
+    url = settings["event_sink_url"] if settings else ""
+    config = (url, settings["event_sink_interval"]) if url else None
+    sink_config = lambda sink: (sink.url, sink.flush_interval) if sink else None
+    if sink_config(event_sink) == config:
+        return event_sink
+    with event_sink_lock:
+        if sink_config(event_sink) != config:
+            previous = event_sink
+            if previous:
+                previous.close(timeout=0)  # Delivers or spools what it has on its own thread
+            event_sink = EventSink(url, SINK_SPOOL_FILE, config[1], previous=previous) if config else None
+        return event_sink
+
+def close_event_sink(timeout=5):
+    if event_sink:
+        event_sink.close(timeout)
+
+# ---------------- LOG DETECTION ----------------
+def get_log_folder():
+    if settings["log_folder"]:
+        return settings["log_folder"]
+    return os.path.expandvars(
+        r"C:\Users\%USERNAME%\AppData\Local\UnrealEditorFortnite\Saved\Logs"
+    )
+
+def is_live_log_name(name):
+    """Each editor instance writes its own UnrealEditorFortnite*.log; older
+    runs are renamed to UnrealEditorFortnite-backup-*.log."""
+    return (
+        name.startswith("UnrealEditorFortnite")
+        and name.endswith(".log")
+        and "-backup-" not in name
+    )
+
+class LogDirectoryIndex:
+    """Live editor logs in one folder.
+
+    The folder is only listed again (with os.scandir, which filters by name
+    before anything is stat'ed) when its own mtime changes, i.e. when a file
+    was created, renamed or deleted in it. Backup logs are never stat'ed.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.logs = []
+        self._dir_mtime = None
+
+    def refresh(self):
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            self.logs = []
+            self._dir_mtime = None
+            return self.logs
+
+        # Coarse timestamps (e.g. FAT) can hide a change made in the same tick as the last scan
+        recent = time.time_ns() - mtime < 2_000_000_000
+        if mtime != self._dir_mtime or recent:
+            self._dir_mtime = mtime
+            with os.scandir(self.folder) as entries:
+                self.logs = [e.path for e in entries if is_live_log_name(e.name) and e.is_file()]
+        return self.logs
+
+log_directory_index = None
+
+def find_log_files():
+    """Logs of running editor instances plus the log_file setting, if set."""
+    global log_directory_index
+    folder = get_log_folder()
+    if log_directory_index is None or log_directory_index.folder != folder:
+        log_directory_index = LogDirectoryIndex(folder)
+    logs = list(log_directory_index.refresh())
+
+    log_file = settings["log_file"]
+    if log_file:
+        key = os.path.normcase(os.path.abspath(log_file))
+        if key not in {os.path.normcase(os.path.abspath(p)) for p in logs} and os.path.exists(log_file):
+            logs.append(log_file)
+    return logs
+
+# ---------------- EDITOR PROCESSES ----------------
+EDITOR_PROCESS_NAME = "unrealeditorfortnite"  # UnrealEditorFortnite-Win64-Shipping.exe and the like
+EDITOR_CHECK_INTERVAL = 5.0  # Seconds between process checks while the logs are quiet
+IDLE_POLL_INTERVAL = 1.0  # Seconds between process checks while idle without change notifications
+
+def is_editor_process(name):
+    name = name.lower()
+    # Linux shortens process names to 15 characters
+    return name.startswith(EDITOR_PROCESS_NAME) or len(name) == 15 and EDITOR_PROCESS_NAME.startswith(name)
+
+class ProcessList:
+    """Names of the running processes. Subclasses read them from the OS."""
+
+    def names(self):
+        raise NotImplementedError
+
+class FixedProcessList(ProcessList):
+    """A process list set by hand, to try idle mode without an editor."""
+
+    def __init__(self, names=()):
+        self.processes = list(names)
+
+    def names(self):
+        return list(self.processes)
+
+class WindowsProcessList(ProcessList):
+    """Process names from a Toolhelp snapshot, which needs no access to the processes themselves."""
+
+    def __init__(self):
+        from ctypes import wintypes
+
+        class PROCESSENTRY32W(ctypes.Structure):
+            _fields_ = [
+                ("dwSize", wintypes.DWORD),
+                ("cntUsage", wintypes.DWORD),
+                ("th32ProcessID", wintypes.DWORD),
+                ("th32DefaultHeapID", ctypes.c_size_t),
+                ("th32ModuleID", wintypes.DWORD),
+                ("cntThreads", wintypes.DWORD),
+                ("th32ParentProcessID", wintypes.DWORD),
+                ("pcPriClassBase", ctypes.c_long),
+                ("dwFlags", wintypes.DWORD),
+                ("szExeFile", ctypes.c_wchar * 260),
+            ]
+
+        self._entry = PROCESSENTRY32W
+        self._kernel32 = kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateToolhelp32Snapshot.restype = ctypes.c_void_p
+        kernel32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+        for fn in (kernel32.Process32FirstW, kernel32.Process32NextW):
+            fn.argtypes = [ctypes.c_void_p, ctypes.POINTER(PROCESSENTRY32W)]
+        kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+
+    def names(self):
+        kernel32 = self._kernel32
+        snapshot = kernel32.CreateToolhelp32Snapshot(0x2, 0)  # TH32CS_SNAPPROCESS
+        if snapshot in (None, ctypes.c_void_p(-1).value):
+            raise ctypes.WinError(ctypes.get_last_error())
+        names = []
+        try:
+            entry = self._entry()
+            entry.dwSize = ctypes.sizeof(entry)
+            ok = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+            while ok:
+                names.append(entry.szExeFile)
+                ok = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        finally:
+            kernel32.CloseHandle(snapshot)
+        return names
+
+class ProcfsProcessList(ProcessList):
+    """Process names from /proc (Linux)."""
+
+    def names(self):
+        names = []
+        with os.scandir("/proc") as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(os.path.join(entry.path, "comm"), "r", encoding="utf-8", errors="replace") as f:
+                        names.append(f.read().rstrip("\n"))
+                except OSError:
+                    pass  # Exited meanwhile
+        return names
+
+class PsProcessList(ProcessList):
+    """Process names from ps, for macOS and other Unixes."""
+
+    def names(self):
+        out = subprocess.run(["ps", "-axco", "comm="], capture_output=True, text=True, check=True).stdout
+        return [line.strip() for line in out.splitlines()]
+
+def create_process_list():
+    if sys.platform == "win32":
+        return WindowsProcessList()
+    if os.path.isdir("/proc/self"):
+        return ProcfsProcessList()
+    return PsProcessList()
+
+editor_processes = None  # ProcessList for idle mode, None for the OS's (set a FixedProcessList to fake one)
+
+def logs_written_since(since):
+    """True if a live log changed after since (epoch seconds), e.g. from an editor we can't see."""
+    for path in find_log_files():
+        try:
+            if os.path.getmtime(path) > since:
+                return True
+        except OSError:
+            pass
+    return False
+
+def editor_running():
+    """True if an editor process is running, or if that can't be told."""
+    global editor_processes
+    try:
+        if editor_processes is None:
+            editor_processes = create_process_list()
+        return any(is_editor_process(name) for name in editor_processes.names())
+    except Exception as e:
+        print(f"⚠ Can't list processes, idle mode is off: {e}")
+        editor_processes = FixedProcessList([EDITOR_PROCESS_NAME])  # Don't retry (and warn) every few seconds
+        return True
+
+def idle_mode_enabled(snapshot):
+    """Idle mode is on by default only where the editor itself runs, not for logs from other machines."""
+    mode = snapshot["idle_mode"]
+    return mode == "on" or mode == "auto" and sys.platform == "win32" and not snapshot["log_folder"]
+
+# ---------------- SOUND ----------------
+def resolve_sound_path(file_path):
+    """Absolute path of a trigger sound, given as an absolute path or an asset name."""
+    return file_path if os.path.isabs(file_path) else resource_path(os.path.join("assets", file_path))
+
+class SoundCache:
+    """Trigger sounds loaded once into memory, keyed by path and mtime.
+
+    Missing files are reported once and not looked for again until the
+    settings change.
+    """
+
+    def __init__(self):
+        self._sounds = {}  # path -> (mtime_ns, data)
+        self._missing = set()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def sync(self, snapshot):
+        """Load the sounds of a new settings snapshot and drop unused ones."""
+        with self._lock:
+            if snapshot.version == self._version:
+                return
+            self._version = snapshot.version
+            self._missing.clear()
+            paths = {
+                resolve_sound_path(trig["sound_file"])
+                for trig in snapshot["triggers"] if trig.get("sound_file")
+            }
+            for path in list(self._sounds):
+                if path not in paths:
+                    del self._sounds[path]
+            for path in paths:
+                if path not in self._sounds:
+                    self._load(path)
+
+    def get(self, path):
+        """Cached WAV data for path, or None if the file is missing."""
+        with self._lock:
+            entry = self._sounds.get(path)
+            if entry:
+                return entry[1]
+            if path in self._missing:
+                return None
+            return self._load(path)
+
+    def revalidate(self, path):
+        """Reload path if the file was modified or removed since it was cached."""
+        with self._lock:
+            entry = self._sounds.get(path)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if entry and entry[0] != mtime:
+                del self._sounds[path]
+                self._load(path)
+
+    def _load(self, path):
+        try:
+            with open(path, "rb") as f:
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+                data = f.read()
+        except OSError:
+            if path not in self._missing:
+                print(f"⚠ Sound file not found, using the default sound: {path}")
+                self._missing.add(path)
+            return None
+        self._sounds[path] = (mtime, data)
+        return data
+
+sound_cache = SoundCache()
+
+class CommandSoundPlayer:
+    """Plays sounds with a command-line player, e.g. paplay or afplay.
+
+    Those players read files, so each cached sound is written to a
+    temporary file the first time it's played.
+    """
+
+    COMMANDS = ("paplay", "pw-play", "aplay", "afplay")
+
+    def __init__(self, command):
+        self.command = command
+        self._files = {}  # id(data) -> (data, temporary file); data is kept so its id isn't reused
+        self._folder = None
+
+    @classmethod
+    def find(cls):
+        """A player for the first command found on PATH, or None."""
+        for command in cls.COMMANDS:
+            if shutil.which(command):
+                return cls(command)
+        return None
+
+    def play_default(self):
+        self._run(resolve_sound_path("default_success.wav"))
+
+    def play_bytes(self, data):
+        entry = self._files.get(id(data))
+        if entry is None:
+            if self._folder is None:
+                self._folder = tempfile.mkdtemp(prefix="uefn-sounds-")
+            path = os.path.join(self._folder, f"{len(self._files)}.wav")
+            with open(path, "wb") as f:
+                f.write(data)
+            entry = self._files[id(data)] = (data, path)
+        self._run(entry[1])
+
+    def _run(self, path):
+        try:
+            subprocess.Popen([self.command, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"⚠ Failed to play sound: {e}")
+
+    def close(self):
+        if self._folder:
+            shutil.rmtree(self._folder, ignore_errors=True)
+
+# ---------------- ACTION BACKENDS ----------------
+class ActionBackend:
+    """Something that plays sounds, shows notifications or reports status.
+
+    Override what the backend supports; the rest does nothing. Methods are
+    called on the dispatcher and monitor threads, so they must not block.
+    """
+
+    def play(self, sound_file):
+        """Play a trigger sound, given as in the settings ("" for the default sound)."""
+
+    def notify(self, title, message):
+        pass
+
+    def status(self, message):
+        """The status or the numbers in it changed."""
+
+    def close(self):
+        pass
+
+class ConsoleBackend(ActionBackend):
+    """Prints notifications and status changes, for headless runs."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._last_status = None
+
+    def notify(self, title, message):
+        self._print(f"{title}: {message}")
+
+    def status(self, message):
+        if message != self._last_status:
+            self._last_status = message
+            self._print(f"Status: {message}")
+
+    def _print(self, text):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            print(f"[{timestamp}] {text}", file=self.stream, flush=True)
+        except UnicodeEncodeError:  # Emoji on a legacy console
+            print(f"[{timestamp}] {text}".encode("ascii", "replace").decode(), file=self.stream, flush=True)
+
+class CommandBackend(ActionBackend):
+    """Runs a command for every notification, e.g. to post to a chat webhook.
+
+    The title and message are passed in the UEFN_TITLE and UEFN_MESSAGE
+    environment variables. The command isn't waited for.
+    """
+
+    def __init__(self, command):
+        self.command = command
+
+    def notify(self, title, message):
+        env = dict(os.environ, UEFN_TITLE=title, UEFN_MESSAGE=message)
+        try:
+            subprocess.Popen(self.command, shell=True, env=env, stdin=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"⚠ Failed to run action command: {e}")
+
+class SoundBackend(ActionBackend):
+    """Plays trigger sounds from sound_cache with a player that has play_bytes(data) and play_default()."""
+
+    def __init__(self, player):
+        self.player = player
+
+    def play(self, sound_file):
+        if sound_file:
+            sound_cache.sync(settings)
+            path = resolve_sound_path(sound_file)
+            data = sound_cache.get(path)
+            if data:
+                self.player.play_bytes(data)
+                sound_cache.revalidate(path)  # Picked up by the next play
+                return
+        self.player.play_default()
+
+    def close(self):
+        if hasattr(self.player, "close"):
+            self.player.close()
+
+def play_sound(sound_file):
+    """Play a sound from either absolute path or assets folder."""
+    for backend in action_backends:
+        try:
+            backend.play(sound_file)
+        except Exception as e:
+            print(f"⚠ Failed to play sound: {e}")
+
+def notify(title, message):
+    log_event("NOTIFY", title)
+    for backend in action_backends:
+        try:
+            backend.notify(title, message)
+        except Exception as e:
+            print(f"⚠ Failed to notify: {e}")
+
+# ---------------- STATUS ----------------
+STATUS_INTERVAL = 0.25  # Seconds between status deliveries to the backends, at least
+
+class StatusBus:
+    """Coalesces status changes and hands them to the backends at a bounded rate.
+
+    Publishing only schedules a delivery; it runs on the scheduler thread at
+    most once per interval, with whatever status is current by then. A burst
+    of triggers or reopened logs costs one tray refresh, and the monitor
+    thread never waits for the tray.
+    """
+
+    def __init__(self, interval=STATUS_INTERVAL):
+        self.interval = interval
+        self.deliveries = 0
+        self._lock = threading.Lock()
+        self._pending = False
+        self._last = -interval  # time.monotonic() of the last delivery
+
+    def publish(self):
+        with self._lock:
+            if self._pending:
+                return
+            self._pending = True
+            delay = max(0, self._last + self.interval - time.monotonic())
+        scheduler.call_later(delay, self._deliver)
+
+    def _deliver(self):
+        with self._lock:
+            self._pending = False  # Changes from here on need another delivery
+            self._last = time.monotonic()
+        self.deliveries += 1
+        message = status_message
+        for backend in action_backends:
+            try:
+                backend.status(message)
+            except Exception as e:
+                print(f"⚠ Failed to update status: {e}")
+
+status_bus = StatusBus()
+
+def update_status(msg=None, refresh=False):
+    """Set the status message (if given) and let the backends show it soon.
+
+    Setting the current message again is a no-op unless refresh is set, for
+    when other state shown next to it (like the last trigger) changed.
+    """
+    global status_message
+    if msg:
+        if msg == status_message and not refresh:
+            return
+        status_message = msg
+    status_bus.publish()
+
+def mark_startup(step):
+    startup_marks.append((step, time.perf_counter()))
+
+# ---------------- METRICS ----------------
+class Histogram:
+    """Fixed log-scale buckets in milliseconds; recording is a bisect and two adds."""
+
+    BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(self.BOUNDS, ms)] += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples."""
+        wanted = sum(self.counts) * fraction
+        seen = 0
+        for bound, count in zip(self.BOUNDS + (self.max,), self.counts):
+            seen += count
+            if count and seen >= wanted:
+                return round(min(bound, self.max), 3)
+        return 0.0
+
+    def summary(self):
+        n = sum(self.counts)
+        return {
+            "count": n,
+            "avg_ms": round(self.total / n, 3) if n else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 3),
+        }
+
+class Metrics:
+    """Counters and timings of the monitor pipeline.
+
+    Each value has a single writer thread (the monitor or the dispatcher),
+    so recording needs no locks; only new trigger names take the lock.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.reader_lag = 0  # Bytes behind the end of the logs, summed over all logs
+        self.matches = {}  # trigger name -> hits
+        self.timings = {
+            "trigger_latency": Histogram(),  # Line read -> sound/toast dispatched
+            "log_event": Histogram(),
+            "play_sound": Histogram(),
+            "notify": Histogram(),
+        }
+        self.rates = {"lines_per_s": 0.0, "bytes_per_s": 0.0}
+        self._last = (time.monotonic(), 0, 0)
+        self._lock = threading.Lock()
+
+    def record_block(self, block):
+        self.bytes_read += len(block)
+        self.lines_read += block.count(b"\n")
+
+    def record_match(self, name):
+        count = self.matches.get(name)
+        if count is None:
+            with self._lock:
+                self.matches[name] = 1
+        else:
+            self.matches[name] = count + 1
+
+    def timed(self, name, fn, *args):
+        """Call fn(*args), recording how long it took."""
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.timings[name].record((time.perf_counter() - started) * 1000)
+
+    def update_rates(self):
+        now = time.monotonic()
+        then, bytes_then, lines_then = self._last
+        elapsed = max(now - then, 1e-6)
+        self.rates = {
+            "lines_per_s": round((self.lines_read - lines_then) / elapsed, 1),
+            "bytes_per_s": round((self.bytes_read - bytes_then) / elapsed, 1),
+        }
+        self._last = (now, self.bytes_read, self.lines_read)
+
+    def snapshot(self):
+        with self._lock:
+            matches = dict(self.matches)
+        return {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "uptime_s": round(time.time() - self.started),
+            "lines_read": self.lines_read,
+            "bytes_read": self.bytes_read,
+            **self.rates,
+            "reader_lag_bytes": self.reader_lag,
+            "matches": matches,
+            "timings": {name: h.summary() for name, h in self.timings.items()},
+        }
+
+metrics = Metrics()
+monitor_idle = False  # No editor running; periodic work pauses meanwhile
+metrics_paused = False  # dump_metrics skipped a run while idle
+
+def dump_metrics():
+    """Refresh rates, write metrics.json and reschedule. Runs on the scheduler thread.
+
+    Pauses while the monitor is idle; set_idle(False) starts it again.
+    """
+    global metrics_paused
+    if monitor_idle:
+        metrics_paused = True
+        return
+    metrics.update_rates()
+    if settings["metrics_enabled"]:
+        try:
+            atomic_write(METRICS_FILE, json.dumps(metrics.snapshot(), indent=4, ensure_ascii=False))
+        except Exception as e:
+            print(f"⚠ Failed to write metrics: {e}")
+        update_status()  # Refresh the numbers shown with it
+    if not stop_thread:
+        scheduler.call_later(settings["metrics_interval"], dump_metrics)
+
+def set_idle(idle):
+    """Mark the monitor idle (no editor running) or active again."""
+    global monitor_idle
+    monitor_idle = idle
+    if not idle:
+        scheduler.call_later(0, resume_metrics)
+
+def resume_metrics():
+    """Restart dump_metrics if it paused while idle. Runs on the scheduler thread, like dump_metrics."""
+    global metrics_paused
+    if metrics_paused:
+        metrics_paused = False
+        dump_metrics()
+
+def start_metrics_server(port):
+    """Serve metrics on localhost only. Returns the server, or None if the port is taken."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = json.dumps(metrics.snapshot(), indent=4, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # No console spam per request
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsRequestHandler)
+    except OSError as e:
+        print(f"⚠ Failed to start metrics endpoint on port {port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+# ---------------- ACTION DISPATCH ----------------
+status_reset_call = None
+
+def reset_status():
+    """Reset the tray icon status after a trigger."""
+    if not stop_thread:
+        update_status("Monitoring Log")
+
+def flash_status(msg, seconds=5):
+    """Show msg as the status until reset_status runs seconds later (or another flash)."""
+    global status_reset_call
+    update_status(msg, refresh=True)
+    if status_reset_call:
+        status_reset_call.cancel()
+    status_reset_call = scheduler.call_later(seconds, reset_status)
+
+class TriggerWindow:
+    """Debounce/cooldown state of one trigger, only touched by the dispatcher worker."""
+    __slots__ = ("trigger", "keyword", "pending", "cooling", "call", "token")
+
+    def __init__(self):
+        self.trigger = None
+        self.keyword = ""
+        self.pending = 0
+        self.cooling = False
+        self.call = None
+        self.token = 0
+
+class ActionDispatcher:
+    """Runs trigger actions (event log, sound, toast, status) off the monitor thread.
+
+    The monitor only queues hits. One worker applies each trigger's debounce and
+    cooldown windows, so a burst of identical errors becomes one sound and toast
+    followed by a single summary such as "❌ Push Failure ×37".
+    """
+
+    def __init__(self, maxsize=1024):
+        self._queue = queue.Queue(maxsize)
+        self._windows = {}  # (trigger name, source log) -> TriggerWindow
+        self._overflow = {}  # (trigger name, source log) -> [trigger, keyword, source, hits], when the queue was full
+        self._spilled = []  # Other messages that found the queue full, in order
+        self._overflow_lock = threading.Lock()
+        self._thread = None  # Started by the first action
+        self._start_lock = threading.Lock()
+
+    def submit(self, trigger, keyword, source="", read_at=None):
+        """Queue a hit from log source, read at perf_counter() read_at.
+
+        Never blocks; hits beyond the queue size are still counted.
+        """
+        metrics.record_match(trigger["name"])
+        self._start()
+        try:
+            self._queue.put_nowait(("hit", trigger, keyword, source, 1, read_at))
+        except queue.Full:
+            with self._overflow_lock:
+                entry = self._overflow.setdefault((trigger["name"], source), [trigger, keyword, source, 0])
+                entry[3] += 1
+            self._wake()
+
+    def submit_backlog(self, entries, source):
+        """Queue one summary of [trigger, keyword, hits] entries found while catching up. Never blocks."""
+        self._start()
+        self._put(("backlog", entries, source))
+
+    def submit_sequence(self, seq, seconds, project, source, quiet=False):
+        """Queue a finished sequence run; these are rare, so never coalesced. Never blocks."""
+        self._start()
+        self._put(("sequence", seq, seconds, project, source, quiet))
+
+    def close(self, timeout=5):
+        """Finish the queued actions, then close the backends."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+        for backend in action_backends:
+            try:
+                backend.close()
+            except Exception as e:
+                print(f"⚠ Failed to close {type(backend).__name__}: {e}")
+
+    def _start(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+
+    def _put(self, msg):
+        """Queue msg without blocking the monitor or scheduler thread; if the queue is full, it waits in _spilled."""
+        try:
+            self._queue.put_nowait(msg)
+        except queue.Full:
+            with self._overflow_lock:
+                self._spilled.append(msg)
+            self._wake()
+
+    def _wake(self):
+        """Make sure the worker looks at the overflow, in case it emptied the queue meanwhile."""
+        try:
+            self._queue.put_nowait(("overflow",))
+        except queue.Full:
+            pass  # Busy anyway; it checks after every message
+
+    def _run(self):
+        while True:
+            msg = self._queue.get()
+            if msg is None:
+                break
+            try:
+                self._handle(msg)
+                if self._overflow or self._spilled:
+                    with self._overflow_lock:
+                        overflow, self._overflow = self._overflow, {}
+                        spilled, self._spilled = self._spilled, []
+                    for msg in spilled:
+                        self._handle(msg)
+                    for trigger, keyword, source, hits in overflow.values():
+                        self._on_hit(trigger, keyword, source, hits)
+            except Exception as e:
+                print(f"⚠ Failed to run trigger actions: {e}")
+
+    def _handle(self, msg):
+        if msg[0] == "hit":
+            self._on_hit(*msg[1:])
+        elif msg[0] == "backlog":
+            report_backlog(*msg[1:])
+        elif msg[0] == "sequence":
+            report_sequence(*msg[1:])
+        elif msg[0] == "window":
+            self._on_window_end(*msg[1:])
+
+    def _schedule(self, key, window, delay):
+        if window.call:
+            window.call.cancel()
+        window.token += 1
+        window.call = scheduler.call_later(delay, self._put, ("window", key, window.token))
+
+    def _on_hit(self, trigger, keyword, source, hits, read_at=None):
+        key = (trigger["name"], source)
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = TriggerWindow()
+        window.trigger = trigger
+        window.keyword = keyword
+        window.pending += hits
+
+        if window.cooling:
+            return  # Reported in the summary when the cooldown ends
+        debounce = trigger.get("debounce", 0)
+        if debounce > 0:
+            self._schedule(key, window, debounce)  # Fire once the hits stop
+            return
+        self._fire(key, window, summary=False, read_at=read_at)
+
+    def _on_window_end(self, key, token):
+        window = self._windows.get(key)
+        if window is None or window.token != token:
+            return  # Rescheduled since
+        window.call = None
+        if window.pending:
+            self._fire(key, window, summary=window.cooling)
+        else:
+            del self._windows[key]
+
+    def _fire(self, key, window, summary, read_at=None):
+        trigger, keyword, hits = window.trigger, window.keyword, window.pending
+        window.pending = 0
+        run_trigger_actions(trigger, keyword, hits, play=not summary, source=key[1], read_at=read_at)
+
+        cooldown = trigger.get("cooldown", settings["trigger_cooldown"])
+        if cooldown > 0:
+            window.cooling = True
+            self._schedule(key, window, cooldown)
+        else:
+            del self._windows[key]
+
+def run_trigger_actions(trigger, keyword, hits=1, play=True, source="", read_at=None):
+    """Log, play and show a (possibly coalesced) trigger seen in the source log."""
+    global last_trigger_time
+    title = f"{trigger['name']} ×{hits}" if hits > 1 else trigger["name"]
+    where = f" in {source}" if source else ""
+    last_trigger_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    metrics.timed("log_event", log_event, trigger["name"].upper(),
+                  f"Triggered by: {keyword}{where}" + (f" (×{hits})" if hits > 1 else ""), source)
+    if read_at is not None:
+        metrics.timings["trigger_latency"].record((time.perf_counter() - read_at) * 1000)
+
+    # Play sound
+    if play:
+        metrics.timed("play_sound", play_sound, trigger.get("sound_file", ""))
+
+    # Show notification if allowed
+    if settings["show_notifications"] and trigger.get("notify", True):
+        metrics.timed("notify", notify, title, f"{keyword}{where}")
+
+    # Update tray status, reset it after 5 seconds
+    flash_status(f"Triggered: {title}")
+
+def report_backlog(entries, source):
+    """Log every trigger missed while the notifier wasn't running and show one summary."""
+    global last_trigger_time
+    if not entries:
+        return
+    for trigger, keyword, hits in entries:
+        log_event(trigger["name"].upper(), f"Triggered by: {keyword} in {source} (×{hits}, while closed)", source)
+    last_trigger_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    if settings["show_notifications"]:
+        summary = ", ".join(
+            f"{trigger['name']} ×{hits}" if hits > 1 else trigger["name"]
+            for trigger, _, hits in entries if trigger.get("notify", True)
+        )
+        if summary:
+            notify("Missed while closed", f"{summary} in {source}")
+    update_status()  # Show the new last trigger time
+
+action_dispatcher = ActionDispatcher()
+
+# ---------------- SEQUENCES ----------------
+def format_duration(seconds):
+    seconds = round(seconds)
+    if seconds < 120:
+        return f"{seconds} s"
+    if seconds < 3600:
+        return f"{seconds // 60} min {seconds % 60} s"
+    return f"{seconds // 3600} h {seconds % 3600 // 60} min"
+
+def log_line_time(line):
+    """Seconds since the epoch of a log line's timestamp, or None."""
+    stamp = log_line_stamp(line)
+    if not stamp:
+        return None
+    try:
+        return datetime.strptime(stamp, "%Y.%m.%d-%H.%M.%S:%f").timestamp()
+    except ValueError:
+        return None
+
+class DurationHistory:
+    """Timed sequence runs per sequence and project, persisted to durations.json."""
+
+    def __init__(self, path):
+        self.path = path
+        self._runs = None  # sequence name -> project -> [[finished (epoch), seconds], ...], loaded on first use
+        self._lock = threading.Lock()
+        self._save_call = None
+
+    @property
+    def runs(self):
+        """The runs, read from the file the first time. Call with the lock held."""
+        if self._runs is None:
+            self._runs = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._runs = json.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"⚠ Failed to load duration history: {e}")
+        return self._runs
+
+    def record(self, name, project, seconds):
+        with self._lock:
+            runs = self.runs.setdefault(name, {}).setdefault(project, [])
+            runs.append([round(time.time()), round(seconds, 3)])
+            del runs[:-settings["duration_history"]]
+            if self._save_call:
+                self._save_call.cancel()
+            self._save_call = scheduler.call_later(1, self.save)
+
+    def stats(self, name, project):
+        """(runs, p50, p95) in seconds, or None without runs."""
+        with self._lock:
+            durations = sorted(seconds for _, seconds in self.runs.get(name, {}).get(project, ()))
+        if not durations:
+            return None
+        def percentile(fraction):
+            return durations[min(len(durations) - 1, round(fraction * (len(durations) - 1)))]
+        return len(durations), percentile(0.5), percentile(0.95)
+
+    def keys(self):
+        with self._lock:
+            return [(name, project) for name, projects in self.runs.items() for project in projects]
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.runs, ensure_ascii=False)
+        try:
+            atomic_write(self.path, data)
+        except Exception as e:
+            print(f"⚠ Failed to save duration history: {e}")
+
+duration_history = DurationHistory(DURATIONS_FILE)
+
+class SequenceRun:
+    __slots__ = ("step", "started", "started_log")
+
+    def __init__(self, started, started_log):
+        self.step = 0  # Index of the last step seen
+        self.started = started  # Wall clock, for timeouts and lines without a timestamp
+        self.started_log = started_log  # Log timestamp of the first step, if it had one
+
+    def elapsed(self, now, logged):
+        """Seconds since the first step, by log timestamps where both lines have one."""
+        if logged is not None and self.started_log is not None:
+            return max(logged - self.started_log, 0)
+        return now - self.started
+
+class SequenceTracker:
+    """Small state machine following the sequences in one log.
+
+    The first step (re)starts a run; each following step has to come in order,
+    and the last one reports how long the run took. An abort step, or no
+    progress within the sequence's timeout, drops the run.
+    """
+
+    def __init__(self, path, source):
+        self.source = source
+        self.project = self._find_project(path) or source
+        self.runs = {}  # Sequence name -> SequenceRun
+        self.stream = LineStream()
+
+    @staticmethod
+    def _find_project(path, head_size=65536):
+        """Look for the project name near the top of the log, where the command line is."""
+        try:
+            with open(path, "rb") as f:
+                head = f.read(head_size).decode("utf-8", errors="ignore")
+        except OSError:
+            return None
+        match = re.search(settings["project_pattern"], head)
+        return (match.group(1) if match.groups() else match.group(0)).strip() if match else None
+
+    def feed(self, snapshot, block, quiet=False):
+        """Advance the runs with the lines of a block. quiet records without sound or toast."""
+        for _, line, matches in self.stream.match(snapshot.sequence_matcher, block):
+            now, logged = time.time(), log_line_time(line)
+            for step, _ in matches:
+                s_idx, st_idx = step["step"]
+                self._advance(snapshot["sequences"][s_idx], st_idx, now, logged, quiet)
+
+    def _advance(self, seq, st_idx, now, logged, quiet):
+        name = seq["name"]
+        run = self.runs.get(name)
+        if run and now - run.started > seq.get("timeout", 3600):
+            log_event(name.upper(), f"{name} timed out after step {run.step + 1} in {self.source}", self.source)
+            del self.runs[name]
+            run = None
+
+        if st_idx == 0:
+            self.runs[name] = SequenceRun(now, logged)
+            return
+        if run is None:
+            return
+        if st_idx == -1:
+            del self.runs[name]
+            log_event(name.upper(), f"{name} aborted after {format_duration(run.elapsed(now, logged))} in {self.source}",
+                      self.source)
+            return
+        if st_idx != run.step + 1:
+            return  # Out of order
+
+        run.step = st_idx
+        if st_idx == len(seq["steps"]) - 1:
+            del self.runs[name]
+            action_dispatcher.submit_sequence(seq, run.elapsed(now, logged), self.project, self.source, quiet)
+
+def report_sequence(seq, seconds, project, source, quiet=False):
+    """Record a finished sequence run and announce how long it took."""
+    global last_trigger_time
+    name = seq["name"]
+    duration_history.record(name, project, seconds)
+    title = f"{name} done in {format_duration(seconds)}"
+    log_event(name.upper(), f"{title} ({project}, {source})", source)
+    if quiet:
+        return
+    last_trigger_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    if seq.get("sound_file"):
+        play_sound(seq["sound_file"])
+    if settings["show_notifications"] and seq.get("notify", True):
+        runs, p50, p95 = duration_history.stats(name, project)
+        notify(title, f"{project}: p50 {format_duration(p50)}, p95 {format_duration(p95)} over {runs} run{'s' if runs != 1 else ''}")
+
+    flash_status(f"Triggered: {title}")
+
+# ---------------- LOG TAILING ----------------
+def open_log_file(path):
+    """Open a log for reading without stopping the editor from renaming or deleting it."""
+    if sys.platform != "win32":
+        return open(path, "rb", buffering=0)
+
+    # Python's open() doesn't share delete access, which would block the
+    # editor from rotating its log while we have it open
+    import msvcrt
+    import pywintypes
+    import win32file
+    try:
+        handle = win32file.CreateFile(
+            path,
+            win32file.GENERIC_READ,
+            win32file.FILE_SHARE_READ | win32file.FILE_SHARE_WRITE | win32file.FILE_SHARE_DELETE,
+            None,
+            win32file.OPEN_EXISTING,
+            0,
+            None
+        )
+    except pywintypes.error as e:
+        raise OSError(e.winerror, e.strerror, path)
+    fd = msvcrt.open_osfhandle(handle.Detach(), os.O_RDONLY | os.O_BINARY)
+    return open(fd, "rb", buffering=0)
+
+def file_identity(st):
+    """Device, file index and, where the OS records it, creation time.
+
+    The file index alone isn't reliable on Windows, so the creation time is
+    compared too (st_ctime is the creation time there, not on Linux).
+    """
+    created = getattr(st, "st_birthtime", None)
+    if created is None and sys.platform == "win32":
+        created = st.st_ctime
+    return (st.st_dev, st.st_ino, created)
+
+class LogTailer:
+    """Reads newly appended bytes from a log in large blocks.
+
+    Only complete lines are returned; a trailing partial line is held back
+    until the rest of it has been written. A line growing past max_line
+    bytes is handed over in pieces instead, for self.stream to match.
+    """
+
+    def __init__(self, path, chunk_size, from_start=False, max_line=65536):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.chunk_size = chunk_size
+        self.max_line = max_line
+        self.f = open_log_file(path)
+        self.identity = file_identity(os.fstat(self.f.fileno()))
+        self.offset = 0 if from_start else self.f.seek(0, 2)  # Move to end
+        self.at_eof = True
+        self._partial = b""
+        self.stream = LineStream()  # Matches the blocks, including lines cut into pieces
+        self.lag = 0  # Bytes behind the end of the file after the last read
+        self.sequences = None  # SequenceTracker, once sequences are configured
+        self.catchup_end = -1  # Lines up to this offset were written while we weren't running
+        self.backlog = {}  # trigger name -> [trigger, keyword, hits] found while catching up
+
+    @property
+    def position(self):
+        """Offset up to which every line has been processed."""
+        return self.offset - len(self._partial)
+
+    @property
+    def catching_up(self):
+        return self.position < self.catchup_end
+
+    def backlog_size(self, block):
+        """How many bytes at the start of block, just read, are lines written before we started.
+
+        A block can run past catchup_end when the editor wrote more meanwhile;
+        it is split after the line that catchup_end falls into.
+        """
+        if self.catchup_end < 0:
+            return 0
+        start = self.position - len(block)
+        if start >= self.catchup_end:
+            return 0
+        return block.find(b"\n", self.catchup_end - start - 1) + 1 or len(block)
+
+    def resume(self, checkpoint, window):
+        """Continue from a checkpoint saved by a previous run, if it still applies.
+
+        Returns True if there is a backlog to catch up on.
+        """
+        if not window or time.time() - checkpoint["time"] > window:
+            return False
+        end = self.f.seek(0, 2)
+        created = self.identity[2]
+        if tuple(checkpoint["identity"]) == self.identity and checkpoint["offset"] <= end:
+            start = checkpoint["offset"]
+        elif created is not None and created > checkpoint["time"]:
+            start = 0  # Replaced by a new log while we were closed
+        else:
+            return False
+        if start == end:
+            return False
+        self.offset = self.f.seek(start)
+        self.catchup_end = end
+        return True
+
+    def reopen(self, checkpoint):
+        """Continue where a tailer of the same file was closed (see LogSet.drop).
+
+        Returns False if the path now holds another file, which is then read
+        from where __init__ put it.
+        """
+        if tuple(checkpoint["identity"]) != self.identity or checkpoint["offset"] > self.f.seek(0, 2):
+            self.f.seek(self.offset)
+            return False
+        self.offset = self.f.seek(checkpoint["offset"])
+        return True
+
+    def read_block(self):
+        """Return the complete lines read since the last call, as bytes."""
+        data = self.f.read(self.chunk_size)
+        self.at_eof = len(data) < self.chunk_size
+        if not data:
+            return b""
+        self.offset += len(data)
+
+        end = data.rfind(b"\n") + 1
+        if not end:
+            self._partial += data
+            if len(self._partial) < self.max_line:
+                return b""
+            block, self._partial = self._partial, b""  # Giant line: don't hold it all in memory
+            return block
+        block = self._partial + data[:end] if self._partial else data[:end]
+        self._partial = data[end:]
+        return block
+
+    def drain(self):
+        """Yield the rest of the open file, including a last line without a newline."""
+        while True:
+            block = self.read_block()
+            if block:
+                yield block
+            if self.at_eof:
+                break
+        if self._partial:
+            yield self._partial + b"\n"
+            self._partial = b""
+
+    def check(self):
+        """Compare the file now at path with the one we have open.
+
+        Returns "ok", "truncated" (same file, shrunk below our offset),
+        "rotated" (another file took its place) or "gone".
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return "gone"
+        if file_identity(st) != self.identity:
+            return "rotated"
+        if st.st_size < self.offset:
+            return "truncated"
+        return "ok"
+
+    def rewind(self):
+        """Start over from the beginning after the log was truncated in place."""
+        self.offset = self.f.seek(0)
+        self._partial = b""
+        self.stream = LineStream()
+        if self.catchup_end > 0:
+            self.catchup_end = 0  # What's there now is new; the next block reports the backlog so far
+
+    def close(self):
+        self.f.close()
+
+# ---------------- LOG WATCHING ----------------
+class PollingWatcher:
+    """Fallback watcher: simply sleeps for the poll interval."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._wake = threading.Event()
+
+    def watch(self, *directories):
+        pass
+
+    def wait(self, timeout=None):
+        """Block until something may have changed. Returns True if woken early."""
+        woken = self._wake.wait(self.interval if timeout is None else timeout)
+        self._wake.clear()
+        return woken
+
+    def wake(self):
+        self._wake.set()
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Linux watcher using inotify on the directories holding the logs."""
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._wds = {}  # directory -> watch descriptor
+
+    def watch(self, *directories):
+        wanted = set(directories)
+        if wanted == set(self._wds) and all(wd >= 0 for wd in self._wds.values()):
+            return
+        for wd in self._wds.values():
+            if wd >= 0:
+                self._libc.inotify_rm_watch(self._fd, wd)
+        # A directory that doesn't exist (yet) gets -1 and is retried next time
+        self._wds = {
+            d: self._libc.inotify_add_watch(self._fd, os.fsencode(d), self.MASK)
+            for d in wanted
+        }
+
+    def wait(self, timeout=None):
+        ready, _, _ = select.select([self._fd, self._wake_r], [], [], self.interval if timeout is None else timeout)
+        for fd in ready:
+            self._drain(fd)
+        return bool(ready)
+
+    def _drain(self, fd):
+        try:
+            while os.read(fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wake(self):
+        os.write(self._wake_w, b"\0")
+
+    def close(self):
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+class WindowsDirectoryWatcher:
+    """Windows watcher using overlapped ReadDirectoryChangesW on the log folders."""
+
+    def __init__(self, interval):
+        import pywintypes
+        import win32con
+        import win32event
+        import win32file
+        self._pywintypes = pywintypes
+        self._win32event = win32event
+        self._win32file = win32file
+        self._flags = (
+            win32con.FILE_NOTIFY_CHANGE_FILE_NAME
+            | win32con.FILE_NOTIFY_CHANGE_SIZE
+            | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE
+        )
+        self.interval = interval
+        self._wake_event = win32event.CreateEvent(None, False, False, None)
+        self._dirs = {}  # directory -> (handle, overlapped, buffer), or None if it can't be opened
+
+    def watch(self, *directories):
+        wanted = set(directories)
+        if wanted == set(self._dirs) and all(self._dirs.values()):
+            return
+        self._close_handles()
+        self._dirs = {d: self._open(d) for d in wanted}
+
+    def _open(self, directory):
+        win32file = self._win32file
+        try:
+            handle = win32file.CreateFile(
+                directory,
+                0x0001,  # FILE_LIST_DIRECTORY
+                win32file.FILE_SHARE_READ | win32file.FILE_SHARE_WRITE | win32file.FILE_SHARE_DELETE,
+                None,
+                win32file.OPEN_EXISTING,
+                win32file.FILE_FLAG_BACKUP_SEMANTICS | win32file.FILE_FLAG_OVERLAPPED,
+                None
+            )
+        except self._pywintypes.error:
+            return None
+        overlapped = self._pywintypes.OVERLAPPED()
+        overlapped.hEvent = self._win32event.CreateEvent(None, True, False, None)
+        entry = (handle, overlapped, win32file.AllocateReadBuffer(8192))
+        self._request(entry)
+        return entry
+
+    def _request(self, entry):
+        handle, overlapped, buffer = entry
+        self._win32file.ReadDirectoryChangesW(handle, buffer, False, self._flags, overlapped)
+
+    def wait(self, timeout=None):
+        timeout = self.interval if timeout is None else timeout
+        win32event = self._win32event
+        entries = [e for e in self._dirs.values() if e]
+        rc = win32event.WaitForMultipleObjects(
+            [e[1].hEvent for e in entries] + [self._wake_event], False,
+            win32event.INFINITE if timeout is None else int(timeout * 1000)
+        )
+        if rc == win32event.WAIT_TIMEOUT:
+            return False
+        index = rc - win32event.WAIT_OBJECT_0
+        if index < len(entries):
+            handle, overlapped, _ = entries[index]
+            self._win32file.GetOverlappedResult(handle, overlapped, True)
+            win32event.ResetEvent(overlapped.hEvent)
+            self._request(entries[index])
+        return True
+
+    def wake(self):
+        self._win32event.SetEvent(self._wake_event)
+
+    def _close_handles(self):
+        for entry in self._dirs.values():
+            if entry:
+                self._win32file.CancelIo(entry[0])
+                entry[0].Close()
+        self._dirs = {}
+
+    def close(self):
+        self._close_handles()
+
+def create_log_watcher(block=False):
+    """Pick the best available watcher, falling back to polling.
+
+    With block, a change-notification watcher waits for a change without a
+    timeout (until woken), for files only we and the user write.
+    """
+    poll_interval = settings["poll_interval"]
+    if settings["watch_backend"] != "polling":
+        timeout = None if block else settings["watch_timeout"]
+        try:
+            if sys.platform == "win32":
+                return WindowsDirectoryWatcher(timeout)
+            if sys.platform.startswith("linux"):
+                return InotifyWatcher(timeout)
+        except Exception as e:
+            print(f"⚠ Change notifications unavailable, polling instead: {e}")
+    return PollingWatcher(poll_interval)
+
+# ---------------- CHECKPOINTS ----------------
+def load_checkpoints():
+    """Read positions saved by the last run, keyed by normalized log path."""
+    try:
+        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠ Failed to load checkpoints: {e}")
+        return {}
+
+def save_checkpoints(checkpoints):
+    try:
+        atomic_write(CHECKPOINT_FILE, json.dumps(checkpoints, indent=4))
+    except Exception as e:
+        print(f"⚠ Failed to save checkpoints: {e}")
+
+def checkpoint_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+# ---------------- LOG MONITOR ----------------
+class LogSet:
+    """Tails every live editor log from one loop, one LogTailer per file.
+
+    on_block(tailer, block) is called for every block of lines read,
+    including the rest of a log that is dropped after being rotated away.
+    """
+
+    def __init__(self, on_block, checkpoints=None):
+        self.on_block = on_block
+        self.tailers = {}  # path -> LogTailer
+        self.started = time.time()
+        self.scanned = False
+        self.checkpoints = checkpoints or {}  # From the last run, used on the first scan only
+        # Positions of logs closed before they were done with (dropped after an
+        # error or while idle), continued from if the same file comes back
+        self.closed = {}
+        self.saved = None  # Positions of the last checkpoints handed out by moved_checkpoints()
+
+    def __len__(self):
+        return len(self.tailers)
+
+    def __iter__(self):
+        return iter(list(self.tailers.values()))
+
+    def update(self, paths, chunk_size, max_line=65536):
+        """Start tailing new paths and stop tailing ones that are gone. Returns True if changed."""
+        before = set(self.tailers)
+        for path in list(self.tailers):
+            if path not in paths:
+                self.drop(path)
+        for path in paths:
+            if path in self.tailers:
+                continue
+            # Logs already there at startup are tailed from the end, like before.
+            # Logs created or written since belong to a new editor instance, so
+            # read them from the start to not miss their first lines.
+            try:
+                from_start = self.scanned and os.path.getmtime(path) >= self.started
+                tailer = self.tailers[path] = LogTailer(path, chunk_size, from_start, max_line)
+                checkpoint = self.checkpoints.get(checkpoint_key(path))
+                closed = self.closed.pop(checkpoint_key(path), None)
+                if closed:
+                    tailer.reopen(closed)
+                elif checkpoint and tailer.resume(checkpoint, settings["catchup_window"]):
+                    update_status(f"Catching up on {tailer.name}...")
+            except OSError as e:
+                update_status(f"Error opening log: {e}")
+        self.scanned = True
+        self.checkpoints = {}
+        return set(self.tailers) != before
+
+    def read(self, tailer):
+        """Read and process one block. Returns True if more is waiting."""
+        block = tailer.read_block()
+        # Only a full chunk means we may be behind, so stat only then
+        tailer.lag = 0 if tailer.at_eof else os.fstat(tailer.f.fileno()).st_size - tailer.offset
+        if block:
+            self.on_block(tailer, block)
+        return not tailer.at_eof
+
+    def drop(self, path, drain=True):
+        """Stop tailing path, first finishing the file we still have open."""
+        tailer = self.tailers.pop(path, None)
+        if not tailer:
+            return
+        try:
+            if drain:
+                for block in tailer.drain():
+                    self.on_block(tailer, block)
+        except OSError as e:
+            print(f"⚠ Failed to finish reading {tailer.name}: {e}")
+        finally:
+            self.closed[checkpoint_key(path)] = {
+                "identity": list(tailer.identity), "offset": tailer.position, "time": time.time()
+            }
+            tailer.close()
+
+    def checkpoints_now(self):
+        now = time.time()
+        return dict(self.closed, **{
+            checkpoint_key(t.path): {"identity": list(t.identity), "offset": t.position, "time": now}
+            for t in self
+        })
+
+    def moved_checkpoints(self):
+        """checkpoints_now() if any log moved since the last call returned them, else None."""
+        checkpoints = self.checkpoints_now()
+        positions = {key: (c["identity"], c["offset"]) for key, c in checkpoints.items()}
+        if positions == self.saved:
+            return None
+        self.saved = positions
+        return checkpoints
+
+    def suspend(self):
+        """Close every log; the next update() reopens them where they were left."""
+        self.close()
+
+    def check(self):
+        """Handle truncated, rotated and removed logs. Returns True if any were found."""
+        changed = False
+        for tailer in self:
+            state = tailer.check()
+            if state == "truncated":
+                tailer.rewind()
+                changed = True
+            elif state != "ok":
+                # The new file at this path (if any) is picked up by the rescan
+                self.drop(tailer.path)
+                changed = True
+        return changed
+
+    def close(self):
+        for path in list(self.tailers):
+            self.drop(path, drain=False)
+
+def monitor_log():
+    """Continuously monitor the editor logs for trigger keywords."""
+    global stop_thread, log_watcher
+
+    def check_triggers(tailer, block):
+        nonlocal last_read
+        read_at = time.perf_counter()
+        last_read = time.monotonic()
+        metrics.record_block(block)
+        snapshot = settings
+        backlog = tailer.backlog_size(block)  # Bytes written while we weren't running
+        if snapshot["sequences"]:
+            if tailer.sequences is None:
+                tailer.sequences = SequenceTracker(tailer.path, tailer.name)
+            if backlog:
+                tailer.sequences.feed(snapshot, block[:backlog], quiet=True)
+            if backlog < len(block):
+                tailer.sequences.feed(snapshot, block[backlog:] if backlog else block)
+
+        # Backlog from while we weren't running: count hits, report them once caught up
+        for _, _, matches in tailer.stream.match(snapshot.matcher, block, 0, backlog):
+            trigger, keyword = matches[0]
+            entry = tailer.backlog.setdefault(trigger["name"], [trigger, keyword, 0])
+            entry[1] = keyword
+            entry[2] += 1
+        if tailer.catchup_end >= 0 and not tailer.catching_up:
+            tailer.catchup_end = -1
+            action_dispatcher.submit_backlog(list(tailer.backlog.values()), tailer.name)
+            tailer.backlog = {}
+            update_status("Monitoring Log")
+
+        # First matching trigger wins on each line
+        for _, _, matches in tailer.stream.match(snapshot.matcher, block, backlog):
+            trigger, keyword = matches[0]
+            action_dispatcher.submit(trigger, keyword, tailer.name, read_at)
+
+    def editor_gone(snapshot):
+        """Whether to go idle: the logs have been quiet and no editor runs (checked every few seconds)."""
+        nonlocal next_editor_check
+        now = time.monotonic()
+        if not idle_mode_enabled(snapshot) or now < next_editor_check or now - last_read < EDITOR_CHECK_INTERVAL:
+            return False
+        next_editor_check = now + EDITOR_CHECK_INTERVAL
+        return not editor_running()
+
+    def sleep_while_idle(snapshot):
+        """Close the logs and wait until an editor starts (or a log is written anyway) or we're stopped."""
+        logs.suspend()
+        checkpoints = logs.moved_checkpoints()
+        if checkpoints is not None:
+            scheduler.call_later(0, save_checkpoints, checkpoints)
+        metrics.reader_lag = 0
+        update_status("Idle, editor not running")
+        set_idle(True)
+        since = time.time()
+        # A new log wakes the watcher right away; the polling one can't tell, so check the processes often
+        backoff = IDLE_POLL_INTERVAL if isinstance(watcher, PollingWatcher) else snapshot["idle_check_interval"]
+        nonlocal last_read
+        while not stop_thread:
+            watcher.wait(backoff)
+            if stop_thread or editor_running() or logs_written_since(since):
+                break
+        last_read = time.monotonic()  # Give the editor time to write before checking again
+        set_idle(False)
+
+    logs = LogSet(check_triggers, load_checkpoints())
+    watcher = log_watcher = create_log_watcher()
+    last_read = time.monotonic()  # When a log last had new lines
+    next_editor_check = 0
+    last_scan = 0
+    rescan = True  # Something changed in a log folder since the last scan
+    next_checkpoint = 0
+    first_scan = True
+
+    while not stop_thread:
+        snapshot = settings  # One consistent view per iteration, no locking
+
+        # Remember how far each log has been read, written off this thread and only if it moved
+        if time.monotonic() >= next_checkpoint and logs.scanned:
+            checkpoints = logs.moved_checkpoints()
+            if checkpoints is not None:
+                scheduler.call_later(0, save_checkpoints, checkpoints)
+            next_checkpoint = time.monotonic() + snapshot["checkpoint_interval"]
+
+        # Pick up editor instances that started or exited
+        since_scan = time.monotonic() - last_scan
+        if (rescan and since_scan >= 0.5) or since_scan >= 2:
+            changed = logs.update(find_log_files(), snapshot["read_chunk_size"], snapshot["max_line_length"])
+            watcher.watch(get_log_folder(), *{os.path.dirname(os.path.abspath(t.path)) for t in logs})
+            last_scan = time.monotonic()
+            rescan = False
+            if first_scan:
+                mark_startup("logs opened")
+                first_scan = False
+            if changed and len(logs) == 1:
+                update_status("Monitoring Log")
+            elif changed and logs:
+                update_status(f"Monitoring {len(logs)} Logs")
+
+        if not logs and editor_gone(snapshot):
+            sleep_while_idle(snapshot)
+            last_scan = 0
+            continue
+        if not logs:
+            update_status("Waiting for log...")
+            # Wake up as soon as a log appears in the folder
+            watcher.wait(max(watcher.interval, 2))
+            last_scan = 0
+            continue
+
+        # Read one block from each log in turn, so a busy log can't starve the others
+        busy = False
+        for tailer in logs:
+            try:
+                busy = logs.read(tailer) or busy
+            except Exception as e:
+                update_status(f"Error reading log: {e}")
+                logs.drop(tailer.path, drain=False)
+        metrics.reader_lag = sum(t.lag for t in logs)
+
+        if busy:
+            continue
+
+        # Nothing new; hand over logs that were rotated / replaced
+        if logs.check():
+            last_scan = 0
+            continue
+
+        if editor_gone(snapshot):
+            sleep_while_idle(snapshot)
+            last_scan = 0
+            continue
+
+        timeout = None
+        if rescan:
+            timeout = last_scan + 0.5 - time.monotonic()  # Only until the pending rescan is due
+        if timeout is None or timeout > 0:
+            rescan = watcher.wait(timeout) or rescan
+
+    # Clean up on exit
+    checkpoints = logs.moved_checkpoints() if logs.scanned else None
+    if checkpoints is not None:
+        save_checkpoints(checkpoints)
+    logs.close()
+    log_watcher = None  # So a later stop_monitor doesn't wake a closed watcher
+    watcher.close()
+
+def stop_monitor():
+    """Make monitor_log and watch_settings_file return soon."""
+    global stop_thread
+    stop_thread = True
+    for watcher in (log_watcher, settings_watcher):
+        if watcher:
+            watcher.wake()
+
+# ---------------- OFFLINE SCAN ----------------
+SCAN_CHUNK_SIZE = 16 * 1024 * 1024  # Files larger than this are split across worker processes
+SCAN_WINDOW_SIZE = 4 * 1024 * 1024  # Bytes matched at a time within a worker
+
+scan_matchers = {}  # Per process, so each worker compiles the triggers only once
+
+def scan_log_range(path, start, end, triggers, max_line=65536):
+    """Scan path[start:end] (line aligned) with the same matcher as the live monitor.
+
+    Returns (newlines in the range, [(byte offset, line index in range,
+    trigger index, keyword, timestamp), ...]). Runs in worker processes.
+    """
+    signature = (trigger_signature(triggers), max_line)
+    matcher = scan_matchers.get(signature)
+    if matcher is None:
+        matcher = scan_matchers[signature] = TriggerMatcher(triggers, max_line)
+    index = {id(trig): i for i, trig in enumerate(matcher.triggers)}
+
+    hits = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        counted = start
+        lines = 0
+        # Match in fixed windows so memory stays bounded for huge ranges, even
+        # a single giant line; the stream carries lines across window edges
+        stream = LineStream()
+        for window_start in range(start, end, SCAN_WINDOW_SIZE):
+            window_end = min(window_start + SCAN_WINDOW_SIZE, end)
+            for line_start, line, matches in stream.match(matcher, mm, window_start, window_end, window_end == end):
+                lines += count_lines(mm, counted, line_start)
+                counted = line_start
+                stamp = log_line_stamp(line)
+                trigger, keyword = matches[0]
+                hits.append((line_start, lines, index[id(trigger)], keyword, stamp or "-"))
+        lines += count_lines(mm, counted, end)
+    return lines, hits
+
+def count_lines(buf, start, end):
+    """Newlines in buf[start:end], counted a window at a time."""
+    return sum(buf[pos:min(pos + SCAN_WINDOW_SIZE, end)].count(b"\n") for pos in range(start, end, SCAN_WINDOW_SIZE))
+
+def split_lines(buf, start, end, chunk_size):
+    """Cut buf[start:end] into ranges of about chunk_size bytes that end on a newline."""
+    ranges = []
+    while start < end:
+        cut = buf.find(b"\n", min(start + chunk_size, end - 1), end)
+        stop = end if cut == -1 else cut + 1
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def split_log(path, size, chunk_size):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return split_lines(mm, 0, size, chunk_size)
+
+def collect_scan_files(targets):
+    """Log files to scan: files as given, directories expanded to every editor log, backups included."""
+    files = []
+    for target in targets:
+        if os.path.isdir(target):
+            with os.scandir(target) as entries:
+                logs = [
+                    e.path for e in entries
+                    if e.name.startswith("UnrealEditorFortnite") and e.name.endswith(".log") and e.is_file()
+                ]
+            files.extend(sorted(logs, key=os.path.getmtime))
+        elif os.path.isfile(target):
+            files.append(target)
+        else:
+            print(f"⚠ Not found: {target}", file=sys.stderr)
+    return files
+
+def scan_logs(files, triggers, jobs=None, max_line=65536):
+    """Yield (path, line number, byte offset, trigger, keyword, timestamp) for every hit, in file order."""
+    triggers = [dict(trig) for trig in triggers]
+    work = []  # (path, start, end)
+    for path in files:
+        size = os.path.getsize(path)
+        if size:
+            work.extend((path, start, end) for start, end in split_log(path, size, SCAN_CHUNK_SIZE))
+
+    if len(work) > 1 and jobs != 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(scan_log_range, *zip(*[(p, a, b, triggers, max_line) for p, a, b in work]))
+    else:
+        pool = None
+        results = (scan_log_range(p, a, b, triggers, max_line) for p, a, b in work)
+
+    try:
+        line_base = 0
+        current = None
+        for (path, _, _), (lines, hits) in zip(work, results):
+            if path != current:
+                current = path
+                line_base = 0
+            for offset, line, t_idx, keyword, stamp in hits:
+                yield path, line_base + line + 1, offset, triggers[t_idx], keyword, stamp
+            line_base += lines
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+def run_scan(argv):
+    """--scan <log or dir> ...: print every trigger hit in existing logs."""
+    parser = argparse.ArgumentParser(prog="uefn_notifier --scan", description="Scan editor logs for trigger hits.")
+    parser.add_argument("--scan", nargs="+", metavar="PATH", required=True,
+                        help="log files or folders (e.g. Saved/Logs, backups included)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per CPU)")
+    args, _ = parser.parse_known_args(argv)
+
+    started = time.perf_counter()
+    files = collect_scan_files(args.scan)
+    counts = {}
+    for path, line, offset, trigger, keyword, stamp in scan_logs(files, settings["triggers"], args.jobs, settings["max_line_length"]):
+        counts[trigger["name"]] = counts.get(trigger["name"], 0) + 1
+        print(f"{path}:{line}:{offset}\t{stamp}\t{trigger['name']}\t{keyword}")
+
+    total = sum(os.path.getsize(p) for p in files)
+    print(
+        f"Scanned {len(files)} file(s), {total / 1048576:.1f} MiB in {time.perf_counter() - started:.2f} s: "
+        + (", ".join(f"{name} ×{n}" for name, n in counts.items()) or "no hits"),
+        file=sys.stderr
+    )
+    return 0
+
+
+# ---------------- HISTORY ----------------
+def parse_history_time(text):
+    """Unix time of "YYYY-MM-DD" or "YYYY-MM-DD HH:MM" (local), for --since/--until."""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"not a date: {text!r} (use YYYY-MM-DD or 'YYYY-MM-DD HH:MM')")
+
+def run_history(argv):
+    """--history: print events from the event history, newest first."""
+    parser = argparse.ArgumentParser(prog="uefn_notifier --history", description="Query the event history.")
+    parser.add_argument("--history", action="store_true", required=True)
+    parser.add_argument("--trigger", metavar="NAME", help="only events of this trigger or event type")
+    parser.add_argument("--log", metavar="FILE", help="only events from this log file name")
+    parser.add_argument("--since", type=parse_history_time, metavar="DATE", help="from this local date/time on")
+    parser.add_argument("--until", type=parse_history_time, metavar="DATE", help="before this local date/time")
+    parser.add_argument("--limit", type=int, default=50, help="events to print (default: 50)")
+    parser.add_argument("--per-day", action="store_true", help="print counts per day and type instead")
+    args, _ = parser.parse_known_args(argv)
+
+    event_history.flush()  # Includes the import of an old events.txt on the first run
+    event_type = args.trigger.upper() if args.trigger else None
+    if args.per_day:
+        for day, event_type, count in event_history.daily_counts(event_type, args.log, args.since):
+            print(f"{day}\t{count}\t{event_type}")
+    else:
+        for event in event_history.query(event_type, args.log, args.since, args.until, args.limit):
+            print(f"{format_event_time(event.time)}\t{event.type}\t{event.message}")
+    event_history.close()
+    return 0
+
+# ---------------- DRY RUN ----------------
+BROAD_KEYWORD_LENGTH = 4  # Shorter keywords match all kinds of lines
+BROAD_LINE_SHARE = 0.01  # A trigger hitting more of the sample's lines than this is too broad
+BROAD_PER_HOUR = 12  # ... or one that would notify more often than this
+DRY_RUN_TAIL = 32 * 1024 * 1024  # Bytes of the end of a log tried by default
+DRY_RUN_CPU_SAMPLE = 4 * 1024 * 1024  # Bytes each trigger is timed on alone
+DRY_RUN_MIN_SPAN = 600  # Seconds a sample must cover to give hourly rates
+
+def lint_triggers(triggers, only=None):
+    """Warnings about keywords that are too broad or can never make a difference.
+
+    Checks the triggers against each other only, without a log; pass the
+    index of one trigger as only to just get the warnings about it, and
+    about the later triggers it keeps from firing.
+    """
+    warnings = []
+    seen = []  # (keyword lowercased, trigger index) of the triggers before
+    for i, trig in enumerate(triggers):
+        name = trig.get("name", "")
+        keywords = [k for k in trig.get("keywords", []) if k.strip()]
+        lowered = [k.lower() for k in keywords]
+        for keyword, lower in zip(keywords, lowered):
+            problems = []
+            if len(keyword.strip()) < BROAD_KEYWORD_LENGTH:
+                problems.append("is very short and will match many lines")
+            wider = next((other for other in lowered if other != lower and other in lower), None)
+            if wider is not None:
+                problems.append(f"never adds a hit, '{wider}' of the same trigger already matches those lines")
+            shadowed_by = next((j for other, j in seen if other in lower), None)
+            if shadowed_by is not None:
+                problems.append(f"can't fire, lines with it already fire '{triggers[shadowed_by].get('name', '')}' first")
+            if only is None or i == only:
+                warnings.extend(f"'{name}': keyword '{keyword}' {problem}" for problem in problems)
+            elif shadowed_by == only:
+                warnings.append(f"'{name}': keyword '{keyword}' {problems[-1]}")  # The edit made this one unfireable
+        seen.extend((lower, i) for lower in lowered)
+    return warnings
+
+def read_log_sample(path, tail=DRY_RUN_TAIL):
+    """The last tail bytes of a log (all of it with tail=0), starting at a whole line."""
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        start = max(0, size - tail) if tail else 0
+        f.seek(start)
+        data = f.read()
+    if start:
+        data = data[data.find(b"\n") + 1:]
+    return data
+
+def dry_run(triggers, data, cooldown=None, max_line=65536):
+    """Run triggers against sample log data as the monitor would, without acting on the hits.
+
+    Returns a dict with the sample's size, line count and logged time span,
+    the matcher's CPU time, and per trigger: hits (lines it matches), fires
+    (lines where it is the first match), the notifications that gives after
+    cooldown coalescing, their rate per logged hour, its CPU cost when
+    matched alone, and warnings.
+    """
+    triggers = [dict(trig) for trig in triggers]
+    cooldown = settings["trigger_cooldown"] if cooldown is None else cooldown
+    matcher = TriggerMatcher(triggers, max_line)
+    index = {id(trig): i for i, trig in enumerate(matcher.triggers)}
+    stats = [{"hits": 0, "fires": 0, "notifications": 0, "taken_by": {}} for _ in triggers]
+    windows = [None] * len(triggers)  # [window end, hits in it] of the last cooldown window per trigger
+
+    started = time.process_time()
+    for _, line, matches in LineStream().match(matcher, data, final=True):
+        first = index[id(matches[0][0])]
+        for trig, _ in matches:
+            entry = stats[index[id(trig)]]
+            entry["hits"] += 1
+            if index[id(trig)] != first:
+                taken_by = entry["taken_by"]
+                taken_by[first] = taken_by.get(first, 0) + 1
+
+        # Notifications as the dispatcher sends them: the first hit, plus one
+        # summary per cooldown window that had repeats (by log time if known)
+        entry = stats[first]
+        entry["fires"] += 1
+        at = log_line_time(line)
+        window = windows[first]
+        trig_cooldown = triggers[first].get("cooldown", cooldown)
+        if window is not None and at is not None and at < window[0]:
+            window[1] += 1
+            if window[1] == 2:
+                entry["notifications"] += 1
+        else:
+            entry["notifications"] += 1
+            windows[first] = [at + trig_cooldown, 1] if at is not None and trig_cooldown > 0 else None
+    match_cpu = time.process_time() - started
+
+    lines = data.count(b"\n") + (not data.endswith(b"\n") and bool(data))
+    span = [log_line_time(line.decode("utf-8", errors="ignore")) for line in sample_edges(data)]
+    hours = (span[1] - span[0]) / 3600 if None not in span else None
+
+    cpu_sample = data[:DRY_RUN_CPU_SAMPLE]
+    cpu_sample = cpu_sample[:cpu_sample.rfind(b"\n") + 1] or cpu_sample
+    warnings = lint_triggers(triggers)
+    report = []
+    for i, (trig, entry) in enumerate(zip(triggers, stats)):
+        alone = TriggerMatcher([trig], max_line)
+        started = time.process_time()
+        for _ in alone.match_lines(cpu_sample):
+            pass
+        cpu = time.process_time() - started
+
+        per_hour = entry["notifications"] / hours if hours and hours * 3600 >= DRY_RUN_MIN_SPAN else None
+        trigger_warnings = [w for w in warnings if w.startswith(f"'{trig['name']}':")]
+        if lines and entry["hits"] / lines > BROAD_LINE_SHARE:
+            trigger_warnings.append(f"'{trig['name']}' matches {entry['hits'] / lines:.1%} of the lines")
+        if per_hour is not None and per_hour > BROAD_PER_HOUR:
+            trigger_warnings.append(f"'{trig['name']}' would notify about {per_hour:.0f} times an hour")
+        if entry["hits"] and not entry["fires"]:
+            winner = max(entry["taken_by"], key=entry["taken_by"].get)
+            trigger_warnings.append(
+                f"'{trig['name']}' never fires, its {entry['hits']} lines all fire '{triggers[winner]['name']}' first"
+            )
+        report.append({
+            "name": trig["name"],
+            "hits": entry["hits"],
+            "fires": entry["fires"],
+            "notifications": entry["notifications"],
+            "per_hour": round(per_hour, 1) if per_hour is not None else None,
+            "cpu_ms_per_mb": round(cpu * 1000 / (len(cpu_sample) / 1048576), 2) if cpu_sample else 0,
+            "warnings": trigger_warnings,
+        })
+    return {
+        "bytes": len(data),
+        "lines": lines,
+        "hours": round(hours, 2) if hours is not None else None,
+        "cpu_ms": round(match_cpu * 1000, 1),
+        "triggers": report,
+    }
+
+def sample_edges(data, probe=65536):
+    """The first and last line of the sample that carry a timestamp (or just its first and last line)."""
+    head = data[:probe].split(b"\n")
+    tail = data[-probe:].split(b"\n")
+    first = next((line for line in head if line.startswith(b"[")), head[0])
+    last = next((line for line in reversed(tail) if line.startswith(b"[")), tail[-1])
+    return first, last
+
+def run_dry_run(argv):
+    """--dry-run [log]: try the triggers on a log and print their hits, rate and cost."""
+    parser = argparse.ArgumentParser(prog="uefn_notifier --dry-run",
+                                     description="Try the triggers on a sample log without acting on hits.")
+    parser.add_argument("--dry-run", nargs="?", const="", metavar="LOG",
+                        help="sample log (default: the newest live editor log)")
+    parser.add_argument("--tail", type=float, default=DRY_RUN_TAIL / 1048576, metavar="MB",
+                        help=f"only try the last MB of the log, 0 for all of it (default: {DRY_RUN_TAIL // 1048576})")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args, _ = parser.parse_known_args(argv)
+
+    path = args.dry_run
+    if not path:
+        logs = find_log_files()
+        if not logs:
+            print(f"No editor log found in {get_log_folder()}, pass one to --dry-run.", file=sys.stderr)
+            return 1
+        path = max(logs, key=os.path.getmtime)
+    try:
+        data = read_log_sample(path, int(args.tail * 1048576))
+    except OSError as e:
+        print(f"Can't read {path}: {e}", file=sys.stderr)
+        return 1
+
+    report = dry_run(settings["triggers"], data, max_line=settings["max_line_length"])
+    if args.json:
+        print(json.dumps(report, indent=4, ensure_ascii=False))
+        return 0
+    print(format_dry_run(report, path))
+    return 1 if any(entry["warnings"] for entry in report["triggers"]) else 0
+
+def format_dry_run(report, path):
+    """The dry_run report as a text table followed by its warnings."""
+    hours = f"{report['hours']:.1f} h logged" if report["hours"] is not None else "no timestamps"
+    lines = [
+        f"{path}: {format_bytes(report['bytes'])}, {report['lines']} lines, {hours}, "
+        f"matched in {report['cpu_ms']:.0f} ms CPU",
+        "",
+        f"{'Trigger':<32} {'Hits':>8} {'Fires':>8} {'Notify':>8} {'/hour':>8} {'ms/MB':>8}",
+    ]
+    for entry in report["triggers"]:
+        per_hour = f"{entry['per_hour']:.1f}" if entry["per_hour"] is not None else "-"
+        lines.append(
+            f"{entry['name'][:32]:<32} {entry['hits']:>8} {entry['fires']:>8} {entry['notifications']:>8} "
+            f"{per_hour:>8} {entry['cpu_ms_per_mb']:>8.2f}"
+        )
+    warnings = [w for entry in report["triggers"] for w in entry["warnings"]]
+    if warnings:
+        lines.append("")
+        lines.extend(f"⚠ {w}" for w in warnings)
+    return "\n".join(lines)
+
+# ---------------- SINGLE INSTANCE ----------------
+class InstanceLock:
+    """Held by the one notifier running for this settings folder.
+
+    A named mutex on Windows, an flock'ed lock file elsewhere. The OS drops
+    it when the process exits, however it exits.
+    """
+
+    def __init__(self, handle):
+        self._handle = handle
+
+    @classmethod
+    def acquire(cls):
+        """Return the lock, or None if another instance holds it."""
+        if sys.platform == "win32":
+            kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+            kernel32.CreateMutexW.restype = ctypes.c_void_p
+            folder = hashlib.sha1(APPDATA_FOLDER.lower().encode("utf-8")).hexdigest()[:16]
+            handle = kernel32.CreateMutexW(None, False, f"Local\\UEFNNotifier-{folder}")
+            if not handle:
+                raise ctypes.WinError(ctypes.get_last_error())
+            if ctypes.get_last_error() == 183:  # ERROR_ALREADY_EXISTS
+                kernel32.CloseHandle(ctypes.c_void_p(handle))
+                return None
+            return cls(handle)
+
+        import fcntl
+
+        f = open(INSTANCE_LOCK_FILE, "a+")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return None
+        return cls(f)
+
+    def release(self):
+        if sys.platform == "win32":
+            ctypes.WinDLL("kernel32").CloseHandle(ctypes.c_void_p(self._handle))
+        else:
+            self._handle.close()
+
+class CommandServer:
+    """Takes commands from later launches over a loopback socket.
+
+    The port and a random token are written to instance.json; a request is
+    one JSON line {"token", "command"} and gets one JSON line back. Each
+    handler runs on the server thread and returns the reply text, so
+    anything slow (like opening a window) should start its own thread.
+    """
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.token = hashlib.sha1(os.urandom(32)).hexdigest()
+        self._socket = socket.socket()
+        self._socket.bind(("127.0.0.1", 0))
+        self._socket.listen()
+        self.port = self._socket.getsockname()[1]
+        atomic_write(INSTANCE_FILE, json.dumps({"pid": os.getpid(), "port": self.port, "token": self.token}))
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return  # Closed
+            with conn:
+                conn.settimeout(2)
+                try:
+                    request = json.loads(conn.makefile("rb").readline())
+                    reply = self._handle(request)
+                except (OSError, ValueError) as e:
+                    reply = {"ok": False, "reply": f"Bad request: {e}"}
+                try:
+                    conn.sendall((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+                except OSError:
+                    pass
+
+    def _handle(self, request):
+        if not isinstance(request, dict) or request.get("token") != self.token:
+            return {"ok": False, "reply": "Bad token"}
+        handler = self.handlers.get(request.get("command"))
+        if handler is None:
+            return {"ok": False, "reply": f"Unknown command, use one of: {', '.join(self.handlers)}"}
+        try:
+            return {"ok": True, "reply": handler() or ""}
+        except Exception as e:
+            return {"ok": False, "reply": f"{request['command']} failed: {e}"}
+
+    def close(self):
+        self._socket.close()
+        try:
+            with open(INSTANCE_FILE, encoding="utf-8") as f:
+                if json.load(f).get("port") == self.port:
+                    os.remove(INSTANCE_FILE)
+        except (OSError, ValueError):
+            pass
+
+def send_command(command, wait=5.0):
+    """Send a command to the running instance. Returns (ok, reply), or None if none answers.
+
+    A just-launched instance may not take commands yet, so keep trying for
+    up to wait seconds.
+    """
+    probe = InstanceLock.acquire()
+    if probe is not None:
+        probe.release()
+        return None  # Nothing is running
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            with open(INSTANCE_FILE, encoding="utf-8") as f:
+                instance = json.load(f)
+            with socket.create_connection(("127.0.0.1", instance["port"]), timeout=5) as conn:
+                request = {"token": instance["token"], "command": command}
+                conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+                reply = json.loads(conn.makefile("rb").readline())
+            return reply["ok"], reply["reply"]
+        except (OSError, ValueError, KeyError, TypeError):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.1)
+
+def run_send(argv):
+    """--send <command>: pass a command to the running instance and print its reply."""
+    parser = argparse.ArgumentParser(prog="uefn_notifier --send", description="Control the running notifier.")
+    parser.add_argument("--send", metavar="COMMAND", required=True,
+                        help="status, show, reload, manage, history or quit")
+    args, _ = parser.parse_known_args(argv)
+
+    result = send_command(args.send)
+    if result is None:
+        print("UEFN Notifier isn't running.", file=sys.stderr)
+        return 1
+    ok, reply = result
+    if reply:
+        print(reply, file=sys.stdout if ok else sys.stderr)
+    return 0 if ok else 1
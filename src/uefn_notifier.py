@@ -1,152 +1,38 @@
 import os
 import sys
 import time
-import winsound
+startup_started = time.perf_counter()  # Before the other imports, for --profile-startup
 import threading
-import json
-import glob
 import subprocess
-from datetime import datetime
-from tkinter import Tk, filedialog, simpledialog, messagebox, ttk
-
-import pystray
-from pystray import MenuItem as item
-from PIL import Image
-
-import pythoncom
-from win32com.shell import shell
-from winotify import Notification, audio
-
-# ---------------- PATHS ----------------
-APPDATA_FOLDER = os.path.join(os.getenv("APPDATA"), "UEFNNotifier")
-os.makedirs(APPDATA_FOLDER, exist_ok=True)
-
-SETTINGS_FILE = os.path.join(APPDATA_FOLDER, "settings.json")
-EVENT_LOG_FILE = os.path.join(APPDATA_FOLDER, "events.txt")
-
-__version__ = "1.4.1"
-
-DEFAULT_SETTINGS = {
-    "log_file": "",
-    "show_notifications": True,
-    "triggers": [
-        {
-            "name": "✅ Session Connected",
-            "keywords": ["EMemorySamplerState::Ready"],
-            "sound_file": "default_success.wav",
-            "notify": True
-        },
-        {
-            "name": "❌ Push Failure",
-            "keywords": [
-                "LogValkyrieRequestManagerEditor: Error"
-            ],
-            "sound_file": "",
-            "notify": True
-        },
-        {
-            "name": "✅ HLOD Generated",
-            "keywords": [
-                "LogEditorBuildUtils: Build time"
-            ],
-            "sound_file": "default_success.wav",
-            "notify": True
-        },
-        {
-            "name": "❌ HLOD Failure",
-            "keywords": [
-                "LogWorldPartitionEditor: Error"
-            ],
-            "sound_file": "",
-            "notify": True
-        }
-    ]
-}
+import queue
+import argparse
+import multiprocessing
+import signal
+
+import notifier_core as core
+from notifier_core import (
+    DEFAULT_SETTINGS, SETTINGS_FILE, ActionBackend, CommandBackend, CommandServer, CommandSoundPlayer,
+    ConsoleBackend, InstanceLock, SoundBackend, action_dispatcher, apply_settings, close_event_sink,
+    describe_trigger, dry_run, duration_history, event_history, find_log_files, flush_settings, format_bytes,
+    format_duration, format_event_time, lint_triggers, load_settings, log_event, mark_startup, metrics, monitor_log,
+    notify, read_log_sample, resource_path, run_dry_run, run_history, run_scan, run_send, scheduler, send_command,
+    sound_cache, start_metrics_server, dump_metrics, stop_monitor, update_settings, update_status,
+    watch_settings_file,
+)
+
+# The GUI (tkinter, pystray, PIL), COM and toast modules are slow to import,
+# so they are imported where they are used, after the monitor has started
+
+__version__ = core.__version__
 
 # Track all open windows
 open_windows = []
 
-stop_thread = False
-status_message = "Initializing..."
-last_trigger_time = "--:--:--"
 icon = None  # Tray icon reference
-
-# ---------------- RESOURCE PATH ----------------
-def resource_path(relative_path: str) -> str:
-    """Get absolute path to resource (works in PyInstaller onefile)."""
-    try:
-        base_path = sys._MEIPASS
-    except AttributeError:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
-
+command_server = None  # Takes commands from later launches, see instance_commands
+icon_image = None  # Decoded tray icon, see get_icon_image
 ICON_PATH = resource_path(os.path.join("assets", "icon.ico"))
 
-# ---------------- SETTINGS ----------------
-def load_settings():
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            print("⚠ Failed to load settings, using defaults.")
-    return DEFAULT_SETTINGS.copy()
-
-def save_settings():
-    try:
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(settings, f, indent=4)
-    except Exception as e:
-        print(f"⚠ Failed to save settings: {e}")
-
-settings = load_settings()
-
-# After loading settings
-if "triggers" not in settings:
-    settings["triggers"] = [
-        {
-            "name": "✅ Session Connected",
-            "keywords": ["EMemorySamplerState::Ready"],
-            "sound_file": "default_success.wav",
-            "notify": True
-        },
-        {
-            "name": "❌ Push Failure",
-            "keywords": [
-                "LogValkyrieRequestManagerEditor: Error"
-            ],
-            "sound_file": "",
-            "notify": True
-        },
-        {
-            "name": "✅ HLOD Generated",
-            "keywords": [
-                "LogEditorBuildUtils: Build time"
-            ],
-            "sound_file": "default_success.wav",
-            "notify": True
-        },
-        {
-            "name": "❌ HLOD Failure",
-            "keywords": [
-                "LogWorldPartitionEditor: Error"
-            ],
-            "sound_file": "",
-            "notify": True
-        }
-    ]
-    save_settings()
-
-# ---------------- EVENT LOGGING ----------------
-def log_event(event_type, message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    entry = f"[{timestamp}] {event_type} - {message}\n"
-    try:
-        with open(EVENT_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(entry)
-    except Exception as e:
-        print(f"⚠ Failed to write event log: {e}")
-
 # ---------------- STARTUP TOGGLE ----------------
 def get_startup_shortcut_path():
     startup_folder = os.path.join(
@@ -155,10 +41,17 @@ def get_startup_shortcut_path():
     )
     return os.path.join(startup_folder, "UEFNNotifier.lnk")
 
+startup_enabled = None  # Cached by is_startup_enabled, reset by toggle_startup
+
 def is_startup_enabled():
-    return os.path.exists(get_startup_shortcut_path())
+    # Asked on every menu rebuild, so the shortcut is only looked for once
+    global startup_enabled
+    if startup_enabled is None:
+        startup_enabled = os.path.exists(get_startup_shortcut_path())
+    return startup_enabled
 
 def toggle_startup(icon_obj, item):
+    global startup_enabled
     shortcut_path = get_startup_shortcut_path()
     if is_startup_enabled():
         try:
@@ -169,9 +62,13 @@ def toggle_startup(icon_obj, item):
     else:
         create_startup_shortcut(shortcut_path)
         print("Startup enabled.")
+    startup_enabled = None
     icon_obj.update_menu()
 
 def create_startup_shortcut(shortcut_path):
+    import pythoncom
+    from win32com.shell import shell
+
     pythoncom.CoInitialize()
     shell_link = pythoncom.CoCreateInstance(
         shell.CLSID_ShellLink, None,
@@ -185,60 +82,96 @@ def create_startup_shortcut(shortcut_path):
     persist_file = shell_link.QueryInterface(pythoncom.IID_IPersistFile)
     persist_file.Save(shortcut_path, 0)
 
-# ---------------- LOG DETECTION ----------------
-def find_log_file():
-    base_path = os.path.expandvars(
-        r"C:\Users\%USERNAME%\AppData\Local\UnrealEditorFortnite\Saved\Logs"
-    )
-    if not os.path.exists(base_path):
-        return ""
-    logs = glob.glob(os.path.join(base_path, "UnrealEditorFortnite*.log"))
-    return max(logs, key=os.path.getmtime) if logs else ""
-
-# ---------------- SOUND + NOTIFY ----------------
-def play_sound(file_path):
-    """Play a sound from either absolute path or assets folder."""
-    if not file_path:
-        winsound.PlaySound("SystemAsterisk", winsound.SND_ALIAS | winsound.SND_ASYNC)
-        return
+# ---------------- WINDOWS BACKENDS ----------------
+class WinsoundPlayer:
+    """Playback backend using winsound.
+
+    winsound can't play from memory asynchronously, so in-memory sounds are
+    played synchronously on a dedicated thread.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def play_default(self):
+        import winsound
 
-    # Absolute or asset path
-    path = file_path if os.path.isabs(file_path) else resource_path(os.path.join("assets", file_path))
-    if os.path.exists(path):
-        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
-    else:
         winsound.PlaySound("SystemAsterisk", winsound.SND_ALIAS | winsound.SND_ASYNC)
 
-def notify(title, message):
-    log_event("NOTIFY", title)
-    try:
-        toast = Notification(
-            app_id="UEFN Notifier",
-            title=title,
-            msg=message,
-            icon=ICON_PATH
-        )
-        toast.set_audio(audio.Default, loop=False)
-        toast.show()
-    except:
-        pass
+    def play_bytes(self, data):
+        self._queue.put(data)
+
+    def _run(self):
+        import winsound
+
+        while True:
+            data = self._queue.get()
+            # A newer sound replaces one that hasn't started yet, like SND_ASYNC did
+            while not self._queue.empty():
+                data = self._queue.get_nowait()
+            try:
+                winsound.PlaySound(data, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+            except Exception as e:
+                print(f"⚠ Failed to play sound: {e}")
+
+class ToastBackend(ActionBackend):
+    """Windows toast notifications."""
+
+    def notify(self, title, message):
+        try:
+            from winotify import Notification, audio
+
+            toast = Notification(
+                app_id="UEFN Notifier",
+                title=title,
+                msg=message,
+                icon=ICON_PATH
+            )
+            toast.set_audio(audio.Default, loop=False)
+            toast.show()
+        except:
+            pass
+
+class TrayBackend(ActionBackend):
+    """Keeps the tray menu's status, metrics and durations current."""
+
+    def status(self, message):
+        if icon:
+            icon.update_menu()
+
+def install_backends(headless=False, sound=True):
+    """Set up core.action_backends for the tray app or a headless run."""
+    backends = []
+    if sound:
+        player = WinsoundPlayer() if sys.platform == "win32" else CommandSoundPlayer.find()
+        if player:
+            backends.append(SoundBackend(player))
+        else:
+            print(f"⚠ No sound player found, install one of: {', '.join(CommandSoundPlayer.COMMANDS)}")
+    backends.append(ConsoleBackend() if headless else ToastBackend())
+    if not headless:
+        backends.append(TrayBackend())
+    if core.settings["action_command"]:
+        backends.append(CommandBackend(core.settings["action_command"]))
+    core.action_backends[:] = backends
 
 # ---------------- RESET ----------------
 def reset_settings(icon_obj=None, item=None):
-    global settings
-    settings = DEFAULT_SETTINGS.copy()
-    save_settings()
+    apply_settings(DEFAULT_SETTINGS)
     update_status("Settings reset.")
     if icon_obj: icon_obj.update_menu()
     notify("UEFN Notifier", "Settings have been reset to default.")
 
 # ---------------- TRIGGER MANAGEMENT ----------------
 def manage_triggers_gui():
+    from tkinter import Tk, Toplevel, filedialog, simpledialog, messagebox, ttk
+
     def refresh_tree():
         for row in tree.get_children():
             tree.delete(row)
-        for i, trig in enumerate(settings.get("triggers", [])):
-            keywords = ", ".join(trig.get("keywords", []))
+        for i, trig in enumerate(core.settings.get("triggers", [])):
+            keywords = describe_trigger(trig)
             sound_file = trig.get("sound_file", "")
             sound_name = os.path.basename(sound_file) if sound_file else "Default"
             notify_status = "✓" if trig.get("notify", True) else "✗"
@@ -261,8 +194,11 @@ def manage_triggers_gui():
             "sound_file": sound_file,
             "notify": True
         }
-        settings.setdefault("triggers", []).append(new_trigger)
-        save_settings()
+        data = core.settings.to_dict()
+        data["triggers"].append(new_trigger)
+        if not confirm_keywords(data["triggers"], len(data["triggers"]) - 1):
+            return
+        apply_settings(data)
         refresh_tree()
         update_status(f"Trigger '{name}' added.")
 
@@ -272,7 +208,8 @@ def manage_triggers_gui():
             messagebox.showinfo("Edit Trigger", "Please select a trigger to edit.")
             return
         idx = tree.index(selected[0])
-        trig = settings["triggers"][idx]
+        data = core.settings.to_dict()
+        trig = data["triggers"][idx]
 
         new_name = simpledialog.askstring("Edit Name", "Enter new trigger name:", initialvalue=trig.get("name", ""))
         if not new_name:
@@ -288,24 +225,98 @@ def manage_triggers_gui():
 
         trig["name"] = new_name
         trig["keywords"] = [k.strip() for k in new_keywords.split(",")]
-        save_settings()
+        if not confirm_keywords(data["triggers"], idx):
+            return
+        apply_settings(data)
         refresh_tree()
         update_status(f"Trigger '{new_name}' updated.")
 
+    def confirm_keywords(triggers, idx):
+        """Ask before saving keywords that lint_triggers warns about."""
+        warnings = lint_triggers(triggers, only=idx)
+        if not warnings:
+            return True
+        return messagebox.askyesno(
+            "Check Keywords", "\n\n".join(warnings) + "\n\nSave anyway?", icon="warning", parent=window
+        )
+
+    def dry_run_triggers():
+        """Try the triggers on a log picked by the user and show their hits, rate and cost."""
+        logs = find_log_files()
+        sample = filedialog.askopenfilename(
+            title="Select a Log to Try the Triggers On", parent=window,
+            initialdir=os.path.dirname(max(logs, key=os.path.getmtime)) if logs else None,
+            filetypes=[("Log files", "*.log"), ("All files", "*.*")],
+        )
+        if not sample:
+            return
+        btn_dry_run.state(["disabled"])
+        result = {}
+
+        def run():
+            try:
+                data = read_log_sample(sample)
+                result["report"] = dry_run(core.settings["triggers"], data, max_line=core.settings["max_line_length"])
+            except OSError as e:
+                result["error"] = e
+
+        def wait():
+            if worker.is_alive():
+                window.after(100, wait)
+                return
+            btn_dry_run.state(["!disabled"])
+            if "error" in result:
+                messagebox.showerror("Dry Run", f"Can't read {sample}: {result['error']}", parent=window)
+            else:
+                show_dry_run(result["report"], sample)
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        wait()
+
+    def show_dry_run(report, sample):
+        results = Toplevel(window)
+        results.title(f"Dry Run - {os.path.basename(sample)}")
+        results.geometry("700x400")
+        hours = f"{report['hours']:.1f} h logged" if report["hours"] is not None else "no timestamps"
+        ttk.Label(
+            results, text=f"{format_bytes(report['bytes'])}, {report['lines']} lines, {hours}, "
+                          f"matched in {report['cpu_ms']:.0f} ms CPU"
+        ).pack(anchor="w", padx=10, pady=(10, 0))
+
+        table = ttk.Treeview(results, columns=("Name", "Hits", "Fires", "Notify", "Hour", "Cost"), show="headings",
+                             height=len(report["triggers"]))
+        for column, text, width in (("Name", "Trigger", 200), ("Hits", "Hits", 70), ("Fires", "Fires", 70),
+                                    ("Notify", "Notifications", 90), ("Hour", "Per Hour", 70),
+                                    ("Cost", "CPU ms/MB", 80)):
+            table.heading(column, text=text)
+            table.column(column, width=width, anchor="w" if column == "Name" else "e")
+        for entry in report["triggers"]:
+            per_hour = f"{entry['per_hour']:.1f}" if entry["per_hour"] is not None else "-"
+            table.insert("", "end", values=(entry["name"], entry["hits"], entry["fires"], entry["notifications"],
+                                             per_hour, f"{entry['cpu_ms_per_mb']:.2f}"))
+        table.pack(fill="x", padx=10, pady=10)
+
+        warnings = [w for entry in report["triggers"] for w in entry["warnings"]]
+        text = "\n".join(f"⚠ {w}" for w in warnings) or "✓ No warnings"
+        ttk.Label(results, text=text, wraplength=660, justify="left").pack(anchor="w", padx=10)
+        ttk.Button(results, text="Close", command=results.destroy).pack(side="bottom", anchor="e", padx=10, pady=10)
+
     def change_sound():
         selected = tree.selection()
         if not selected:
             messagebox.showinfo("Change Sound", "Please select a trigger to change sound.")
             return
         idx = tree.index(selected[0])
-        trig = settings["triggers"][idx]
+        data = core.settings.to_dict()
+        trig = data["triggers"][idx]
 
         sound_file = filedialog.askopenfilename(title="Select New Sound File", filetypes=[("WAV files", "*.wav")])
         if not sound_file:
             return
 
         trig["sound_file"] = sound_file
-        save_settings()
+        apply_settings(data)
         refresh_tree()
         update_status(f"Sound changed for trigger '{trig.get('name', '')}'.")
 
@@ -315,9 +326,10 @@ def manage_triggers_gui():
             messagebox.showwarning("No selection", "Please select a trigger to toggle notification.")
             return
         idx = int(selected[0])
-        trig = settings["triggers"][idx]
+        data = core.settings.to_dict()
+        trig = data["triggers"][idx]
         trig["notify"] = not trig.get("notify", True)
-        save_settings()
+        apply_settings(data)
         refresh_tree()
         update_status(f"Notification toggled for '{trig['name']}'")
 
@@ -327,19 +339,20 @@ def manage_triggers_gui():
             messagebox.showinfo("Delete Trigger", "Please select a trigger to delete.")
             return
         idx = tree.index(selected[0])
-        trig = settings["triggers"][idx]
+        trig = core.settings["triggers"][idx]
 
         confirm = messagebox.askyesno("Delete Trigger", f"Are you sure you want to delete trigger '{trig.get('name', '')}'?")
         if confirm:
-            del settings["triggers"][idx]
-            save_settings()
+            data = core.settings.to_dict()
+            del data["triggers"][idx]
+            apply_settings(data)
             refresh_tree()
             update_status(f"Trigger '{trig.get('name', '')}' deleted.")
 
     window = Tk()
     open_windows.append(window)
     window.title("Manage Triggers")
-    window.geometry("600x400")
+    window.geometry("700x400")
     #window.resizable(False, False)
 
     tree = ttk.Treeview(window, columns=("Name", "Keywords", "Sound", "Notify"), show="headings")
@@ -371,104 +384,108 @@ def manage_triggers_gui():
     btn_delete = ttk.Button(btn_frame, text="Delete Trigger", command=delete_trigger)
     btn_delete.pack(side="left", padx=5)
 
+    btn_dry_run = ttk.Button(btn_frame, text="Dry Run", command=dry_run_triggers)
+    btn_dry_run.pack(side="left", padx=5)
+
     btn_close = ttk.Button(btn_frame, text="Close", command=window.destroy)
     btn_close.pack(side="right", padx=5)
 
     refresh_tree()
     window.mainloop()
 
-# ---------------- STATUS ----------------
-def update_status(msg=None):
-    global status_message, icon
-    if msg: status_message = msg
-    if icon: icon.update_menu()
-
-# ---------------- LOG MONITOR ----------------
-def monitor_log():
-    """Continuously monitor the log file for trigger keywords."""
-    global stop_thread, last_trigger_time
-
-    last_inode = None
-    f = None
-    status_reset_timer = None
-
-    def reset_status():
-        """Reset the tray icon status after a trigger."""
-        if not stop_thread:
-            update_status("Monitoring Log")
-
-    while not stop_thread:
-        log_file = settings.get("log_file", "")
-        
-        # Auto-detect log file if missing
-        if not log_file or not os.path.exists(log_file):
-            auto_log = find_log_file()
-            if auto_log:
-                settings["log_file"] = auto_log
-                save_settings()
-                update_status("Monitoring log")
-            else:
-                update_status("Waiting for log...")
-            time.sleep(2)
-            continue
+# ---------------- HISTORY ----------------
+HISTORY_RANGES = {"Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400, "Last 30 days": 30 * 86400,
+                  "All time": None}
+HISTORY_PAGE = 200  # Events loaded at a time
+
+def history_gui():
+    """Browse the event history by trigger, log file and time range, a page at a time."""
+    from tkinter import Tk, StringVar, ttk
+
+    ALL = "All"
+    event_history.flush()
+    totals = event_history.totals()
+    last_event = None  # Last event shown, where "Load More" continues
+
+    def filters():
+        seconds = HISTORY_RANGES[range_var.get()]
+        return (
+            None if type_var.get() == ALL else type_var.get(),
+            None if source_var.get() == ALL else source_var.get(),
+            time.time() - seconds if seconds else None,
+        )
 
-        try:
-            # Detect if log file rotated / replaced
-            current_inode = os.stat(log_file).st_ino
-            if current_inode != last_inode:
-                last_inode = current_inode
-                if f:
-                    f.close()
-                f = open(log_file, 'r', encoding='utf-8', errors='ignore')
-                f.seek(0, 2)  # Move to end
-                update_status("Monitoring Log")
-        except Exception as e:
-            update_status(f"Error opening log: {e}")
-            time.sleep(2)
-            continue
-
-        line = f.readline()
-        if not line:
-            time.sleep(0.5)
-            continue
-
-        # Check triggers
-        line_lower = line.lower()
-        triggered = False
-        for trigger in settings.get("triggers", []):
-            for keyword in trigger.get("keywords", []):
-                if keyword.lower() in line_lower:
-                    last_trigger_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    log_event(trigger["name"].upper(), f"Triggered by: {keyword}")
-
-                    # Play sound
-                    play_sound(trigger.get("sound_file", ""))
-
-                    # Show notification if allowed
-                    if settings.get("show_notifications", False) and trigger.get("notify", True):
-                        notify(trigger["name"], f"{keyword}")
-
-                    # Update tray status
-                    update_status(f"Triggered: {trigger['name']}")
-                    triggered = True
-
-                    # Reset status after 5 seconds
-                    if status_reset_timer:
-                        status_reset_timer.cancel()
-                    status_reset_timer = threading.Timer(5, reset_status)
-                    status_reset_timer.start()
-                    break  # Stop checking this line
-            if triggered:
-                break
-
-    # Clean up on exit
-    if f:
-        f.close()
+    def load(more=False):
+        nonlocal last_event
+        event_type, source, since = filters()
+        if not more:
+            events.delete(*events.get_children())
+            last_event = None
+        page = event_history.query(event_type, source, since, limit=HISTORY_PAGE, before=last_event)
+        for event in page:
+            events.insert("", "end", values=(format_event_time(event.time), event.type, event.message, event.source))
+        if page:
+            last_event = page[-1]
+        btn_more.state(["!disabled"] if len(page) == HISTORY_PAGE else ["disabled"])
+        shown.set(f"{len(events.get_children())} events shown")
+
+        days.delete(*days.get_children())
+        for day, day_type, count in event_history.daily_counts(event_type, source, since):
+            days.insert("", "end", values=(day, day_type, count))
+
+    window = Tk()
+    open_windows.append(window)
+    window.title("History")
+    window.geometry("800x450")
+
+    filter_frame = ttk.Frame(window)
+    filter_frame.pack(fill="x", padx=10, pady=(10, 0))
+    type_var, source_var, range_var = StringVar(window, ALL), StringVar(window, ALL), StringVar(window, "Last 7 days")
+    type_counts = {}
+    for event_type, _, count, _ in totals:
+        type_counts[event_type] = type_counts.get(event_type, 0) + count
+    sources = sorted({source for _, source, _, _ in totals if source})
+    for label, var, choices, width in (
+        ("Trigger", type_var, [ALL] + list(type_counts), 28),
+        ("Log", source_var, [ALL] + sources, 28),
+        ("Time", range_var, list(HISTORY_RANGES), 14),
+    ):
+        ttk.Label(filter_frame, text=label).pack(side="left", padx=(0, 5))
+        box = ttk.Combobox(filter_frame, textvariable=var, values=choices, state="readonly", width=width)
+        box.pack(side="left", padx=(0, 10))
+        box.bind("<<ComboboxSelected>>", lambda _: load())
+
+    tabs = ttk.Notebook(window)
+    tabs.pack(fill="both", expand=True, padx=10, pady=10)
+
+    events = ttk.Treeview(tabs, columns=("Time", "Event", "Message", "Log"), show="headings")
+    for column, width in (("Time", 130), ("Event", 160), ("Message", 330), ("Log", 150)):
+        events.heading(column, text=column)
+        events.column(column, width=width)
+    tabs.add(events, text="Events")
+
+    days = ttk.Treeview(tabs, columns=("Day", "Event", "Count"), show="headings")
+    for column, width in (("Day", 100), ("Event", 250), ("Count", 80)):
+        days.heading(column, text=column)
+        days.column(column, width=width)
+    tabs.add(days, text="Per Day")
+
+    btn_frame = ttk.Frame(window)
+    btn_frame.pack(fill="x", padx=10, pady=(0, 10))
+    shown = StringVar(window)
+    ttk.Label(btn_frame, textvariable=shown).pack(side="left", padx=5)
+    btn_more = ttk.Button(btn_frame, text="Load More", command=lambda: load(more=True))
+    btn_more.pack(side="left", padx=5)
+    ttk.Button(btn_frame, text="Refresh", command=lambda: (event_history.flush(), load())).pack(side="left", padx=5)
+    ttk.Button(btn_frame, text="Close", command=window.destroy).pack(side="right", padx=5)
+
+    load()
+    window.mainloop()
 
 # ---------------- TRAY ICON ----------------
 def on_exit(icon_obj, item):
-    global stop_thread, thread
-    stop_thread = True
+    stop_monitor()
+    flush_settings()
 
     # Close all Tk windows to prevent hanging
     for w in open_windows:
@@ -479,9 +496,16 @@ def on_exit(icon_obj, item):
 
     if thread.is_alive():
         thread.join(timeout=5)
+    if command_server:
+        command_server.close()
+    action_dispatcher.close()
+    close_event_sink()
+    event_history.close()
     icon_obj.stop()
 
 def select_file(title="Select File", filetypes=(("All files", "*.*"),), initialdir=""):
+    from tkinter import Tk, filedialog
+
     root = Tk()
     open_windows.append(root)
     root.withdraw()
@@ -490,19 +514,10 @@ def select_file(title="Select File", filetypes=(("All files", "*.*"),), initiald
     return file_path
 
 def toggle_notifications(icon_obj, item):
-    settings["show_notifications"] = not settings.get("show_notifications", False)
+    update_settings(show_notifications=not core.settings["show_notifications"])
     notify("✅Notifications Enabled", "This is what they look like")
-    save_settings()
     icon_obj.update_menu()
 
-def open_event_log(icon_obj, item):
-    log_path = EVENT_LOG_FILE
-    if os.path.exists(log_path):
-        subprocess.Popen(['notepad.exe', log_path])
-    else:
-        notify("Log file not created", "Nothing has happened yet, so the log file hasn't been created.")
-        update_status("No event log found.")
-
 def open_settings_file(icon, item):
     if os.path.exists(SETTINGS_FILE):
         subprocess.Popen(['notepad.exe', SETTINGS_FILE])
@@ -512,11 +527,49 @@ def open_settings_file(icon, item):
             f.write('{}')
         subprocess.Popen(['notepad.exe', SETTINGS_FILE])
 
+def get_icon_image():
+    """The tray icon, decoded once and kept for every later use."""
+    global icon_image
+    if icon_image is None:
+        from PIL import Image
+
+        image = Image.open(ICON_PATH)
+        image.load()
+        icon_image = image
+    return icon_image
+
 def create_icon():
-    status_label = lambda _: f"Status: {status_message}"
-    last_label = lambda _: f"Last Trigger: {last_trigger_time}"
+    import pystray
+    from pystray import MenuItem as item
+
+    status_label = lambda _: f"Status: {core.status_message}"
+    last_label = lambda _: f"Last Trigger: {core.last_trigger_time}"
     startup_label = lambda _: f"Open On Startup: {'✓' if is_startup_enabled() else '✗'}"
-    notify_label = lambda _: f"Show Notifications: {'✓' if settings.get('show_notifications', False) else '✗'}"
+    notify_label = lambda _: f"Show Notifications: {'✓' if core.settings.get('show_notifications', False) else '✗'}"
+
+    def timing_label(name, title):
+        return lambda _: f"{title}: {metrics.timings[name].summary()['p95_ms']} ms (p95)"
+
+    metrics_menu = pystray.Menu(
+        item(lambda _: f"Lines/s: {metrics.rates['lines_per_s']:.0f}", None, enabled=False),
+        item(lambda _: f"Read: {format_bytes(metrics.rates['bytes_per_s'])}/s", None, enabled=False),
+        item(lambda _: f"Reader Lag: {format_bytes(metrics.reader_lag)}", None, enabled=False),
+        item(lambda _: f"Matches: {sum(metrics.matches.values())}", None, enabled=False),
+        item(timing_label("trigger_latency", "Trigger Latency"), None, enabled=False),
+        item(timing_label("log_event", "Event Log"), None, enabled=False),
+        item(timing_label("play_sound", "Sound"), None, enabled=False),
+        item(timing_label("notify", "Toast"), None, enabled=False)
+    )
+
+    def duration_items():
+        items = []
+        for name, project in duration_history.keys():
+            stats = duration_history.stats(name, project)
+            if stats:
+                runs, p50, p95 = stats
+                label = f"{name} ({project}): p50 {format_duration(p50)}, p95 {format_duration(p95)}, {runs} runs"
+                items.append(item(label, None, enabled=False))
+        return items or [item("No timed runs yet", None, enabled=False)]
 
     settings_menu = pystray.Menu(
         item("Manage Triggers", lambda icon, item: manage_triggers_gui()),
@@ -528,36 +581,184 @@ def create_icon():
 
     return pystray.Icon(
         "UEFN Notifier",
-        Image.open(ICON_PATH),
+        get_icon_image(),
         "UEFN Notifier",
         menu=pystray.Menu(
             item(status_label, None, enabled=False),
             item(last_label, None, enabled=False),
             item("Settings", settings_menu),
-            item("Open Event Log", open_event_log),
+            item("Metrics", metrics_menu),
+            item("Durations", pystray.Menu(duration_items)),
+            item("History", lambda icon, item: history_gui()),
             item('Exit', on_exit)
         )
     )
 
-# ---------------- MAIN ----------------
-if __name__ == "__main__":
-    launched_from_startup = "--startup" in sys.argv
+# ---------------- SINGLE INSTANCE ----------------
+def instance_commands(headless=False):
+    """What a later launch can ask the running instance to do (uefn_notifier --send <command>)."""
 
-    if not launched_from_startup:
-        notify("👋", "Program started and monitoring logs.")
-    log_event("LAUNCHED", "UEFN Notifier Opened")
+    def status():
+        return f"{core.status_message} (last trigger: {core.last_trigger_time})"
+
+    def show():
+        notify("UEFN Notifier is already running", status())
+        return status()
+
+    def reload():
+        if core.reload_settings_if_changed(force=True):
+            return "Settings reloaded."
+        return "Settings file is missing or invalid, kept the current settings."
+
+    def in_thread(fn, reply):
+        # Windows and shutdown must not hold up the reply
+        def command():
+            threading.Thread(target=fn, daemon=True).start()
+            return reply
+        return command
+
+    commands = {"status": status, "show": show, "reload": reload}
+    if headless:
+        commands["quit"] = in_thread(stop_monitor, "Exiting.")
+    else:
+        commands["manage"] = in_thread(manage_triggers_gui, "Opening the trigger manager.")
+        commands["history"] = in_thread(history_gui, "Opening the history.")
+        commands["quit"] = in_thread(lambda: on_exit(icon, None), "Exiting.")
+    return commands
+
+def forward_launch(launched_from_startup):
+    """Another instance is running: show it instead of starting a second monitor."""
+    if launched_from_startup:
+        return 0  # Started by hand before the login shortcut got to it
+    if send_command("show") is None:
+        print("⚠ UEFN Notifier is already running, but doesn't answer.", file=sys.stderr)
+        return 1
+    return 0
+
+# ---------------- HEADLESS ----------------
+def run_headless(argv):
+    """--headless: monitor without tray or Tk, reporting to the console and/or a command."""
+    parser = argparse.ArgumentParser(prog="uefn_notifier --headless", description="Monitor the editor logs without a GUI.")
+    parser.add_argument("--headless", action="store_true", required=True)
+    parser.add_argument("--log-folder", metavar="PATH", help="editor log folder (default: the log_folder setting)")
+    parser.add_argument("--command", metavar="CMD", help="run CMD for every notification (default: the action_command setting)")
+    parser.add_argument("--no-sound", action="store_true", help="don't play trigger sounds")
+    args, _ = parser.parse_known_args(argv)
+
+    instance_lock = InstanceLock.acquire()
+    if instance_lock is None:
+        result = send_command("status")
+        print("⚠ UEFN Notifier is already running" + (f": {result[1]}" if result else "."), file=sys.stderr)
+        return 1
+    command_server = CommandServer(instance_commands(headless=True))
+
+    changes = {}
+    if args.log_folder:
+        changes["log_folder"] = os.path.abspath(args.log_folder)
+    if args.command is not None:
+        changes["action_command"] = args.command
+    if changes:
+        # Only for this run; the settings file keeps its values
+        apply_settings(dict(core.settings.to_dict(), **changes), save=False)
+    install_backends(headless=True, sound=not args.no_sound)
+
+    # Stop cleanly when a service manager asks
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_monitor())
 
-    if not settings["log_file"] or not os.path.exists(settings["log_file"]):
-        auto_log = find_log_file()
-        if auto_log:
-            settings["log_file"] = auto_log
-            save_settings()
-            status_message = "Monitoring: " + os.path.basename(auto_log)
+    thread = threading.Thread(target=monitor_log)
+    thread.start()
+    log_event("LAUNCHED", "UEFN Notifier Opened (headless)")
+    threading.Thread(target=watch_settings_file, daemon=True).start()
+    scheduler.call_later(1, deferred_startup)
+    try:
+        if sys.platform == "win32":
+            while thread.is_alive():
+                thread.join(0.5)  # A plain join() can't be interrupted by Ctrl+C on Windows
         else:
-            status_message = "Waiting for log..."
+            thread.join()
+    except KeyboardInterrupt:
+        pass
+    stop_monitor()
+    thread.join(5)
+    command_server.close()
+    flush_settings()
+    action_dispatcher.close()
+    close_event_sink()
+    event_history.close()
+    return 0
+
+# ---------------- STARTUP ----------------
+def deferred_startup():
+    """Work that can wait until the monitor and tray are up."""
+    if any(isinstance(backend, SoundBackend) for backend in core.action_backends):
+        sound_cache.sync(core.settings)  # Preload, so the first trigger doesn't wait for the disk
+    scheduler.call_later(core.settings["metrics_interval"], dump_metrics)
+    if core.settings["metrics_port"]:
+        start_metrics_server(core.settings["metrics_port"])
+    if any(isinstance(backend, ToastBackend) for backend in core.action_backends):
+        import winotify  # noqa: F401 - so the first toast doesn't pay for the import
+
+def startup_profile():
+    """Time from launch to each startup step, as printed by --profile-startup."""
+    lines = []
+    previous = startup_started
+    for step, at in sorted(core.startup_marks, key=lambda mark: mark[1]):
+        lines.append(f"{step:<20} {(at - startup_started) * 1000:8.1f} ms  (+{(at - previous) * 1000:.1f} ms)")
+        previous = at
+    return "\n".join(lines)
+
+def tray_ready(icon_obj, profile=False):
+    """Called by pystray once the tray icon's loop runs."""
+    icon_obj.visible = True
+    mark_startup("tray visible")
+    log_event("STARTUP", f"Tray ready {(time.perf_counter() - startup_started) * 1000:.0f} ms after launch")
+    if profile:
+        # Include the monitor's first pass over the log folders
+        deadline = time.monotonic() + 5
+        while not any(step == "logs opened" for step, _ in core.startup_marks) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        print(startup_profile())
+        on_exit(icon_obj, None)
 
+# ---------------- MAIN ----------------
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Scan workers in the PyInstaller build
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(errors="replace")  # Trigger names and warnings contain emoji
+    mark_startup("imports")
+    load_settings()
+    mark_startup("settings loaded")
+
+    if "--scan" in sys.argv:
+        sys.exit(run_scan(sys.argv[1:]))
+    if "--history" in sys.argv:
+        sys.exit(run_history(sys.argv[1:]))
+    if "--dry-run" in sys.argv:
+        sys.exit(run_dry_run(sys.argv[1:]))
+    if "--send" in sys.argv:
+        sys.exit(run_send(sys.argv[1:]))
+    if "--headless" in sys.argv:
+        sys.exit(run_headless(sys.argv[1:]))
+
+    launched_from_startup = "--startup" in sys.argv
+    profile = "--profile-startup" in sys.argv
+    instance_lock = InstanceLock.acquire()  # Held until we exit
+    if instance_lock is None:
+        sys.exit(forward_launch(launched_from_startup))
+    install_backends()
+
+    # Start monitoring first; the toast, tray and caches can follow
     thread = threading.Thread(target=monitor_log)
     thread.start()
+    mark_startup("monitor started")
+    command_server = CommandServer(instance_commands())
+    log_event("LAUNCHED", "UEFN Notifier Opened")
+    if not launched_from_startup and not profile:
+        scheduler.call_later(0, notify, "👋", "Program started and monitoring logs.")
+    threading.Thread(target=watch_settings_file, daemon=True).start()
+    # At login the whole machine is busy, so wait a bit longer there
+    scheduler.call_later(10 if launched_from_startup else 1, deferred_startup)
 
     icon = create_icon()
-    icon.run()
+    mark_startup("tray created")
+    icon.run(setup=lambda icon_obj: tray_ready(icon_obj, profile))
@@ -0,0 +1,33 @@
+"""Runs the tests against src/notifier_core.py with AppData in a throwaway folder.
+
+benchmarks/ is importable too, for its stand-in endpoints (sinkserver.py).
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="uefn-tests-")  # Before notifier_core creates its folder
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "benchmarks")]
+
+import pytest  # noqa: E402
+
+import notifier_core as core  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def default_settings():
+    """Every test starts from the default settings, without touching settings.json."""
+    core.apply_settings(core.DEFAULT_SETTINGS, save=False)
+    yield
+    core.apply_settings(core.DEFAULT_SETTINGS, save=False)
+
+@pytest.fixture
+def wait_for():
+    """Poll condition() until it's true, failing after timeout seconds."""
+    def wait_for(condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "timed out"
+            time.sleep(0.01)
+    return wait_for
@@ -0,0 +1,51 @@
+import os
+import threading
+import time
+
+import notifier_core as core
+
+LINE = b"[2025.01.15-12.00.00:000][  0]LogEditorBuildUtils: Build time %d\n"
+
+class Recorder:
+    def __init__(self):
+        self.hits = []
+        self.backlogs = []
+
+    def submit(self, trigger, keyword, source="", read_at=None):
+        self.hits.append(trigger["name"])
+
+    def submit_backlog(self, entries, source):
+        self.backlogs.append([(trigger["name"], hits) for trigger, _, hits in entries])
+
+def test_lines_written_while_catching_up_fire_live(tmp_path, monkeypatch, wait_for):
+    log_path = str(tmp_path / "UnrealEditorFortnite.log")
+    with open(log_path, "wb") as f:
+        f.write(LINE % 0 + LINE % 1 + LINE % 2)
+    core.save_checkpoints({core.checkpoint_key(log_path): {
+        "identity": list(core.file_identity(os.stat(log_path))), "offset": len(LINE % 0), "time": time.time(),
+    }})
+
+    resume = core.LogTailer.resume
+    def resume_then_write(tailer, checkpoint, window):
+        result = resume(tailer, checkpoint, window)
+        with open(log_path, "ab") as f:  # The editor keeps writing; read in the same block as the backlog
+            f.write(LINE % 3)
+        return result
+
+    recorder = Recorder()
+    monkeypatch.setattr(core.LogTailer, "resume", resume_then_write)
+    monkeypatch.setattr(core, "action_dispatcher", recorder)
+    monkeypatch.setattr(core, "stop_thread", False)
+    monkeypatch.setattr(core, "status_message", "")
+    core.apply_settings(dict(core.DEFAULT_SETTINGS, log_folder=str(tmp_path), idle_mode="off"), save=False)
+
+    thread = threading.Thread(target=core.monitor_log, daemon=True)
+    thread.start()
+    try:
+        wait_for(lambda: recorder.backlogs and recorder.hits)
+        assert recorder.backlogs == [[("✅ HLOD Generated", 2)]]
+        assert recorder.hits == ["✅ HLOD Generated"]
+        assert core.status_message == "Monitoring Log"
+    finally:
+        core.stop_monitor()
+        thread.join(5)
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+import notifier_core as core
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    fired = []
+    monkeypatch.setattr(core, "run_trigger_actions",
+                        lambda trigger, keyword, hits=1, play=True, source="", read_at=None:
+                        fired.append((hits, play, source)))
+    monkeypatch.setattr(core, "action_backends", [])
+    dispatcher = core.ActionDispatcher()
+    yield dispatcher, fired
+    dispatcher.close()
+
+def test_cooldown_coalesces_a_burst(dispatched, wait_for):
+    dispatcher, fired = dispatched
+    trigger = {"name": "❌ Push Failure", "keywords": ["failed"], "cooldown": 0.2}
+    for _ in range(37):
+        dispatcher.submit(trigger, "failed", "a.log")
+    dispatcher.submit(trigger, "failed", "b.log")  # Each log cools down on its own
+    wait_for(lambda: len(fired) == 3)
+    # The rest of the burst is one summary when the cooldown ends, without a sound
+    assert fired == [(1, True, "a.log"), (1, True, "b.log"), (36, False, "a.log")]
+
+    wait_for(lambda: not dispatcher._windows)  # The summary's own cooldown passes quietly
+    dispatcher.submit(trigger, "failed", "a.log")
+    wait_for(lambda: len(fired) == 4)
+    assert fired[3] == (1, True, "a.log")
+
+def test_debounce_fires_once_the_hits_stop(dispatched, wait_for):
+    dispatcher, fired = dispatched
+    trigger = {"name": "✅ HLOD Generated", "keywords": ["Build time"], "debounce": 0.1, "cooldown": 0}
+    for _ in range(5):
+        dispatcher.submit(trigger, "Build time", "a.log")
+        time.sleep(0.02)
+    assert fired == []
+    wait_for(lambda: fired)
+    time.sleep(0.15)
+    assert fired == [(5, True, "a.log")]
+
+def test_full_queue_never_blocks_the_monitor(monkeypatch, wait_for):
+    release = threading.Event()
+    fired, reported = [], []
+    def run_trigger_actions(trigger, keyword, hits=1, play=True, source="", read_at=None):
+        release.wait()  # A slow toast holds up the worker
+        fired.append(hits)
+    monkeypatch.setattr(core, "run_trigger_actions", run_trigger_actions)
+    monkeypatch.setattr(core, "report_backlog", lambda entries, source: reported.append("backlog"))
+    monkeypatch.setattr(core, "report_sequence", lambda *args: reported.append("sequence"))
+    monkeypatch.setattr(core, "action_backends", [])
+    dispatcher = core.ActionDispatcher(maxsize=4)
+    trigger = {"name": "❌ Push Failure", "keywords": ["failed"], "cooldown": 0}
+
+    started = time.monotonic()
+    for _ in range(20):
+        dispatcher.submit(trigger, "failed", "a.log")
+    dispatcher.submit_backlog([[trigger, "failed", 3]], "b.log")
+    dispatcher.submit_sequence({"name": "Publish"}, 12.0, "Project", "a.log")
+    assert time.monotonic() - started < 0.5
+
+    release.set()
+    wait_for(lambda: sum(fired) == 20 and len(reported) == 2)
+    assert sorted(reported) == ["backlog", "sequence"]
+    dispatcher.close()
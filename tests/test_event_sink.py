@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+import notifier_core as core
+from sinkserver import HttpStandIn, TcpStandIn
+
+@pytest.fixture(autouse=True)
+def quick_retries(monkeypatch):
+    monkeypatch.setattr(core.EventSink, "RETRY_MIN", 0.05)
+    monkeypatch.setattr(core.EventSink, "RETRY_MAX", 0.05)
+
+@pytest.mark.parametrize("stand_in", [HttpStandIn, TcpStandIn])
+def test_spooled_events_are_sent_first_and_in_order(tmp_path, stand_in, wait_for):
+    endpoint = stand_in().start()
+    spool = str(tmp_path / "sink_spool.jsonl")
+    sink = core.EventSink(endpoint.url, spool, flush_interval=0.01)
+    sink.send({"n": 0})
+    assert sink.flush()
+    wait_for(lambda: len(endpoint.events) == 1)
+
+    endpoint.stop()
+    for n in range(1, 4):
+        sink.send({"n": n})
+        assert sink.flush()
+    assert sink.spooled == 3
+
+    endpoint.start()  # Same port; events sent meanwhile go behind the spooled ones
+    for n in range(4, 7):
+        sink.send({"n": n})
+    wait_for(lambda: len(endpoint.events) == 7)
+    sink.close()
+    endpoint.stop()
+    assert [event["n"] for event in endpoint.events] == list(range(7))
+    assert sink.spooled == 0
+
+def test_spool_is_sent_by_the_next_run(tmp_path, wait_for):
+    spool = str(tmp_path / "sink_spool.jsonl")
+    endpoint = HttpStandIn()
+    endpoint.status = 503
+    endpoint.start()
+    sink = core.EventSink(endpoint.url, spool, flush_interval=0.01)
+    sink.send({"n": 1})
+    sink.send({"n": 2})
+    assert sink.flush()
+    sink.close()
+
+    endpoint.status = 200
+    sink = core.EventSink(endpoint.url, spool, flush_interval=0.01)
+    sink.send({"n": 3})
+    wait_for(lambda: len(endpoint.events) == 3)
+    sink.close()
+    endpoint.stop()
+    assert [event["n"] for event in endpoint.events] == [1, 2, 3]
+
+def test_new_sink_waits_for_the_old_one_to_spool(tmp_path, wait_for):
+    spool = str(tmp_path / "sink_spool.jsonl")
+    endpoint = HttpStandIn().start()
+    old = core.EventSink("http://127.0.0.1:9/events", spool, flush_interval=0.01)
+    old._deliver = lambda lines: time.sleep(0.3)  # A slow endpoint that ends up refusing them
+    old.send({"n": 1})
+    old.send({"n": 2})
+    old.close(timeout=0)  # Like sync_event_sink after the URL changed
+
+    sink = core.EventSink(endpoint.url, spool, flush_interval=0.01, previous=old)
+    sink.send({"n": 3})
+    wait_for(lambda: len(endpoint.events) == 3)
+    sink.close()
+    endpoint.stop()
+    assert [event["n"] for event in endpoint.events] == [1, 2, 3]
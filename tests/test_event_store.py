@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+
+import notifier_core as core
+
+def test_prunes_in_steps_and_keeps_totals(tmp_path, monkeypatch):
+    core.apply_settings(dict(core.DEFAULT_SETTINGS, event_history_limit=100), save=False)
+    prunes = []
+    prune = core.EventStore._prune
+    monkeypatch.setattr(core.EventStore, "_prune", staticmethod(lambda db, below: (prunes.append(below), prune(db, below))))
+
+    path = str(tmp_path / "events.db")
+    store = core.EventStore(path)
+    for batch in range(30):
+        for i in range(10):
+            n = batch * 10 + i
+            store.write((1000.0 + n, ["PUSH", "HLOD"][n % 2], f"event {n}", f"log{n % 3}.log"))
+        assert store.flush()
+    store.close()
+
+    # Each prune removes more than a tenth of the limit, not just the last batch
+    assert prunes and all(below - previous > 10 for previous, below in zip([0] + prunes, prunes))
+    db = sqlite3.connect(path)
+    count, = db.execute("SELECT COUNT(*) FROM events").fetchone()
+    assert 100 <= count <= 110
+    expected = db.execute("SELECT type, source, COUNT(*) FROM events GROUP BY type, source").fetchall()
+    db.close()
+    assert sorted((t, s, c) for t, s, c, _ in store.totals()) == sorted(expected)
+    assert [e.message for e in store.query(limit=2)] == ["event 299", "event 298"]
+
+def test_query_pages_and_filters(tmp_path):
+    store = core.EventStore(str(tmp_path / "events.db"))
+    for n in range(5):
+        store.write((1000.0 + n, "PUSH" if n % 2 else "HLOD", f"event {n}", "a.log"))
+    store.flush()
+    page = store.query(limit=2)
+    assert [e.message for e in page] == ["event 4", "event 3"]
+    assert [e.message for e in store.query(limit=2, before=page[-1])] == ["event 2", "event 1"]
+    assert [e.message for e in store.query("PUSH")] == ["event 3", "event 1"]
+    assert store.query(since=1003.0, until=1004.0)[0].message == "event 3"
+    store.close()
+
+def test_import_starts_nothing(tmp_path):
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    script = "import threading, notifier_core; print(threading.active_count())"
+    env = dict(os.environ, APPDATA=str(tmp_path), PYTHONPATH=src)
+    output = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["1"]
+    assert os.listdir(tmp_path / "UEFNNotifier") == []
+
+def test_old_events_are_imported_once(tmp_path):
+    legacy = tmp_path / "events.txt"
+    legacy.write_text("".join(f"[2025-01-15 12:00:{n:02}] PUSH - Push {n} in a.log\n" for n in range(50)), encoding="utf-8")
+    path = str(tmp_path / "events.db")
+    stores = [core.EventStore(path, str(legacy)) for _ in range(4)]  # Like processes starting at once
+    threads = [threading.Thread(target=store.flush) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for store in stores:
+        store.close()
+    assert stores[0].totals()[0][:3] == ("PUSH", "a.log", 50)
+    assert len(stores[0].query(limit=100)) == 50
+
+def test_insert_returns_the_last_event_id(tmp_path):
+    db = sqlite3.connect(str(tmp_path / "events.db"))
+    db.executescript(core.EventStore.SCHEMA)
+    events = [(1000.0 + n, "PUSH", f"event {n}", "a.log") for n in range(51)]
+    assert core.EventStore._insert(db, events) == 51
+    assert core.EventStore._insert(db, [(2000.0, "HLOD", "new type", "b.log")]) == 52  # New totals row last
+    db.close()
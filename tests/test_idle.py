@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+import notifier_core as core
+
+LINE = b"[2025.01.15-12.00.00:000][  0]LogEditorBuildUtils: Build time %d\n"
+
+class Recorder:
+    def __init__(self):
+        self.hits = []
+
+    def submit(self, trigger, keyword, source="", read_at=None):
+        self.hits.append(trigger["name"])
+
+@pytest.mark.parametrize("backend", ["auto", "polling"])
+def test_idle_and_resume(tmp_path, monkeypatch, backend, wait_for):
+    log_path = tmp_path / "UnrealEditorFortnite.log"
+    log_path.write_bytes(LINE % 0)
+    processes = core.FixedProcessList(["UnrealEditorFortnite-Win64-Shipping.exe"])
+    recorder = Recorder()
+    monkeypatch.setattr(core, "editor_processes", processes)
+    monkeypatch.setattr(core, "action_dispatcher", recorder)
+    monkeypatch.setattr(core, "EDITOR_CHECK_INTERVAL", 0.2)
+    monkeypatch.setattr(core, "IDLE_POLL_INTERVAL", 0.1)
+    for name in ("stop_thread", "monitor_idle", "metrics_paused"):
+        monkeypatch.setattr(core, name, False)
+    monkeypatch.setattr(core, "status_message", "")
+    core.apply_settings(dict(core.DEFAULT_SETTINGS, log_folder=str(tmp_path), idle_mode="on", watch_backend=backend,
+                             idle_check_interval=0.1, poll_interval=0.1, catchup_window=0), save=False)
+
+    thread = threading.Thread(target=core.monitor_log, daemon=True)
+    thread.start()
+    try:
+        wait_for(lambda: core.status_message == "Monitoring Log")
+        with open(log_path, "ab") as f:
+            f.write(LINE % 1)
+        wait_for(lambda: len(recorder.hits) == 1)
+
+        processes.processes.clear()  # The editor exits
+        wait_for(lambda: core.monitor_idle)
+        assert core.status_message == "Idle, editor not running"
+        core.dump_metrics()
+        assert core.metrics_paused  # Skipped, and not rescheduled
+
+        processes.processes.append("UnrealEditorFortnite-Win64-Shipping.exe")
+        with open(log_path, "ab") as f:
+            f.write(LINE % 2)
+        wait_for(lambda: len(recorder.hits) == 2)
+        wait_for(lambda: not core.metrics_paused)
+        assert not core.monitor_idle
+        assert recorder.hits == ["✅ HLOD Generated"] * 2  # Continued where it stopped, not from the start
+    finally:
+        core.stop_monitor()
+        thread.join(5)
+    assert not thread.is_alive()
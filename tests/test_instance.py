@@ -0,0 +1,85 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import notifier_core as core
+
+@pytest.fixture
+def appdata(tmp_path, monkeypatch):
+    folder = tmp_path / "UEFNNotifier"
+    folder.mkdir()
+    monkeypatch.setattr(core, "APPDATA_FOLDER", str(folder))
+    monkeypatch.setattr(core, "INSTANCE_FILE", str(folder / "instance.json"))
+    monkeypatch.setattr(core, "INSTANCE_LOCK_FILE", str(folder / "instance.lock"))
+    return folder
+
+@pytest.fixture
+def instance(appdata, monkeypatch):
+    """A running instance: the lock plus a server with status and quit, like the headless one."""
+    monkeypatch.setattr(core, "status_message", "Monitoring a.log")
+    quit = threading.Event()
+
+    def stop():
+        threading.Thread(target=quit.set, daemon=True).start()
+        return "Exiting."
+
+    def reload():
+        raise OSError("settings.json is locked")
+
+    lock = core.InstanceLock.acquire()
+    server = core.CommandServer({"status": lambda: core.status_message, "quit": stop, "reload": reload})
+    yield server, quit
+    server.close()
+    lock.release()
+
+def test_second_instance_is_refused(appdata):
+    lock = core.InstanceLock.acquire()
+    assert lock is not None
+    assert core.InstanceLock.acquire() is None
+    lock.release()
+    again = core.InstanceLock.acquire()
+    assert again is not None
+    again.release()
+
+def test_status_and_quit(instance, wait_for):
+    server, quit = instance
+    assert core.send_command("status") == (True, "Monitoring a.log")
+    assert not quit.is_set()
+    assert core.send_command("quit") == (True, "Exiting.")
+    wait_for(quit.is_set)
+
+def test_failing_and_unknown_commands(instance):
+    assert core.send_command("reload") == (False, "reload failed: settings.json is locked")
+    ok, reply = core.send_command("dance")
+    assert not ok and reply == "Unknown command, use one of: status, quit, reload"
+
+def test_wrong_token_is_refused(instance):
+    server, _ = instance
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as conn:
+        conn.sendall(b'{"token": "guess", "command": "quit"}\n')
+        reply = json.loads(conn.makefile("rb").readline())
+    assert reply == {"ok": False, "reply": "Bad token"}
+
+def test_send_from_another_process(instance, appdata):
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    script = "import sys, notifier_core; sys.exit(notifier_core.run_send(['--send', 'status']))"
+    env = dict(os.environ, APPDATA=str(appdata.parent), PYTHONPATH=src)
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=30)
+    assert (result.returncode, result.stdout) == (0, "Monitoring a.log\n")
+
+def test_send_without_an_instance(appdata, capsys):
+    assert core.run_send(["--send", "status"]) == 1
+    assert "isn't running" in capsys.readouterr().err
+
+def test_close_removes_only_its_own_instance_file(appdata):
+    first = core.CommandServer({})
+    second = core.CommandServer({})  # Took over instance.json
+    first.close()
+    assert json.loads((appdata / "instance.json").read_text(encoding="utf-8"))["port"] == second.port
+    second.close()
+    assert not (appdata / "instance.json").exists()
@@ -0,0 +1,54 @@
+import notifier_core as core
+
+TRIGGERS = [
+    {"name": "Push", "keywords": ["Push finished"]},
+    {"name": "Error", "keywords": [], "category": "LogValkyrie", "verbosity": ["Error"]},
+]
+
+def names(hits):
+    return [(offset, [trigger["name"] for trigger, _ in matches]) for offset, _, matches in hits]
+
+def test_keyword_across_a_window_cut():
+    matcher = core.TriggerMatcher(TRIGGERS, max_line=64)
+    for cut in range(40, 80):
+        line = b"LogTemp: " + b"x" * (cut - 9 - 4) + b"Push finished" + b"y" * 100 + b"\n"
+        assert names(core.LineStream().match(matcher, line)) == [(0, ["Push"])], cut
+
+def test_line_across_blocks():
+    matcher = core.TriggerMatcher(TRIGGERS, max_line=64)
+    data = b"LogTemp: short\n" + b"LogValkyrie: Error: " + "é".encode("utf-8") * 100 + b"Push finished\nLogTemp: next\n"
+    for cut in range(16, len(data) - 14):
+        stream = core.LineStream()
+        hits = list(stream.match(matcher, data, 0, cut)) + list(stream.match(matcher, data, cut, final=True))
+        assert names(hits) == [(15, ["Push", "Error"])], cut
+        assert hits[0][1].startswith("LogValkyrie: Error: é")
+
+def test_unfinished_line_is_matched_at_the_end():
+    matcher = core.TriggerMatcher(TRIGGERS, max_line=64)
+    stream = core.LineStream()
+    assert list(stream.match(matcher, b"LogTemp: Push fin")) == []
+    assert names(stream.match(matcher, b"ished", final=True)) == [(0, ["Push"])]
+
+def test_anchors_only_match_at_the_real_line_edges():
+    triggers = [
+        {"name": "End", "keywords": [], "pattern": r"finished \d+$"},
+        {"name": "Start", "keywords": [], "pattern": r"^LogTemp: x"},
+        {"name": "Word", "keywords": [], "pattern": r"\bDone\b"},
+        {"name": "Upload", "keywords": [], "category": "LogValkyrie", "pattern": r"^Upload \w+ failed"},
+    ]
+    lines = [
+        "LogTemp: " + "finished 42 " * 400 + "and more",
+        "LogTemp: " + "x" * 5000 + " finished 42",
+        "LogTemp: " + "xLogTemp: x" * 500,
+        "LogOther: " + "UnDone " * 800 + "Done",
+        "[2025.01.15-12.00.00:000][  0]LogValkyrie: Error: Upload abc failed " + "Upload abc failed " * 300,
+        "[2025.01.15-12.00.00:000][  0]LogValkyrie: Error: later " + "Upload abc failed " * 300,
+    ]
+    for max_line in (64, 100, 257, 1000):
+        matcher = core.TriggerMatcher(triggers, max_line=max_line)
+        for line in lines:
+            data = line.encode("utf-8")
+            scan = core.LongLineScan(matcher, 0)
+            scan.feed(data, 0, len(data))
+            assert [t["name"] for t, _ in scan.finish()] == [t["name"] for t, _ in matcher.scan(line)], (max_line, line[:30])
+    assert [t["name"] for t, _ in matcher.scan(lines[0])] == []  # The case the windows got wrong
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import notifier_core as core
+
+TRIGGERS = [
+    {"name": "Build", "keywords": ["Build"]},
+    {"name": "HLOD", "keywords": ["Build time"]},
+    {"name": "Push", "keywords": ["Push finished", "Push finished ok", "ok"]},
+]
+
+def test_lint_warnings():
+    assert core.lint_triggers(TRIGGERS) == [
+        "'HLOD': keyword 'Build time' can't fire, lines with it already fire 'Build' first",
+        "'Push': keyword 'Push finished ok' never adds a hit, 'push finished' of the same trigger already matches those lines",
+        "'Push': keyword 'ok' is very short and will match many lines",
+    ]
+
+def test_lint_of_one_trigger_includes_the_triggers_it_shadows():
+    shadowed = "'HLOD': keyword 'Build time' can't fire, lines with it already fire 'Build' first"
+    assert core.lint_triggers(TRIGGERS, only=0) == [shadowed]  # Editing Build broke HLOD
+    assert core.lint_triggers(TRIGGERS, only=1) == [shadowed]
+    assert all(w.startswith("'Push'") for w in core.lint_triggers(TRIGGERS, only=2))
+
+@pytest.mark.parametrize("trigger, error", [
+    ({"name": "Bad", "keywords": [], "pattern": "finished ("}, "pattern of trigger 'Bad' is not a valid regex"),
+    ({"name": "Bad", "keywords": [], "verbosity": ["Error"]}, "needs a category to filter by verbosity"),
+    ({"name": "Bad", "keywords": "Push"}, "keywords of trigger 'Bad' must be a list of strings"),
+])
+def test_invalid_triggers_are_rejected(trigger, error):
+    with pytest.raises(ValueError, match=error.replace("(", r"\(")):
+        core.validate_settings(dict(core.DEFAULT_SETTINGS, triggers=[trigger]))
+
+def test_dry_run_report(tmp_path, capsys):
+    lines = []
+    for minute in range(60):
+        lines.append(f"[2025.01.15-12.{minute:02}.00:000][  0]LogEditorBuildUtils: Build time {minute}s")
+        lines.append(f"[2025.01.15-12.{minute:02}.30:000][  0]LogTemp: Display: nothing here")
+    lines.append("[2025.01.15-13.00.00:000][  0]LogValkyrie: Push finished")
+    data = "\n".join(lines).encode("utf-8") + b"\n"
+
+    report = core.dry_run(TRIGGERS, data, cooldown=600)
+    assert (report["lines"], report["hours"]) == (121, 1.0)
+    build, hlod, push = report["triggers"]
+    assert (build["hits"], build["fires"], build["notifications"]) == (60, 60, 12)  # First + summary per 10 minutes
+    assert build["per_hour"] == 12.0
+    assert (hlod["hits"], hlod["fires"]) == (60, 0)
+    assert "'HLOD' never fires, its 60 lines all fire 'Build' first" in hlod["warnings"]
+    assert "'Build' matches 49.6% of the lines" in build["warnings"]
+    assert (push["hits"], push["fires"], push["notifications"]) == (1, 1, 1)
+
+    log = tmp_path / "UnrealEditorFortnite.log"
+    log.write_bytes(data)
+    core.apply_settings(dict(core.DEFAULT_SETTINGS, triggers=TRIGGERS), save=False)
+    assert core.run_dry_run(["--dry-run", str(log), "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["triggers"][0]["hits"] == 60
+    assert core.run_dry_run(["--dry-run", str(log)]) == 1  # Warnings
+    out = capsys.readouterr().out
+    assert "Build" in out and "never fires" in out
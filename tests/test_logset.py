@@ -0,0 +1,111 @@
+import os
+import time
+
+import notifier_core as core
+
+LINE = b"[2025.01.15-12.00.00:000][  0]LogEditorBuildUtils: Build time %d\n"
+
+def make_logs(tmp_path):
+    path = str(tmp_path / "UnrealEditorFortnite.log")
+    with open(path, "wb") as f:
+        f.write(LINE % 0)
+    blocks = []
+    logs = core.LogSet(lambda tailer, block: blocks.append(block))
+    logs.started = time.time() - 60  # The log counts as written since we started
+    logs.update([path], 65536)
+    return path, logs, blocks
+
+def append(path, data):
+    with open(path, "ab") as f:
+        f.write(data)
+
+def read_all(logs):
+    for tailer in logs:
+        while logs.read(tailer):
+            pass
+
+def test_dropped_log_continues_where_it_stopped(tmp_path):
+    path, logs, blocks = make_logs(tmp_path)
+    append(path, LINE % 1)
+    read_all(logs)
+    assert blocks == [LINE % 1]
+
+    logs.drop(path, drain=False)  # Like after a read error
+    append(path, LINE % 2)
+    logs.update([path], 65536)
+    read_all(logs)
+    assert blocks == [LINE % 1, LINE % 2]
+    logs.close()
+
+def test_replaced_log_is_read_from_the_start(tmp_path):
+    path, logs, blocks = make_logs(tmp_path)
+    logs.drop(path, drain=False)
+    os.replace(path, path[:-4] + "-backup-1.log")
+    append(path, LINE % 3)
+    logs.update([path], 65536)
+    read_all(logs)
+    assert blocks == [LINE % 3]
+    logs.close()
+
+def test_partial_line_is_read_again_after_drop(tmp_path):
+    path, logs, blocks = make_logs(tmp_path)
+    append(path, b"[2025.01.15-12.00.00:000][  0]LogTemp: half")
+    read_all(logs)
+    logs.drop(path, drain=False)
+    append(path, b" a line\n")
+    logs.update([path], 65536)
+    read_all(logs)
+    assert blocks == [b"[2025.01.15-12.00.00:000][  0]LogTemp: half a line\n"]
+    logs.close()
+
+def test_checkpoints_only_when_a_log_moved(tmp_path):
+    path, logs, blocks = make_logs(tmp_path)
+    first = logs.moved_checkpoints()
+    assert first[core.checkpoint_key(path)]["offset"] == len(LINE % 0)
+    assert logs.moved_checkpoints() is None  # Only the time would differ
+
+    append(path, LINE % 1)
+    read_all(logs)
+    assert logs.moved_checkpoints()[core.checkpoint_key(path)]["offset"] == len(LINE % 0) * 2
+    logs.suspend()  # Same positions, now kept as closed logs
+    assert logs.moved_checkpoints() is None
+    logs.close()
+
+def test_log_gone_before_it_is_opened(tmp_path):
+    path, logs, blocks = make_logs(tmp_path)
+    missing = str(tmp_path / "UnrealEditorFortnite_2.log")  # Renamed away between the scan and the open
+    assert not logs.update([path, missing], 65536)
+    assert [t.path for t in logs] == [path]
+    logs.close()
+
+def test_truncated_log_is_read_from_the_start(tmp_path):
+    path, logs, blocks = make_logs(tmp_path)
+    append(path, LINE % 1 + LINE % 2)
+    read_all(logs)
+    with open(path, "wb") as f:  # Truncated in place and written again
+        f.write(LINE % 3)
+    assert logs.check()
+    read_all(logs)
+    assert blocks == [LINE % 1 + LINE % 2, LINE % 3]
+    assert not logs.check()
+    logs.close()
+
+def test_rotated_log_is_drained_before_the_new_one(tmp_path):
+    path, logs, blocks = make_logs(tmp_path)
+    append(path, LINE % 1)  # Written just before the rotation, not read yet
+    os.replace(path, path[:-4] + "-backup-1.log")
+    append(path, LINE % 2)
+    assert logs.check()
+    assert blocks == [LINE % 1] and len(logs) == 0
+    logs.update([path], 65536)
+    read_all(logs)
+    assert blocks == [LINE % 1, LINE % 2]
+    logs.close()
+
+def test_removed_log_is_drained(tmp_path):
+    path, logs, blocks = make_logs(tmp_path)
+    append(path, LINE % 1 + b"no newline yet")
+    os.remove(path)
+    assert logs.check()
+    assert blocks == [LINE % 1, b"no newline yet\n"]
+    assert len(logs) == 0
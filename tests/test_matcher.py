@@ -0,0 +1,70 @@
+import notifier_core as core
+
+def lines_of(matcher, block):
+    return [(line, trigger["name"], keyword) for _, line, trigger, keyword in matcher.scan_lines(block)]
+
+def test_anchored_line_pattern_in_block():
+    matcher = core.TriggerMatcher([
+        {"name": "Done", "keywords": [], "pattern": "^LogCook: Display: Done"},
+        {"name": "End", "keywords": [], "pattern": r"finished \d+$"},
+    ])
+    block = (
+        b"LogInit: Display: starting\n"
+        b"LogCook: Display: Done cooking\n"
+        b"LogTemp: not LogCook: Display: Done here\n"
+        b"LogTemp: finished 42\r\n"
+        b"LogTemp: finished 42 later\n"
+    )
+    assert lines_of(matcher, block) == [
+        ("LogCook: Display: Done cooking", "Done", "LogCook: Display: Done"),
+        ("LogTemp: finished 42\r", "End", "finished 42"),
+    ]
+
+def test_unicode_classes_in_line_pattern():
+    matcher = core.TriggerMatcher([{"name": "Build", "keywords": [], "pattern": r"Build \w+ done"}])
+    block = "LogTemp: Build Héllo done\nLogTemp: Build ! done\n".encode("utf-8")
+    assert [name for _, name, _ in lines_of(matcher, block)] == ["Build"]
+
+def test_line_pattern_matches_like_scan():
+    triggers = [
+        {"name": "Push", "keywords": ["Push finished"]},
+        {"name": "Error", "keywords": [], "category": "LogValkyrie", "verbosity": ["Error"]},
+        {"name": "Line", "keywords": [], "pattern": r"^\[.*\]Log\w+: Warning: disk$"},
+    ]
+    matcher = core.TriggerMatcher(triggers)
+    lines = [
+        "[2025.01.15-12.00.00:000][  1]LogTemp: Push finished",
+        "[2025.01.15-12.00.01:000][  2]LogValkyrie: Error: upload failed",
+        "[2025.01.15-12.00.02:000][  3]LogDisk: Warning: disk",
+        "[2025.01.15-12.00.03:000][  4]LogDisk: Warning: disk space",
+        "LogValkyrie: Warning: slow",
+    ]
+    block = "".join(line + "\n" for line in lines).encode("utf-8")
+    expected = [(line, *matcher.scan(line)[0]) for line in lines if matcher.scan(line)]
+    assert [(line, trigger, keyword) for _, line, trigger, keyword in matcher.scan_lines(block)] == expected
+    assert len(expected) == 3
+
+def test_keywords_match_like_the_legacy_loop():
+    triggers = [dict(t) for t in core.DEFAULT_SETTINGS["triggers"]]
+    triggers.append({"name": "Overlap", "keywords": ["build time", "ready"]})
+    lines = [
+        "[2025.01.15-12.00.00:000][  0]LogEditorBuildUtils: Build time 3.2s",
+        "LogMemory: EMemorySamplerState::Ready",
+        "logworldpartitioneditor: error: lowercase",
+        "LogTemp: Display: nothing here",
+        "LogTemp: Build Time and EMemorySamplerState::Ready",
+        "LogValkyrieRequestManagerEditor: Error: Ünïcode failure",
+    ]
+    block = "\n".join(lines).encode("utf-8") + b"\n"
+
+    def legacy(line):
+        line_lower = line.lower()
+        for trigger in triggers:
+            for keyword in trigger["keywords"]:
+                if keyword.lower() in line_lower:
+                    return trigger["name"], keyword
+        return None
+
+    matcher = core.TriggerMatcher(triggers)
+    found = {line: (trigger["name"], keyword) for _, line, trigger, keyword in matcher.scan_lines(block)}
+    assert found == {line: legacy(line) for line in lines if legacy(line)}
@@ -0,0 +1,21 @@
+import notifier_core as core
+
+def test_timestamp_of_lines_without_category():
+    line = "[2025.01.15-12.00.00:102][  7]EMemorySamplerState::Ready"
+    assert core.parse_log_line(line) is None
+    assert core.log_line_stamp(line) == "2025.01.15-12.00.00:102"
+    assert core.log_line_time(line) is not None
+    assert core.log_line_time("EMemorySamplerState::Ready") is None
+
+def test_scan_reports_timestamps(tmp_path):
+    path = tmp_path / "UnrealEditorFortnite.log"
+    path.write_bytes(
+        b"[2025.01.15-12.00.00:000][  0]LogInit: Display: starting\n"
+        b"[2025.01.15-12.00.00:102][  7]EMemorySamplerState::Ready\n"
+        b"LogEditorBuildUtils: Build time 3s\n"
+    )
+    hits = list(core.scan_logs([str(path)], core.DEFAULT_SETTINGS["triggers"], jobs=1))
+    assert [(line, trigger["name"], stamp) for _, line, _, trigger, _, stamp in hits] == [
+        (2, "✅ Session Connected", "2025.01.15-12.00.00:102"),
+        (3, "✅ HLOD Generated", "-"),
+    ]
@@ -0,0 +1,89 @@
+import pytest
+
+import notifier_core as core
+
+PUSH = {
+    "name": "Push",
+    "steps": [{"keywords": ["Push started"]}, {"keywords": ["Uploading"]}, {"keywords": ["Push finished"]}],
+    "abort": [{"keywords": ["Push cancelled"]}],
+    "timeout": 60,
+}
+
+def line(stamp, message):
+    return f"[2025.01.15-{stamp}][  0]LogValkyrie: {message}\n".encode("utf-8")
+
+class SyncDispatcher:
+    """Reports finished runs right away instead of on the worker thread."""
+
+    def submit_sequence(self, *args):
+        core.report_sequence(*args)
+
+@pytest.fixture
+def events(tmp_path, monkeypatch):
+    events = []
+    def log_event(event_type, message, source=""):
+        if event_type != "NOTIFY":
+            events.append(message)
+    monkeypatch.setattr(core, "log_event", log_event)
+    monkeypatch.setattr(core, "action_dispatcher", SyncDispatcher())
+    monkeypatch.setattr(core, "duration_history", core.DurationHistory(str(tmp_path / "durations.json")))
+    monkeypatch.setattr(core.DurationHistory, "record", record_now(core.DurationHistory.record))
+    core.apply_settings(dict(core.DEFAULT_SETTINGS, sequences=[PUSH]), save=False)
+    return events
+
+def record_now(record):
+    def record_and_save(self, name, project, seconds):
+        record(self, name, project, seconds)
+        self.save()  # Instead of a second later on the scheduler
+    return record_and_save
+
+def tracker(tmp_path, name="UnrealEditorFortnite.log"):
+    path = tmp_path / name
+    path.write_text('LogInit: Command Line: "C:/Projects/My Island/My Island.uefnproject" -disableplugins\n')
+    return core.SequenceTracker(str(path), name)
+
+def test_run_is_timed_by_log_timestamps(tmp_path, events):
+    log = tracker(tmp_path)
+    block = (line("12.00.00:000", "Push started") + line("12.00.05:000", "Push finished")  # Out of order
+             + line("12.00.10:000", "Uploading") + line("12.00.42:500", "Push finished"))
+    log.feed(core.settings, block[:50])  # Blocks can end anywhere
+    log.feed(core.settings, block[50:])
+    assert events == ["Push done in 42 s (My Island, UnrealEditorFortnite.log)"]
+    assert core.duration_history.stats("Push", "My Island") == (1, 42.5, 42.5)
+    assert not log.runs
+
+    reloaded = core.DurationHistory(core.duration_history.path)
+    assert reloaded.keys() == [("Push", "My Island")]
+    assert reloaded.stats("Push", "My Island") == (1, 42.5, 42.5)
+
+def test_abort_and_timeout_drop_the_run(tmp_path, events):
+    log = tracker(tmp_path)
+    log.feed(core.settings, line("12.00.00:000", "Push started") + line("12.00.01:000", "Push cancelled")
+             + line("12.00.02:000", "Uploading") + line("12.00.03:000", "Push finished"))
+    assert events == ["Push aborted after 1 s in UnrealEditorFortnite.log"]
+
+    log.feed(core.settings, line("12.01.00:000", "Push started"))
+    log.runs["Push"].started -= 61  # No progress within the timeout
+    log.feed(core.settings, line("12.02.01:000", "Uploading") + line("12.02.02:000", "Push finished"))
+    assert events[1] == "Push timed out after step 1 in UnrealEditorFortnite.log"
+    assert len(events) == 2
+    assert core.duration_history.keys() == []
+
+def test_logs_are_timed_separately(tmp_path, events):
+    first, second = tracker(tmp_path), tracker(tmp_path, "UnrealEditorFortnite_2.log")
+    first.feed(core.settings, line("12.00.00:000", "Push started") + line("12.00.01:000", "Uploading"))
+    second.feed(core.settings, line("12.00.10:000", "Push started") + line("12.00.11:000", "Uploading"))
+    first.feed(core.settings, line("12.00.30:000", "Push finished"))
+    second.feed(core.settings, line("12.00.50:000", "Push finished"))
+    assert events == [
+        "Push done in 30 s (My Island, UnrealEditorFortnite.log)",
+        "Push done in 40 s (My Island, UnrealEditorFortnite_2.log)",
+    ]
+    assert core.duration_history.stats("Push", "My Island") == (2, 30, 40)
+
+def test_history_keeps_the_latest_runs(tmp_path, events):
+    core.apply_settings(dict(core.DEFAULT_SETTINGS, sequences=[PUSH], duration_history=3), save=False)
+    history = core.DurationHistory(str(tmp_path / "durations.json"))
+    for seconds in (100, 1, 2, 3):
+        history.record("Push", "My Island", seconds)
+    assert history.stats("Push", "My Island") == (3, 2, 3)
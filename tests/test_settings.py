@@ -0,0 +1,128 @@
+import json
+import threading
+
+import pytest
+
+import notifier_core as core
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    monkeypatch.setattr(core, "APPDATA_FOLDER", str(tmp_path))
+    monkeypatch.setattr(core, "SETTINGS_FILE", str(path))
+    monkeypatch.setattr(core, "settings_file_state", (None, None))
+    monkeypatch.setattr(core, "settings_file_hash", None)
+    monkeypatch.setattr(core, "status_message", "")
+    yield path
+    core.flush_settings()  # Don't leave a pending save for a later test's file
+
+def write(path, data):
+    path.write_text(json.dumps(data) if not isinstance(data, str) else data, encoding="utf-8")
+
+def test_partial_settings_are_filled_from_the_defaults():
+    data = {"log_file": "C:/logs/UnrealEditorFortnite.log", "trigger_cooldown": 5}
+    result = core.validate_settings(data)
+    assert result["log_file"] == "C:/logs/UnrealEditorFortnite.log"
+    assert result["trigger_cooldown"] == 5
+    assert result["triggers"] == core.DEFAULT_SETTINGS["triggers"]
+    assert data == {"log_file": "C:/logs/UnrealEditorFortnite.log", "trigger_cooldown": 5}
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"log_file": 3},
+    {"triggers": {}},
+    {"triggers": [{"keywords": ["x"]}]},
+    {"triggers": [{"name": "X", "keywords": "Push"}]},
+    {"triggers": [{"name": "X", "keywords": [], "verbosity": ["Error"]}]},
+    {"triggers": [{"name": "X", "keywords": [], "pattern": "("}]},
+    {"triggers": [{"name": "X", "keywords": ["x"], "cooldown": -1}]},
+    {"sequences": [{"name": "S", "steps": [{"keywords": ["x"]}]}]},
+    {"project_pattern": "["},
+    {"max_line_length": 10},
+    {"metrics_port": 70000},
+    {"idle_mode": "sometimes"},
+    {"poll_interval": 0},
+    {"event_sink_url": "ftp://example.com"},
+])
+def test_bad_settings_are_rejected(data):
+    with pytest.raises(ValueError):
+        core.validate_settings(data)
+
+def test_snapshot_is_read_only():
+    snapshot = core.apply_settings(dict(core.DEFAULT_SETTINGS, trigger_cooldown=7), save=False)
+    with pytest.raises(TypeError):
+        snapshot["triggers"][0]["name"] = "Changed"
+    data = snapshot.to_dict()
+    data["triggers"][0]["name"] = "Changed"
+    assert core.settings["triggers"][0]["name"] == core.DEFAULT_SETTINGS["triggers"][0]["name"]
+
+def test_unreadable_file_loads_the_defaults(settings_file, capsys):
+    write(settings_file, "{not json")
+    core.load_settings()
+    assert core.settings.to_dict() == core.DEFAULT_SETTINGS
+    assert "Failed to load settings" in capsys.readouterr().out
+
+def test_invalid_file_loads_the_defaults(settings_file, capsys):
+    write(settings_file, {"idle_mode": "sometimes"})
+    core.load_settings()
+    assert core.settings["idle_mode"] == core.DEFAULT_SETTINGS["idle_mode"]
+    assert "idle_mode" in capsys.readouterr().out
+
+def test_partial_file_is_completed_on_disk(settings_file):
+    write(settings_file, {"trigger_cooldown": 9})
+    core.load_settings()
+    assert core.settings["trigger_cooldown"] == 9
+    core.flush_settings()
+    assert json.loads(settings_file.read_text(encoding="utf-8")) == dict(core.DEFAULT_SETTINGS, trigger_cooldown=9)
+
+def test_edited_file_swaps_the_snapshot(settings_file):
+    write(settings_file, core.DEFAULT_SETTINGS)
+    core.load_settings()
+    before = core.settings
+    assert not core.reload_settings_if_changed()
+
+    write(settings_file, dict(core.DEFAULT_SETTINGS, trigger_cooldown=11))
+    assert core.reload_settings_if_changed()
+    assert core.settings is not before
+    assert core.settings.version == before.version + 1
+    assert core.settings["trigger_cooldown"] == 11
+    assert before["trigger_cooldown"] == core.DEFAULT_SETTINGS["trigger_cooldown"]
+    assert core.settings.matcher is not before.matcher  # Rebound to the new triggers, not compiled again
+    assert core.settings.matcher.signature == before.matcher.signature
+    assert core.status_message == "Settings reloaded."
+
+def test_invalid_edit_keeps_the_previous_snapshot(settings_file, capsys):
+    write(settings_file, core.DEFAULT_SETTINGS)
+    core.load_settings()
+    before = core.settings
+    write(settings_file, dict(core.DEFAULT_SETTINGS, max_line_length=1))
+    assert not core.reload_settings_if_changed()
+    assert core.settings is before
+    assert "keeping previous settings" in capsys.readouterr().out
+    assert core.status_message == "Settings file invalid."
+
+def test_own_save_is_not_reloaded(settings_file):
+    core.load_settings()
+    core.apply_settings(dict(core.DEFAULT_SETTINGS, trigger_cooldown=3), save=False)
+    core.flush_settings()
+    snapshot = core.settings
+    assert not core.reload_settings_if_changed()
+    assert core.settings is snapshot
+
+def test_watcher_reloads_an_edited_file(settings_file, monkeypatch, wait_for):
+    write(settings_file, core.DEFAULT_SETTINGS)
+    core.load_settings()
+    monkeypatch.setattr(core, "stop_thread", False)
+    thread = threading.Thread(target=core.watch_settings_file, daemon=True)
+    thread.start()
+    try:
+        edited = dict(core.DEFAULT_SETTINGS, trigger_cooldown=13)
+        # Write until seen, in case the first write beat the watch on the folder
+        wait_for(lambda: core.settings["trigger_cooldown"] == 13 or write(settings_file, edited))
+    finally:
+        core.stop_thread = True
+        if core.settings_watcher:
+            core.settings_watcher.wake()
+        thread.join(5)
+    assert not thread.is_alive()
+    assert core.settings_watcher is None
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import notifier_core as core
+
+class FakePlayer:
+    def __init__(self):
+        self.played = []
+
+    def play_bytes(self, data):
+        self.played.append(data)
+
+    def play_default(self):
+        self.played.append("default")
+
+@pytest.fixture
+def player(monkeypatch):
+    player = FakePlayer()
+    monkeypatch.setattr(core, "action_backends", [core.SoundBackend(player)])
+    monkeypatch.setattr(core, "sound_cache", core.SoundCache())
+    return player
+
+def test_plays_cached_bytes_and_reloads_changed_files(tmp_path, player):
+    sound = tmp_path / "push.wav"
+    sound.write_bytes(b"RIFF one")
+    core.play_sound(str(sound))
+
+    sound.write_bytes(b"RIFF two")
+    os.utime(sound, ns=(1, 1))
+    core.play_sound(str(sound))  # Still cached; the change is picked up after this play
+    core.play_sound(str(sound))
+    assert player.played == [b"RIFF one", b"RIFF one", b"RIFF two"]
+
+    os.remove(sound)
+    core.play_sound(str(sound))
+    core.play_sound(str(sound))
+    assert player.played[3:] == [b"RIFF two", "default"]
+
+def test_missing_sound_plays_the_default_and_warns_once(tmp_path, player, capsys):
+    missing = str(tmp_path / "missing.wav")
+    core.play_sound(missing)
+    core.play_sound(missing)
+    core.play_sound("")
+    assert player.played == ["default", "default", "default"]
+    assert capsys.readouterr().out.count("Sound file not found") == 1
+
+def test_settings_sounds_are_preloaded(tmp_path, player):
+    sound = tmp_path / "hlod.wav"
+    sound.write_bytes(b"RIFF hlod")
+    triggers = [dict(core.DEFAULT_SETTINGS["triggers"][0], sound_file=str(sound))]
+    core.apply_settings(dict(core.DEFAULT_SETTINGS, triggers=triggers), save=False)
+    core.sound_cache.sync(core.settings)
+    os.remove(sound)
+    core.play_sound(str(sound))
+    assert player.played == [b"RIFF hlod"]